@@ -1,3 +1,5 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 import os
@@ -7,14 +9,100 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+
+# Engine profiles, pick with DB_PROFILE (defaults to prod when ENVIRONMENT=production)
+DB_PROFILES = {
+    "dev": {
+        "echo": False,  # DB_ECHO=true to log SQL, every statement is a log write
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_pre_ping": False,
+        "pool_recycle": -1,
+        "pool_timeout": 30,
+        "query_cache_size": 500,
+    },
+    "prod": {
+        "echo": False,
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,  # below MySQL's default wait_timeout
+        "pool_timeout": 10,
+        "query_cache_size": 1200,
+    },
+}
+
+DB_PROFILE = os.getenv("DB_PROFILE", "prod" if ENVIRONMENT == "production" else "dev")
+
+# Applied to every new SQLite connection so dashboard reads don't block call writes
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -20000,  # ~20MB page cache
+    "temp_store": "MEMORY",
+    "mmap_size": 134217728,
+}
+
+
+def _env_override(name: str, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.lower() in ("1", "true", "yes")
+    return type(default)(value)
+
+
+def get_engine_settings(profile: str = DB_PROFILE) -> dict:
+    """Resolve the engine profile, letting DB_* env vars override single values"""
+    settings = dict(DB_PROFILES.get(profile, DB_PROFILES["dev"]))
+    for key, default in settings.items():
+        settings[key] = _env_override(f"DB_{key.upper()}", default)
+    return settings
+
+
+def build_engine_kwargs(url: str, settings: dict) -> dict:
+    """Translate a profile into create_async_engine() arguments for this backend"""
+    parsed = make_url(url)
+    in_memory = parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+    kwargs = {
+        "echo": settings["echo"],
+        "future": True,
+        "query_cache_size": settings["query_cache_size"],
+    }
+
+    # In-memory SQLite uses a StaticPool, which takes no sizing arguments
+    if not in_memory:
+        kwargs.update(
+            pool_size=settings["pool_size"],
+            max_overflow=settings["max_overflow"],
+            pool_pre_ping=settings["pool_pre_ping"],
+            pool_recycle=settings["pool_recycle"],
+            pool_timeout=settings["pool_timeout"],
+        )
+
+    return kwargs
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
 
 # Create async engine
 engine = create_async_engine(
     DATABASE_URL,
-    echo=True,
-    future=True
+    **build_engine_kwargs(DATABASE_URL, get_engine_settings())
 )
 
+if engine.dialect.name == "sqlite":
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+
 # Session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -38,6 +126,77 @@ async def get_db():
             await session.close()
 
 
+async def get_read_db():
+    """Session for GET endpoints: never commits, closing releases the transaction"""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+# Backfill for columns added to existing tables, see upgrade_schema()
+COLUMN_BACKFILLS = {
+    ("calls", "updated_at"): "COALESCE(ended_at, started_at)",
+    ("transcripts", "updated_at"): "created_at",
+}
+
+# Row versions feed the ETags, whole-second MySQL DATETIMEs would repeat them
+PRECISE_COLUMNS = {("calls", "updated_at"), ("transcripts", "updated_at")}
+
+
+def upgrade_schema(connection) -> list:
+    """Add model columns that existing tables lack; create_all only creates missing tables.
+
+    Runs on every start, so a database created by an older version (or the
+    checked-in dev SQLite file) never serves queries against columns it
+    doesn't have. db/migrations has the same changes as plain SQL.
+    """
+    from sqlalchemy import inspect
+    from loguru import logger
+
+    inspector = inspect(connection)
+    quote = connection.dialect.identifier_preparer.quote
+    changes = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"]: column for column in inspector.get_columns(table.name)}
+
+        added = [column for column in table.columns if column.name not in existing]
+        for column in added:
+            # Constraints come from the indexes below, SQLite can't add them with the column
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.exec_driver_sql(
+                f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+            )
+            backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+            if backfill:
+                connection.exec_driver_sql(f"UPDATE {quote(table.name)} SET {quote(column.name)} = {backfill}")
+            changes.append(f"added {table.name}.{column.name}")
+
+        added_names = {column.name for column in added}
+        for index in table.indexes:
+            if any(column.name in added_names for column in index.columns):
+                index.create(connection)
+
+        if connection.dialect.name in ("mysql", "mariadb"):
+            for table_name, column_name in PRECISE_COLUMNS:
+                column = existing.get(column_name)
+                if table_name == table.name and column and not getattr(column["type"], "fsp", None):
+                    connection.exec_driver_sql(
+                        f"ALTER TABLE {quote(table.name)} MODIFY {quote(column_name)} DATETIME(6) NULL"
+                    )
+                    changes.append(f"widened {table.name}.{column_name} to DATETIME(6)")
+
+    for change in changes:
+        logger.info(f"Schema upgrade: {change}")
+    return changes
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+
+
+async def close_db():
+    """Release pooled connections on shutdown"""
+    await engine.dispose()
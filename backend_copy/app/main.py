@@ -1,53 +1,54 @@
-from fastapi import FastAPI, WebSocket
+from fastapi import Depends, FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-import os
 from dotenv import load_dotenv
-from openai import OpenAI, AuthenticationError
+from loguru import logger
 
-from app.database import init_db
+from app.database import init_db, close_db
 from app.routers import calls
+from app.services import startup, providers
+from app.services.cache import cache
+from app.services.drain import drain
+from app.services.events import event_bus
+from app.utils.admin_auth import require_admin
+from app.utils.loop_monitor import loop_monitor
+from app.utils.log import intercept_stdlib_logging, log_settings, set_log_level, setup_logging
 
 # Load environment variables
 load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-print("🔑 OpenAI Key Loaded:", "Yes" if api_key else "No")
-
-# ---- Helper: Verify OpenAI Key ----
-def verify_openai_key():
-    if not api_key:
-        print("❌ Missing OPENAI_API_KEY in .env file.")
-        return False
-
-    try:
-        client = OpenAI(api_key=api_key)
-        # Try fetching a lightweight resource (models list)
-        _ = client.models.list()
-        print("✅ OpenAI API key verified successfully.")
-        return True
-    except AuthenticationError:
-        print("❌ Invalid OpenAI API key. Please check your .env file.")
-        return False
-    except Exception as e:
-        print(f"⚠️ Could not verify OpenAI API key: {e}")
-        return False
+setup_logging()
 
 # ---- Lifespan context manager ----
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("🚀 Starting up... Initializing database")
+    # uvicorn has installed its own handlers by now
+    intercept_stdlib_logging()
+    logger.info("Starting up, initializing database")
     await init_db()
-    print("✅ Database initialized")
+    startup.mark_db_ready()
+    logger.info("Database initialized")
 
-    print("🧠 Verifying OpenAI API key...")
-    key_ok = verify_openai_key()
-    if not key_ok:
-        print("⚠️ Warning: OpenAI key invalid or missing. Voice agent may fail later.")
+    # The pipeline is loaded before serving, provider checks run in the background unless STARTUP_MODE=eager
+    logger.info(f"Warming pipeline and verifying providers ({startup.STARTUP_MODE} mode)")
+    await startup.run_startup_tasks()
+    loop_monitor.start()
 
     yield
-    # Shutdown
-    print("👋 Shutting down...")
+    # Shutdown: live calls and post-call jobs get to finish first
+    logger.info("Draining live calls")
+    await drain.wait()
+    logger.info(f"Drained: {drain.status()}")
+    await loop_monitor.stop()
+    await startup.cancel_startup_tasks()
+    if providers.TTS_PROVIDER == "hedged":
+        from app.services.hedged_tts import close_http_client
+        await close_http_client()
+    await close_db()
+    logger.info("Shutting down")
+    # Flush records still queued for the writer thread
+    await logger.complete()
 
 # ---- Create FastAPI app ----
 app = FastAPI(
@@ -86,4 +87,72 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok"}
+    from app.services.resilience import resilience_summary
+    return {
+        "status": "ok",
+        "startup": startup.startup_state,
+        "providers": providers.active_providers(),
+        "resilience": resilience_summary(),
+    }
+
+@app.get("/health/cache")
+async def cache_stats():
+    return cache.stats()
+
+@app.get("/health/events")
+async def event_stats():
+    return event_bus.stats()
+
+@app.get("/health/speculation")
+async def speculation_stats():
+    """Speculative LLM hit rate and wasted tokens (SPECULATIVE_LLM=true)"""
+    from app.services.speculative_llm import speculation_summary
+    return speculation_summary()
+
+@app.get("/health/tts")
+async def tts_health():
+    """Hedged TTS provider scores, circuit breakers and hedge counts (TTS_PROVIDER=hedged)"""
+    from app.services.hedged_tts import tts_health_summary
+    return tts_health_summary()
+
+@app.get("/health/loop")
+async def loop_stats(reset: bool = False):
+    """Event loop lag; pass reset=true to start a fresh measurement window"""
+    stats = loop_monitor.stats()
+    if reset:
+        loop_monitor.reset()
+    return stats
+
+@app.get("/ready")
+async def readiness_check():
+    """Load balancers should route calls here only once this returns 200"""
+    status_code = 200 if startup.is_ready() and not drain.draining else 503
+    return JSONResponse(status_code=status_code, content={**startup.startup_state, "draining": drain.draining})
+
+# ---- Admin endpoints ----
+# Bearer ADMIN_TOKEN, see app/utils/admin_auth.py
+@app.post("/admin/drain", dependencies=[Depends(require_admin)])
+async def start_drain(timeout: float = None):
+    """Stop taking calls and let live ones finish (timeout in seconds), poll GET until phase is done"""
+    return drain.start(timeout)
+
+@app.get("/admin/drain", dependencies=[Depends(require_admin)])
+async def drain_status():
+    return drain.status()
+
+@app.delete("/admin/drain", dependencies=[Depends(require_admin)])
+async def stop_drain():
+    """Take calls again, e.g. after a cancelled deploy"""
+    return drain.resume()
+
+@app.get("/admin/log-level", dependencies=[Depends(require_admin)])
+async def get_log_level():
+    return log_settings()
+
+@app.post("/admin/log-level", dependencies=[Depends(require_admin)])
+async def change_log_level(level: str = None, debug_sample_rate: float = None):
+    """Change the log level (DEBUG, INFO, ...) and the share of DEBUG records kept, without a restart"""
+    try:
+        return set_log_level(level, debug_sample_rate)
+    except ValueError:
+        return JSONResponse(status_code=422, content={"detail": f"Unknown log level '{level}'"})
@@ -51,10 +51,14 @@
 
 
 from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
+# ETags are built from it, so two changes within one second must differ; MySQL DATETIME keeps whole seconds
+RowVersion = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql", "mariadb")
+
 
 class Patient(Base):
     __tablename__ = "patients"
@@ -78,10 +82,13 @@ class Call(Base):
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
     call_sid = Column(String(100), unique=True, nullable=False)
     status = Column(String(20), default="initiated")  # Added length
+    campaign = Column(String(50), nullable=True, index=True)  # groups calls under a shared budget
+    idempotency_key = Column(String(100), nullable=True, unique=True, index=True)  # dedups /initiate retries
     duration = Column(Integer, default=0)
     cost = Column(Float, default=0.0)
     started_at = Column(DateTime, default=datetime.utcnow)
     ended_at = Column(DateTime, nullable=True)
+    updated_at = Column(RowVersion, default=datetime.utcnow, onupdate=datetime.utcnow)  # row version for ETags
 
     patient = relationship("Patient", back_populates="calls")
     transcript = relationship("Transcript", back_populates="call", uselist=False, cascade="all, delete-orphan")
@@ -98,5 +105,6 @@ class Transcript(Base):
     llm_cost = Column(Float, default=0.0)
     tts_cost = Column(Float, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(RowVersion, default=datetime.utcnow, onupdate=datetime.utcnow)  # row version for ETags
 
     call = relationship("Call", back_populates="transcript")
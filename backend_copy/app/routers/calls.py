@@ -1,21 +1,92 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import Response
+from fastapi.responses import Response, JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 import uuid
-from sqlalchemy import delete
-from app.database import get_db, AsyncSessionLocal
+from xml.sax.saxutils import escape
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from loguru import logger
+from app.database import get_db, get_read_db, AsyncSessionLocal
 from app.models import Patient, Call
-from app.services.plivo_service import PlivoService
+from app.utils.http_cache import make_etag, is_not_modified, cache_headers, not_modified
+from app.utils.json_stream import select_fields, stream_json_list
+from app.services.drain import drain
+from app.services.events import event_bus, publish_call_event
+from app.services.resilience import PROVIDER_OUTAGE_MESSAGE, ProviderUnavailable, provider_guard
+from app.utils.log import bind_call_id
+from app.services.cache import (
+    cache,
+    call_key,
+    patient_key,
+    transcript_key,
+    TRANSCRIPT_CACHE_TTL_SECONDS,
+)
 
 
 router = APIRouter()
 
-# Initialize Plivo service
-plivo_service = PlivoService()
+# Plivo service is created on first use so importing the router stays cheap
+_plivo_service = None
+
+
+def get_plivo_service():
+    global _plivo_service
+    if _plivo_service is None:
+        from app.services.plivo_service import PlivoService
+        _plivo_service = PlivoService()
+    return _plivo_service
+
+
+# Cached lookups - plain dict snapshots shared between requests
+def call_snapshot(call: Call) -> dict:
+    return {
+        "id": call.id,
+        "patient_id": call.patient_id,
+        "call_sid": call.call_sid,
+        "status": call.status,
+        "campaign": call.campaign,
+        "duration": call.duration,
+        "cost": call.cost,
+        "started_at": call.started_at,
+        "ended_at": call.ended_at,
+        "updated_at": call.updated_at,
+    }
+
+
+def patient_snapshot(patient: Patient) -> dict:
+    return {
+        "id": patient.id,
+        "name": patient.name,
+        "phone": patient.phone,
+        "age": patient.age,
+        "language": patient.language,
+        "custom_questions": patient.custom_questions,
+        "patient_type": patient.patient_type,
+        "created_at": patient.created_at,
+    }
+
+
+async def get_cached_call(db: AsyncSession, call_id: int) -> Optional[dict]:
+    async def load():
+        result = await db.execute(select(Call).where(Call.id == call_id))
+        call = result.scalar_one_or_none()
+        return call_snapshot(call) if call else None
+
+    return await cache.get_or_load(call_key(call_id), load)
+
+
+async def get_cached_patient(db: AsyncSession, patient_id: int) -> Optional[dict]:
+    async def load():
+        result = await db.execute(select(Patient).where(Patient.id == patient_id))
+        patient = result.scalar_one_or_none()
+        return patient_snapshot(patient) if patient else None
+
+    return await cache.get_or_load(patient_key(patient_id), load)
 
 # Pydantic schemas
 class PatientCreate(BaseModel):
@@ -28,6 +99,8 @@ class PatientCreate(BaseModel):
 
 class CallRequest(BaseModel):
     patient_id: int
+    campaign: Optional[str] = None  # shares the campaign's spend budget
+    idempotency_key: Optional[str] = None  # or the Idempotency-Key header
 class PatientUpdate(BaseModel):
     name: Optional[str] = None
     phone: Optional[str] = None
@@ -37,6 +110,15 @@ class PatientUpdate(BaseModel):
     patient_type: Optional[str] = None  # ADD THIS
 
 
+def validate_custom_questions(custom_questions: Optional[str]):
+    """Free text is passed to the LLM as is, JSON must be a valid questionnaire"""
+    from app.services.questionnaire import parse_questionnaire
+    try:
+        parse_questionnaire(custom_questions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 #! Create patient endpoint
 @router.post("/patients")
 async def create_patient(patient: PatientCreate, db: AsyncSession = Depends(get_db)):
@@ -56,6 +138,8 @@ async def create_patient(patient: PatientCreate, db: AsyncSession = Depends(get_
             detail=f"Patient with phone {patient.phone} already exists"
         )
 
+    validate_custom_questions(patient.custom_questions)
+
     new_patient = Patient(
         name=patient.name,
         phone=patient.phone,
@@ -75,38 +159,54 @@ async def create_patient(patient: PatientCreate, db: AsyncSession = Depends(get_
         await db.rollback()
         raise HTTPException(status_code=400, detail="Failed to create patient")
 
-#! Get all patients
-@router.get("/patients")
-async def get_all_patients(db: AsyncSession = Depends(get_db)):
-    """Get all patients with call counts"""
-    from app.models import Patient, Call
-    from sqlalchemy import func
+#! Bulk import patients
+@router.post("/patients/import")
+async def import_patients(
+    request: Request,
+    format: Optional[str] = None,
+    dry_run: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream a CSV or NDJSON body of patients and upsert them by phone"""
+    from app.services.patient_import import detect_import_format, import_patients as run_import
 
-    # Query patients with call count
-    result = await db.execute(
-        select(
-            Patient,
-            func.count(Call.id).label('call_count')
+    fmt = detect_import_format(request.headers.get("content-type"), format)
+    if not fmt:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson"
         )
-        .outerjoin(Call, Patient.id == Call.patient_id)
-        .group_by(Patient.id)
-    )
 
-    patients_data = []
-    for patient, call_count in result.all():
-        patients_data.append({
-            "id": patient.id,
-            "name": patient.name,
-            "phone": patient.phone,
-            "age": patient.age,
-            "language": patient.language,
-            "custom_questions": patient.custom_questions,
-            "patient_type": patient.patient_type,
-            "created_at": patient.created_at,
-            "call_count": call_count
-        })
+    return await run_import(db, request.stream(), fmt, PatientCreate, dry_run=dry_run)
+
+#! Get all patients
+# Counted once per patient in one pass, joined only when call_count is asked for
+_patient_call_counts = (
+    select(Call.patient_id, func.count(Call.id).label("call_count"))
+    .group_by(Call.patient_id)
+    .subquery()
+)
+PATIENT_LIST_FIELDS = {
+    "id": Patient.id,
+    "name": Patient.name,
+    "phone": Patient.phone,
+    "age": Patient.age,
+    "language": Patient.language,
+    "custom_questions": Patient.custom_questions,
+    "patient_type": Patient.patient_type,
+    "created_at": Patient.created_at,
+    "call_count": func.coalesce(_patient_call_counts.c.call_count, 0),
+}
 
-    return {"patients": patients_data}
+
+@router.get("/patients")
+async def get_all_patients(request: Request, fields: Optional[str] = None):
+    """Get all patients with call counts; fields=name,phone,... returns only those columns"""
+    columns = select_fields(fields, PATIENT_LIST_FIELDS, default=list(PATIENT_LIST_FIELDS))
+    query = select(*columns.values()).select_from(Patient).order_by(Patient.id)
+    if "call_count" in columns:
+        query = query.outerjoin(_patient_call_counts, _patient_call_counts.c.patient_id == Patient.id)
+    return stream_json_list(request, query, "patients")
 
 # !Update patient
 @router.put("/patients/{patient_id}")
@@ -136,6 +236,7 @@ async def update_patient(
     if patient_update.language:
         patient.language = patient_update.language
     if patient_update.custom_questions is not None:
+        validate_custom_questions(patient_update.custom_questions)
         patient.custom_questions = patient_update.custom_questions
 
     if patient_update.patient_type is not None:
@@ -144,6 +245,7 @@ async def update_patient(
 
     await db.commit()
     await db.refresh(patient)
+    await cache.invalidate(patient_key(patient_id))
 
     return patient
 
@@ -163,6 +265,10 @@ async def delete_patient(patient_id: int, db: AsyncSession = Depends(get_db)):
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
+    call_ids = (await db.execute(
+        select(Call.id).where(Call.patient_id == patient_id)
+    )).scalars().all()
+
     # Delete associated transcripts first
     await db.execute(
         delete(Transcript).where(
@@ -181,66 +287,129 @@ async def delete_patient(patient_id: int, db: AsyncSession = Depends(get_db)):
     await db.delete(patient)
     await db.commit()
 
+    await cache.invalidate(
+        patient_key(patient_id),
+        *[call_key(call_id) for call_id in call_ids],
+        *[transcript_key(call_id) for call_id in call_ids],
+    )
+
     return {"message": "Patient deleted successfully"}
 #! Initiate call to patient
 @router.post("/initiate")
-async def initiate_call(
-    call_request: CallRequest,
-    db: AsyncSession = Depends(get_db)
-):
-    """Initiate an outbound call to a patient"""
+async def initiate_call(call_request: CallRequest, request: Request):
+    """Initiate an outbound call to a patient, at most once per idempotency key"""
+    from app.services.idempotency import IDEMPOTENCY_KEY_MAX_LENGTH, derived_keys, single_flight
+
+    if drain.draining:
+        raise HTTPException(status_code=503, detail="Worker is draining, retry on another worker")
+
+    # Don't dial while the call couldn't be carried anyway
+    from app.services.providers import pipeline_unavailable
+    down = pipeline_unavailable()
+    if not provider_guard("plivo").available():
+        down.append("telephony:plivo")
+    if down:
+        raise HTTPException(status_code=503, detail=f"Providers unavailable: {', '.join(down)}")
 
     # Validate Plivo credentials
     try:
-        plivo_service.validate_credentials()
+        get_plivo_service().validate_credentials()
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    # Get patient from database
-    result = await db.execute(
-        select(Patient).where(Patient.id == call_request.patient_id)
-    )
-    patient = result.scalar_one_or_none()
+    key = request.headers.get("idempotency-key") or call_request.idempotency_key
+    if key and len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=422, detail=f"Idempotency key longer than {IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+    keys = [key] if key else derived_keys(call_request.patient_id, call_request.campaign)
 
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
+    result, shared = await single_flight(keys[0], lambda: dial_patient(call_request, keys))
+    return {**result, "duplicate": True} if shared else result
 
-    # Create call record with unique temporary ID
-    temp_call_id = f"pending-{uuid.uuid4().hex[:8]}"
 
-    new_call = Call(
-        patient_id=patient.id,
-        call_sid=temp_call_id,
-        status="initiated"
-    )
-    db.add(new_call)
-    await db.commit()
-    await db.refresh(new_call)
+def initiate_response(call: dict, patient: dict, duplicate: bool = False) -> dict:
+    sid = call["call_sid"]
+    return {
+        "message": "Call already initiated" if duplicate else "Call initiated successfully",
+        "call_id": call["id"],
+        "call_uuid": None if sid.startswith("pending-") else sid,
+        "status": call["status"],
+        "patient": patient["name"],
+        "phone": patient["phone"],
+        "duplicate": duplicate,
+    }
 
-    # Make the call via Plivo
-    call_uuid = plivo_service.make_call(
-        to_number=patient.phone,
-        call_id=new_call.id
-    )
 
-    if call_uuid:
-        # Update call record with Plivo UUID
-        new_call.call_sid = call_uuid
-        new_call.status = "ringing"
+async def dial_patient(call_request: CallRequest, keys: list) -> dict:
+    """Insert the call and dial once; runs in its own task and session, see single_flight"""
+    async with AsyncSessionLocal() as db:
+        async def existing_call() -> Optional[Call]:
+            result = await db.execute(select(Call).where(Call.idempotency_key.in_(keys)))
+            return result.scalars().first()
+
+        call = await existing_call()
+        if call:
+            patient = await get_cached_patient(db, call.patient_id)
+            return initiate_response(call_snapshot(call), patient, duplicate=True)
+
+        patient = await get_cached_patient(db, call_request.patient_id)
+        if not patient:
+            raise HTTPException(status_code=404, detail="Patient not found")
+
+        # Finished calls' costs plus a reservation for each call still in progress
+        from app.services.budget import campaign_remaining
+        remaining = await campaign_remaining(db, call_request.campaign)
+        if remaining is not None and remaining <= 0:
+            raise HTTPException(status_code=402, detail=f"Campaign '{call_request.campaign}' budget exhausted")
+
+        # One insert, committed before dialing so the answer webhook finds the row
+        new_call = Call(
+            patient_id=patient["id"],
+            call_sid=f"pending-{uuid.uuid4().hex[:8]}",
+            status="initiated",
+            campaign=call_request.campaign,
+            idempotency_key=keys[0],
+        )
+        db.add(new_call)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another worker inserted the same key first
+            await db.rollback()
+            call = await existing_call()
+            if not call:
+                raise
+            return initiate_response(call_snapshot(call), patient, duplicate=True)
+        bind_call_id(new_call.id)
+        publish_call_event("call.initiated", call_snapshot(new_call))
+
+        # Make the call via Plivo (blocking SDK, runs on a thread); make_call reports errors as None
+        try:
+            call_uuid = await provider_guard("plivo").call_sync(
+                get_plivo_service().make_call,
+                to_number=patient["phone"],
+                call_id=new_call.id,
+                is_failure=lambda uuid: uuid is None,
+            )
+        except ProviderUnavailable as e:
+            logger.error(f"Plivo unavailable: {e}")
+            call_uuid = None
+
+        # The outcome is a single update; a failed dial gives its key back for a retry
+        if call_uuid:
+            new_call.call_sid = call_uuid
+            new_call.status = "ringing"
+        else:
+            new_call.status = "failed"
+            new_call.idempotency_key = None
         await db.commit()
+        # Write through, the answer webhook reads the call from the cache
+        snapshot = call_snapshot(new_call)
+        await cache.set(call_key(new_call.id), snapshot)
+        publish_call_event(f"call.{new_call.status}", snapshot)
 
-        return {
-            "message": "Call initiated successfully",
-            "call_id": new_call.id,
-            "call_uuid": call_uuid,
-            "patient": patient.name,
-            "phone": patient.phone
-        }
-    else:
-        # Call failed
-        new_call.status = "failed"
-        await db.commit()
-        raise HTTPException(status_code=500, detail="Failed to initiate call")
+        if not call_uuid:
+            raise HTTPException(status_code=500, detail="Failed to initiate call")
+        return initiate_response(snapshot, patient)
 
 # Plivo Answer Webhook - called when patient picks up
 @router.post("/answer/{call_id}")
@@ -251,8 +420,20 @@ async def handle_answer(
     """Plivo calls this webhook when the call is answered"""
     import os
 
-    result = await db.execute(select(Call).where(Call.id == call_id))
-    call = result.scalar_one_or_none()
+    bind_call_id(call_id)
+
+    # Draining workers hand new calls to another worker
+    if drain.draining:
+        redirect_url = drain.answer_redirect(call_id)
+        logger.info(f"Draining, {'redirecting' if redirect_url else 'refusing'} answer for call {call_id}")
+        if not redirect_url:
+            return Response(status_code=503)
+        return Response(
+            content=f'<Response><Redirect method="POST">{redirect_url}</Redirect></Response>',
+            media_type="application/xml"
+        )
+
+    call = await get_cached_call(db, call_id)
 
     if not call:
         return Response(
@@ -260,78 +441,136 @@ async def handle_answer(
             media_type="application/xml"
         )
 
-    call.status = "answered"
+    # A breaker opened since dialing, apologise instead of a silent or broken call
+    from app.services.providers import pipeline_unavailable
+    down = pipeline_unavailable()
+    if down:
+        logger.error(f"Providers unavailable ({', '.join(down)}), hanging up call {call_id}")
+        # Failed like a failed dial, its key is given back for a retry
+        await db.execute(
+            update(Call).where(Call.id == call_id)
+            .values(status="failed", idempotency_key=None, updated_at=datetime.utcnow())
+        )
+        await db.commit()
+        await cache.invalidate(call_key(call_id))
+        publish_call_event("call.failed", {**call, "status": "failed"})
+        return Response(
+            content=f"<Response><Speak>{escape(PROVIDER_OUTAGE_MESSAGE)}</Speak><Hangup/></Response>",
+            media_type="application/xml"
+        )
+
+    answered_at = datetime.utcnow()
+    await db.execute(
+        update(Call).where(Call.id == call_id).values(status="answered", updated_at=answered_at)
+    )
     await db.commit()
+    # Write through so the websocket that follows doesn't go back to the DB
+    await cache.set(call_key(call_id), {**call, "status": "answered", "updated_at": answered_at})
+    publish_call_event("call.answered", {**call, "status": "answered"})
 
     base_url = os.getenv("BASE_URL")
     if not base_url:
-        print("ERROR: BASE_URL not set")
+        logger.error("BASE_URL not set")
         return Response(content="<Response><Hangup/></Response>", media_type="application/xml")
 
     ws_url = f"{base_url.replace('https', 'wss')}/ws/plivo/{call_id}"
-    xml_response = plivo_service.generate_answer_xml(ws_url)
+    xml_response = get_plivo_service().generate_answer_xml(ws_url)
 
-    print(f"✅ Call {call_id} answered, streaming to: {ws_url}")
+    logger.info(f"Call {call_id} answered, streaming to: {ws_url}")
 
     return Response(content=xml_response, media_type="application/xml")
 
+#! Live transcript of an in-progress call
+@router.get("/calls/{call_id}/live")
+async def live_call_transcript(call_id: int):
+    """Server-sent turns of a call running on this worker, for supervisors"""
+    from app.services.live_transcript import live_transcripts
+
+    if not live_transcripts.is_live(call_id):
+        raise HTTPException(status_code=404, detail="Call is not in progress on this worker")
+    # Registered now, a call that ends before the body is read still sends its turns and "end"
+    viewer, turns = live_transcripts.watch(call_id)
+
+    return StreamingResponse(
+        live_transcripts.stream(call_id, viewer, turns),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+#! Live call events
+@router.get("/events")
+async def call_events(request: Request, last_event_id: Optional[int] = None):
+    """Server-sent call lifecycle events; EventSource resumes via the Last-Event-ID header"""
+    header = request.headers.get("last-event-id")
+    if header and header.isdigit():
+        last_event_id = int(header)
+
+    return StreamingResponse(
+        event_bus.stream(last_event_id),
+        media_type="text/event-stream",
+        # No proxy buffering, events must go out as they happen
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # Get all calls (with optional patient filter)
+CALL_LIST_FIELDS = {
+    "call_id": Call.id,
+    "patient_id": Call.patient_id,
+    "patient_name": Patient.name,
+    "call_sid": Call.call_sid,
+    "status": Call.status,
+    "campaign": Call.campaign,
+    "duration": Call.duration,
+    "cost": Call.cost,
+    "started_at": Call.started_at,
+    "ended_at": Call.ended_at,
+}
+CALL_LIST_DEFAULT_FIELDS = [name for name in CALL_LIST_FIELDS if name != "cost"]
+
+
 @router.get("/calls")
 async def get_all_calls(
+    request: Request,
     patient_id: Optional[int] = None,
-    db: AsyncSession = Depends(get_db)
+    status: Optional[str] = None,
+    fields: Optional[str] = None,
 ):
-    """Get all calls, optionally filtered by patient_id"""
+    """Get all calls, optionally filtered by patient_id and/or status (e.g. budget_exceeded for review)"""
+    columns = select_fields(fields, CALL_LIST_FIELDS, default=CALL_LIST_DEFAULT_FIELDS)
 
+    query = select(*columns.values()).select_from(Call).order_by(Call.started_at.desc())
+    if "patient_name" in columns:
+        query = query.join(Patient, Patient.id == Call.patient_id)
     if patient_id:
         # Get calls for specific patient
-        result = await db.execute(
-            select(Call, Patient)
-            .join(Patient)
-            .where(Call.patient_id == patient_id)
-            .order_by(Call.started_at.desc())
-        )
-    else:
-        # Get all calls
-        result = await db.execute(
-            select(Call, Patient)
-            .join(Patient)
-            .order_by(Call.started_at.desc())
-        )
+        query = query.where(Call.patient_id == patient_id)
+    if status:
+        query = query.where(Call.status == status)
 
-    rows = result.all()
-
-    return {
-        "count": len(rows),
-        "calls": [
-            {
-                "call_id": call.id,
-                "patient_id": call.patient_id,
-                "patient_name": patient.name,
-                "call_sid": call.call_sid,
-                "status": call.status,
-                "duration": call.duration,
-                "started_at": call.started_at.isoformat() if call.started_at else None,
-                "ended_at": call.ended_at.isoformat() if call.ended_at else None,
-            }
-            for call, patient in rows
-        ]
-    }
+    return stream_json_list(request, query, "calls", count_key="count")
 
 # Get call history for a specific patient
 @router.get("/patients/{patient_id}/calls")
-async def get_patient_calls(patient_id: int, db: AsyncSession = Depends(get_db)):
+async def get_patient_calls(patient_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
     """Get all calls for a specific patient"""
+    from sqlalchemy import func
 
     # Check if patient exists
-    result = await db.execute(
-        select(Patient).where(Patient.id == patient_id)
-    )
-    patient = result.scalar_one_or_none()
+    patient = await get_cached_patient(db, patient_id)
 
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
+    # Version the list by its size and newest row change, no rows loaded yet
+    call_count, last_modified = (await db.execute(
+        select(func.count(Call.id), func.max(Call.updated_at))
+        .where(Call.patient_id == patient_id)
+    )).one()
+    etag = make_etag("patient_calls", patient_id, patient["name"], call_count, last_modified)
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(headers)
+
     # Get all calls for this patient
     result = await db.execute(
         select(Call)
@@ -340,9 +579,9 @@ async def get_patient_calls(patient_id: int, db: AsyncSession = Depends(get_db))
     )
     calls = result.scalars().all()
 
-    return {
+    return JSONResponse(headers=headers, content=jsonable_encoder({
         "patient_id": patient_id,
-        "patient_name": patient.name,
+        "patient_name": patient["name"],
         "total_calls": len(calls),
         "calls": [
             {
@@ -356,42 +595,126 @@ async def get_patient_calls(patient_id: int, db: AsyncSession = Depends(get_db))
             }
             for call in calls
         ]
-    }
+    }))
 # Get call details
 @router.get("/calls/{call_id}")
-async def get_call(call_id: int, db: AsyncSession = Depends(get_db)):
+async def get_call(call_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
     """Get details of a specific call"""
-    result = await db.execute(
-        select(Call).where(Call.id == call_id)
-    )
-    call = result.scalar_one_or_none()
+    # Versioned from the row, this worker's cached snapshot may predate another worker's write
+    version = (await db.execute(
+        select(Call.updated_at, Call.started_at).where(Call.id == call_id)
+    )).first()
 
-    if not call:
+    if not version:
         raise HTTPException(status_code=404, detail="Call not found")
 
-    return {
-        "id": call.id,
-        "patient_id": call.patient_id,
-        "call_sid": call.call_sid,
-        "status": call.status,
-        "duration": call.duration,
-        "started_at": call.started_at
-    }
+    last_modified = version.updated_at or version.started_at
+    etag = make_etag("call", call_id, last_modified)
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(headers)
 
-# Get transcript for a call
-@router.get("/calls/{call_id}/transcript")
-async def get_transcript(call_id: int, db: AsyncSession = Depends(get_db)):
-    """Get transcript for a specific call"""
+    call = await get_cached_call(db, call_id)
+    if call and call["updated_at"] != version.updated_at:
+        await cache.invalidate(call_key(call_id))
+        call = await get_cached_call(db, call_id)
+
+    if not call:
+        raise HTTPException(status_code=404, detail="Call not found")
+
+    return JSONResponse(headers=headers, content=jsonable_encoder({
+        "id": call["id"],
+        "patient_id": call["patient_id"],
+        "call_sid": call["call_sid"],
+        "status": call["status"],
+        "duration": call["duration"],
+        "started_at": call["started_at"]
+    }))
+
+# Everything the call detail page shows, in one query
+@router.get("/calls/{call_id}/detail")
+async def get_call_detail(call_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    """Call, patient, transcript, summary and cost breakdown for a specific call"""
     from app.models import Transcript
-    import json
+    from app.utils.cost_calculator import calculate_telephony_cost
+    from app.utils.fast_json import FastJSONResponse, dumps, loads
 
-    result = await db.execute(
-        select(Transcript).where(Transcript.call_id == call_id)
+    row = (await db.execute(
+        select(Call, Patient, Transcript)
+        .join(Patient, Patient.id == Call.patient_id)
+        .outerjoin(Transcript, Transcript.call_id == Call.id)
+        .where(Call.id == call_id)
+    )).first()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Call not found")
+
+    call, patient, transcript = row
+
+    # The page is stale when the call, its transcript or the patient shown on it changes.
+    # patients has no row version, so there is no Last-Modified: If-Modified-Since
+    # alone would answer 304 after a patient edit
+    transcript_modified = (transcript.updated_at or transcript.created_at) if transcript else None
+    etag = make_etag(
+        "call_detail", call_id, call.updated_at, transcript_modified,
+        patient.name, patient.phone, patient.age, patient.language,
     )
-    transcript = result.scalar_one_or_none()
+    headers = cache_headers(etag, None)
+    if is_not_modified(request, etag, None):
+        return not_modified(headers)
 
-    if not transcript:
-        raise HTTPException(status_code=404, detail="Transcript not found")
+    summary = None
+    if transcript and transcript.summary:
+        try:
+            summary = loads(transcript.summary)
+        except ValueError:
+            summary = transcript.summary
+
+    stt_cost, llm_cost, tts_cost = (0.0, 0.0, 0.0)
+    if transcript:
+        stt_cost, llm_cost, tts_cost = transcript.stt_cost or 0.0, transcript.llm_cost or 0.0, transcript.tts_cost or 0.0
+    telephony_cost = calculate_telephony_cost(call.duration or 0)
+
+    body = {
+        "call": {
+            "id": call.id,
+            "call_sid": call.call_sid,
+            "status": call.status,
+            "campaign": call.campaign,
+            "duration": call.duration,
+            "started_at": call.started_at,
+            "ended_at": call.ended_at,
+        },
+        "patient": {
+            "id": patient.id,
+            "name": patient.name,
+            "phone": patient.phone,
+            "age": patient.age,
+            "language": patient.language,
+            "patient_type": patient.patient_type,
+        },
+        "summary": summary,
+        "costs": {
+            "stt": stt_cost,
+            "llm": llm_cost,
+            "tts": tts_cost,
+            "telephony": telephony_cost,
+            "total": round(stt_cost + llm_cost + tts_cost + telephony_cost, 4),
+        },
+        "transcript_created_at": transcript.created_at if transcript else None,
+    }
+
+    if not transcript or not transcript.full_transcript:
+        return FastJSONResponse({**body, "transcript": None}, headers=headers)
+
+    # full_transcript is already JSON (see build_transcript_body), splice it in as-is
+    content = dumps(body)[:-1] + b',"transcript":' + transcript.full_transcript.encode() + b"}"
+    return Response(content=content, media_type="application/json", headers=headers)
+
+# Get transcript for a call
+def build_transcript_body(call_id: int, transcript) -> bytes:
+    """Serialize a transcript response once so it can be served as-is"""
+    import json
 
     # Parse summary if it exists
     summary = None
@@ -401,17 +724,73 @@ async def get_transcript(call_id: int, db: AsyncSession = Depends(get_db)):
         except:
             summary = transcript.summary
 
-    return {
+    envelope = json.dumps({
         "call_id": call_id,
-        "transcript": json.loads(transcript.full_transcript) if transcript.full_transcript else {},
         "summary": summary,  # Include summary
         "costs": {
             "stt": transcript.stt_cost,
             "llm": transcript.llm_cost,
             "tts": transcript.tts_cost
         },
-        "created_at": transcript.created_at
-    }
+        "created_at": transcript.created_at.isoformat() if transcript.created_at else None
+    })
+
+    # full_transcript is only ever written by json.dumps (save_transcript and
+    # save_partial_transcript),
+    # so it is spliced in verbatim instead of being parsed and re-encoded
+    full_transcript = transcript.full_transcript or "{}"
+    return f'{envelope[:-1]}, "transcript": {full_transcript}}}'.encode()
+
+
+@router.get("/calls/{call_id}/transcript")
+async def get_transcript(call_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    """Get transcript for a specific call"""
+    from app.models import Transcript
+
+    key = transcript_key(call_id)
+    entry = await cache.get(key)
+
+    if entry is None:
+        # Check the row version first so a revalidation never loads the blob
+        version = (await db.execute(
+            select(Transcript.updated_at, Transcript.created_at)
+            .where(Transcript.call_id == call_id)
+        )).first()
+
+        if not version:
+            raise HTTPException(status_code=404, detail="Transcript not found")
+
+        last_modified = version.updated_at or version.created_at
+        etag = make_etag("transcript", call_id, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(cache_headers(etag, last_modified))
+
+        async def load():
+            result = await db.execute(
+                select(Transcript).where(Transcript.call_id == call_id)
+            )
+            transcript = result.scalar_one_or_none()
+
+            if not transcript:
+                return None
+
+            modified = transcript.updated_at or transcript.created_at
+            return {
+                "etag": make_etag("transcript", call_id, modified),
+                "last_modified": modified,
+                "body": build_transcript_body(call_id, transcript),
+            }
+
+        entry = await cache.get_or_load(key, load, ttl=TRANSCRIPT_CACHE_TTL_SECONDS)
+
+        if not entry:
+            raise HTTPException(status_code=404, detail="Transcript not found")
+
+    headers = cache_headers(entry["etag"], entry["last_modified"])
+    if is_not_modified(request, entry["etag"], entry["last_modified"]):
+        return not_modified(headers)
+
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
 # WebSocket endpoint for Pipecat pipeline
 
 # async def plivo_websocket(websocket: WebSocket, call_id: int):
@@ -462,48 +841,45 @@ async def plivo_websocket(websocket: WebSocket, call_id: int):
     """WebSocket for Pipecat-powered conversation"""
 
     await websocket.accept()
-    print(f"WebSocket connected for call {call_id}")
+    # Everything the pipeline logs from here on carries the call_id
+    bind_call_id(call_id)
+    logger.info(f"WebSocket connected for call {call_id}")
 
     # Create database session for this call
     async with AsyncSessionLocal() as db:
         try:
-            # Get patient info
-            result = await db.execute(
-                select(Patient, Call)
-                .join(Call, Patient.id == Call.patient_id)
-                .where(Call.id == call_id)
-            )
-            row = result.first()
+            # Get patient info (usually cached by the answer webhook moments ago)
+            call = await get_cached_call(db, call_id)
+            patient = await get_cached_patient(db, call["patient_id"]) if call else None
 
-            if not row:
-                print(f"No patient/call found for call_id {call_id}")
+            if not patient:
+                logger.warning(f"No patient/call found for call_id {call_id}")
                 await websocket.close()
                 return
 
-            patient, call = row
-
-            print(f"Starting call for {patient.name}")
+            logger.info(f"Starting call for {patient['name']}")
 
             # Use custom questions if available, otherwise default
-            questions = patient.custom_questions if patient.custom_questions else "How are you feeling today?"
+            questions = patient["custom_questions"] if patient["custom_questions"] else "How are you feeling today?"
 
             # Run the Pipecat pipeline with patient-specific questions
             from app.services.pipeline_service import run_patient_call
 
             await run_patient_call(
                 websocket=websocket,
-                patient_name=patient.name,
+                patient_name=patient["name"],
                 questions=questions,  # Now using actual patient questions
                 call_id=call_id,
-                db_session=db
+                db_session=db,
+                campaign=call.get("campaign"),
+                patient_age=patient["age"],
+                patient_language=patient["language"],
             )
 
         except Exception as e:
-            print(f"Pipeline error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Pipeline error: {e}")
         finally:
-            print(f"WebSocket closed for call {call_id}")
+            logger.info(f"WebSocket closed for call {call_id}")
 
 
 
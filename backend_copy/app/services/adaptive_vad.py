@@ -0,0 +1,125 @@
+"""
+Per-call adaptive end-of-turn detection.
+
+AdaptiveVADAnalyzer is Silero VAD with a stop threshold (the silence that
+ends the caller's turn) that follows the caller:
+
+- Pauses inside a turn (silence shorter than the threshold, then more
+  speech) are recorded.
+- A turn end followed by more speech within ADAPTIVE_VAD_RESUME_SECS was a
+  cut-off; its full pause is recorded too, so the threshold grows past it.
+- After every turn the threshold becomes the 90th percentile of the recent
+  pauses plus ADAPTIVE_VAD_MARGIN_SECS, within ADAPTIVE_VAD_MIN_STOP_SECS and
+  ADAPTIVE_VAD_MAX_STOP_SECS.
+
+Callers aged ADAPTIVE_VAD_ELDERLY_AGE or more start at
+ADAPTIVE_VAD_ELDERLY_STOP_SECS instead of the Silero default. Time is
+measured in caller audio, not wall clock.
+"""
+import os
+from collections import deque
+from typing import Optional
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from pipecat.audio.vad.silero import SileroVADAnalyzer
+from pipecat.audio.vad.vad_analyzer import VAD_STOP_SECS, VADParams, VADState
+
+load_dotenv()
+
+ADAPTIVE_VAD = os.getenv("ADAPTIVE_VAD", "true").lower() in ("1", "true", "yes")
+ADAPTIVE_VAD_MIN_STOP_SECS = float(os.getenv("ADAPTIVE_VAD_MIN_STOP_SECS", "0.5"))
+ADAPTIVE_VAD_MAX_STOP_SECS = float(os.getenv("ADAPTIVE_VAD_MAX_STOP_SECS", "1.6"))
+ADAPTIVE_VAD_MARGIN_SECS = float(os.getenv("ADAPTIVE_VAD_MARGIN_SECS", "0.15"))
+ADAPTIVE_VAD_RESUME_SECS = float(os.getenv("ADAPTIVE_VAD_RESUME_SECS", "1.0"))
+# Pauses needed before the threshold moves away from its starting value
+ADAPTIVE_VAD_MIN_PAUSES = int(os.getenv("ADAPTIVE_VAD_MIN_PAUSES", "3"))
+ADAPTIVE_VAD_ELDERLY_AGE = int(os.getenv("ADAPTIVE_VAD_ELDERLY_AGE", "65"))
+ADAPTIVE_VAD_ELDERLY_STOP_SECS = float(os.getenv("ADAPTIVE_VAD_ELDERLY_STOP_SECS", "1.1"))
+
+PAUSE_WINDOW = 20
+
+
+def initial_stop_secs(age: Optional[int]) -> float:
+    if age and age >= ADAPTIVE_VAD_ELDERLY_AGE:
+        return ADAPTIVE_VAD_ELDERLY_STOP_SECS
+    return VAD_STOP_SECS
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class AdaptiveVADAnalyzer(SileroVADAnalyzer):
+    def __init__(self, call_id: int = None, stop_secs: float = VAD_STOP_SECS, **kwargs):
+        super().__init__(params=VADParams(stop_secs=stop_secs), **kwargs)
+        self._call_id = call_id
+        self._clock = 0.0
+        self._last_state = VADState.QUIET
+        self._silence_started_at = None
+        self._turn_ended_at = None
+        self._pauses = deque(maxlen=PAUSE_WINDOW)
+        self.turns = 0
+        self.cutoffs = 0
+
+    def analyze_audio(self, buffer) -> VADState:
+        state = super().analyze_audio(buffer)
+        if self.sample_rate:
+            self._clock += len(buffer) / (2 * self.sample_rate)
+
+        if state != self._last_state:
+            self._on_transition(self._last_state, state)
+            self._last_state = state
+        return state
+
+    def _on_transition(self, old: VADState, new: VADState):
+        now = self._clock
+        if new == VADState.STOPPING:
+            self._silence_started_at = now
+        elif old == VADState.STOPPING and new == VADState.SPEAKING:
+            # Paused and went on, the turn wasn't over
+            self._pauses.append(now - self._silence_started_at)
+        elif new == VADState.QUIET and old == VADState.STOPPING:
+            self.turns += 1
+            self._turn_ended_at = now
+            self._adapt("turn end")
+        elif new == VADState.SPEAKING and self._turn_ended_at is not None:
+            gap = now - self._turn_ended_at - self.params.start_secs
+            self._turn_ended_at = None
+            if gap <= ADAPTIVE_VAD_RESUME_SECS:
+                # The last turn end cut the caller off mid-thought
+                self.cutoffs += 1
+                self._pauses.append(self.params.stop_secs + max(0.0, gap))
+                self._adapt(f"cut-off, resumed after {max(0.0, gap):.2f}s")
+
+    def _adapt(self, reason: str):
+        current = self.params.stop_secs
+        if len(self._pauses) >= ADAPTIVE_VAD_MIN_PAUSES:
+            target = _percentile(self._pauses, 0.9) + ADAPTIVE_VAD_MARGIN_SECS
+            target = round(min(ADAPTIVE_VAD_MAX_STOP_SECS, max(ADAPTIVE_VAD_MIN_STOP_SECS, target)), 2)
+            if target != current:
+                self._set_stop_secs(target)
+
+        # Runs on the transport's executor thread, which doesn't see the call_id contextvar
+        logger.bind(call_id=self._call_id).info(
+            f"VAD {reason} (call_id={self._call_id}): stop_secs {current:.2f} -> {self.params.stop_secs:.2f}, "
+            f"{len(self._pauses)} pauses, {self.cutoffs} cut-offs in {self.turns} turns"
+        )
+
+    def _set_stop_secs(self, stop_secs: float):
+        # Only the stop threshold changes; set_params() would also reset the
+        # state machine in the middle of the caller's speech
+        self._params = self._params.model_copy(update={"stop_secs": stop_secs})
+        vad_frames_per_sec = self._vad_frames / self.sample_rate
+        self._vad_stop_frames = round(stop_secs / vad_frames_per_sec)
+
+    def summary(self) -> dict:
+        return {
+            "stop_secs": self.params.stop_secs,
+            "turns": self.turns,
+            "cutoffs": self.cutoffs,
+            "pauses": len(self._pauses),
+            "pause_p90": round(_percentile(self._pauses, 0.9), 2) if self._pauses else None,
+        }
@@ -0,0 +1,189 @@
+"""
+Per-call and per-campaign spend limits, enforced live in the pipeline.
+
+Limits, all off unless set (0 disables one):
+
+    CALL_MAX_DURATION_SECS     wall clock since the media stream started
+    CALL_MAX_LLM_TOKENS        prompt + completion tokens from LLM usage metrics
+    CALL_MAX_TTS_CHARACTERS    characters sent to TTS
+    CALL_MAX_COST_USD          all of the above priced with app/utils/cost_calculator.py
+
+Campaigns cap the total cost of their calls: CAMPAIGN_BUDGETS_USD is a JSON
+object of campaign -> dollars, CAMPAIGN_DEFAULT_BUDGET_USD covers the rest.
+A call may only spend what is left of its campaign when it starts, and new
+calls are refused once nothing is left.
+
+What is left is the budget minus the saved cost of finished calls, minus
+CAMPAIGN_CALL_RESERVE_USD for every call of the campaign still in progress
+(their cost is only saved at hangup). A campaign call's cost cap is never
+above the reserve, so concurrent calls can't spend more than the budget.
+"""
+import os
+import json
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+from loguru import logger
+from sqlalchemy import func, select
+
+from pipecat.frames.frames import (
+    EndTaskFrame,
+    Frame,
+    InputAudioRawFrame,
+    LLMTextFrame,
+    MetricsFrame,
+    TTSSpeakFrame,
+)
+from pipecat.metrics.metrics import LLMUsageMetricsData
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from app.utils.cost_calculator import (
+    calculate_stt_cost,
+    calculate_llm_cost,
+    calculate_tts_cost,
+    calculate_telephony_cost
+)
+
+load_dotenv()
+
+CALL_MAX_DURATION_SECS = float(os.getenv("CALL_MAX_DURATION_SECS", "0"))
+CALL_MAX_LLM_TOKENS = int(os.getenv("CALL_MAX_LLM_TOKENS", "0"))
+CALL_MAX_TTS_CHARACTERS = int(os.getenv("CALL_MAX_TTS_CHARACTERS", "0"))
+CALL_MAX_COST_USD = float(os.getenv("CALL_MAX_COST_USD", "0"))
+
+CAMPAIGN_BUDGETS_USD = json.loads(os.getenv("CAMPAIGN_BUDGETS_USD", "{}"))
+CAMPAIGN_DEFAULT_BUDGET_USD = float(os.getenv("CAMPAIGN_DEFAULT_BUDGET_USD", "0"))
+CAMPAIGN_CALL_RESERVE_USD = float(os.getenv("CAMPAIGN_CALL_RESERVE_USD", str(CALL_MAX_COST_USD or 0.50)))
+
+# Calls not finalized yet: they hold a campaign reservation, and call_journal recovers them after a crash.
+# One that never got an ended_at stops holding a reservation after the longest possible call
+LIVE_CALL_STATUSES = ("initiated", "ringing", "answered")
+LIVE_CALL_WINDOW_SECS = (CALL_MAX_DURATION_SECS or 3600) + 300
+
+BUDGET_WRAP_UP_MESSAGE = os.getenv(
+    "BUDGET_WRAP_UP_MESSAGE",
+    "Thank you for your time. Our team will follow up with you if anything else is needed. Goodbye.",
+)
+
+BUDGET_EXCEEDED_STATUS = "budget_exceeded"
+
+
+def campaign_budget(campaign: Optional[str]) -> float:
+    """Dollar budget for a campaign, 0 when unlimited"""
+    if not campaign:
+        return 0.0
+    return float(CAMPAIGN_BUDGETS_USD.get(campaign, CAMPAIGN_DEFAULT_BUDGET_USD))
+
+
+async def campaign_remaining(db, campaign: Optional[str], exclude_call_id: int = None) -> Optional[float]:
+    """Dollars left for the campaign after finished calls and reservations, None when it has no budget"""
+    from datetime import datetime, timedelta
+    from sqlalchemy import case
+    from app.models import Call
+
+    budget = campaign_budget(campaign)
+    if not budget:
+        return None
+    live = (
+        Call.status.in_(LIVE_CALL_STATUSES)
+        & Call.ended_at.is_(None)
+        & (Call.started_at >= datetime.utcnow() - timedelta(seconds=LIVE_CALL_WINDOW_SECS))
+    )
+    if exclude_call_id is not None:
+        live = live & (Call.id != exclude_call_id)
+    spent, live_calls = (await db.execute(
+        select(
+            func.coalesce(func.sum(Call.cost), 0.0),
+            func.coalesce(func.sum(case((live, 1), else_=0)), 0),
+        ).where(Call.campaign == campaign)
+    )).one()
+    return round(budget - (spent or 0.0) - live_calls * CAMPAIGN_CALL_RESERVE_USD, 4)
+
+
+async def call_limits(db, campaign: Optional[str], call_id: int = None) -> dict:
+    """Limits for one call, with the cost cap lowered to what the campaign has left"""
+    limits = {
+        "duration_secs": CALL_MAX_DURATION_SECS,
+        "llm_tokens": CALL_MAX_LLM_TOKENS,
+        "tts_characters": CALL_MAX_TTS_CHARACTERS,
+        "cost_usd": CALL_MAX_COST_USD,
+    }
+    # The call's own reservation is what it may spend, it isn't taken off twice
+    remaining = await campaign_remaining(db, campaign, exclude_call_id=call_id)
+    if remaining is not None:
+        cap = min(remaining, CAMPAIGN_CALL_RESERVE_USD)
+        # 0 would disable the limit, an exhausted campaign should end the call right away
+        limits["cost_usd"] = max(0.0001, cap)
+    return limits
+
+
+class BudgetEnforcer(FrameProcessor):
+    """Sits between the LLM and TTS: sees LLM usage metrics and every character about to be synthesized"""
+
+    def __init__(self, limits: dict, call_id: int = None, **kwargs):
+        super().__init__(**kwargs)
+        self._limits = limits
+        self._call_id = call_id
+        self._started_at = None
+        self.llm_input_tokens = 0
+        self.llm_output_tokens = 0
+        self.tts_characters = 0
+        self.exceeded = None
+
+    def usage(self) -> dict:
+        duration = time.monotonic() - self._started_at if self._started_at else 0.0
+        cost = (
+            calculate_stt_cost(duration)
+            + calculate_llm_cost(self.llm_input_tokens, self.llm_output_tokens)
+            + calculate_tts_cost(self.tts_characters)
+            + calculate_telephony_cost(duration)
+        )
+        return {
+            "duration_secs": round(duration, 1),
+            "llm_tokens": self.llm_input_tokens + self.llm_output_tokens,
+            "tts_characters": self.tts_characters,
+            "cost_usd": round(cost, 4),
+        }
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+
+        if isinstance(frame, LLMTextFrame):
+            if self.exceeded:
+                # Rest of the reply that was streaming when the budget ran out
+                return
+            self.tts_characters += len(frame.text)
+        elif isinstance(frame, TTSSpeakFrame):
+            self.tts_characters += len(frame.text)
+        elif isinstance(frame, MetricsFrame):
+            for data in frame.data:
+                if isinstance(data, LLMUsageMetricsData):
+                    self.llm_input_tokens += data.value.prompt_tokens
+                    self.llm_output_tokens += data.value.completion_tokens
+
+        await self.push_frame(frame, direction)
+
+        # Audio frames arrive every 20ms, which keeps the duration check live
+        if not self.exceeded and isinstance(frame, (InputAudioRawFrame, LLMTextFrame, MetricsFrame)):
+            await self._check()
+
+    async def _check(self):
+        usage = self.usage()
+        for name, limit in self._limits.items():
+            if limit and usage[name] >= limit:
+                await self._wrap_up(name, usage)
+                return
+
+    async def _wrap_up(self, limit_name: str, usage: dict):
+        self.exceeded = limit_name
+        logger.warning(
+            f"Call {self._call_id} over its {limit_name} budget "
+            f"({usage[limit_name]} >= {self._limits[limit_name]}), wrapping up: {usage}"
+        )
+        await self.push_frame(TTSSpeakFrame(BUDGET_WRAP_UP_MESSAGE))
+        # Hangs up once the wrap-up line has played
+        await self.push_frame(EndTaskFrame(), FrameDirection.UPSTREAM)
@@ -0,0 +1,209 @@
+"""
+Read-through cache for hot patient/call/transcript lookups.
+
+Values are plain dicts (never ORM objects) so they can be shared across
+sessions. Concurrent misses for the same key share one loader call.
+"""
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "lru").lower()  # "lru" or "none"
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+TRANSCRIPT_CACHE_TTL_SECONDS = float(os.getenv("TRANSCRIPT_CACHE_TTL_SECONDS", "300"))
+
+_MISSING = object()
+
+
+# ---- Cache keys ----
+def patient_key(patient_id: int) -> str:
+    return f"patient:{patient_id}"
+
+
+def call_key(call_id: int) -> str:
+    return f"call:{call_id}"
+
+
+def transcript_key(call_id: int) -> str:
+    return f"transcript:{call_id}"
+
+
+# ---- Backends ----
+class LRUBackend:
+    """In-process LRU with per-entry expiry"""
+
+    name = "lru"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    async def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def clear(self):
+        self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class NullBackend:
+    """Disables caching while keeping the read-through call sites unchanged"""
+
+    name = "none"
+
+    async def get(self, key: str) -> Any:
+        return _MISSING
+
+    async def set(self, key: str, value: Any, ttl: float):
+        pass
+
+    async def delete(self, key: str):
+        pass
+
+    async def clear(self):
+        pass
+
+    def size(self) -> int:
+        return 0
+
+
+BACKENDS = {
+    "lru": LRUBackend,
+    "none": NullBackend,
+}
+
+
+class ReadThroughCache:
+    """Async cache front with TTLs, explicit invalidation and miss de-duplication"""
+
+    def __init__(self, backend, default_ttl: float = CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._inflight = {}
+        # Bumped on every invalidation so a load that raced with it isn't stored
+        self._version = 0
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "loads": 0, "invalidations": 0}
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """Return the cached value or run loader once for all concurrent callers.
+
+        None results are returned but not cached, so a missing row is re-checked.
+        """
+        value = await self.backend.get(key)
+        if value is not _MISSING:
+            self._stats["hits"] += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only fall through when the loading caller was cancelled, not us
+                if not inflight.cancelled():
+                    raise
+
+        self._stats["misses"] += 1
+        return await self._load(key, loader, ttl)
+
+    async def _load(self, key, loader, ttl):
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on the future, avoid "exception never retrieved"
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        version = self._version
+
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        self._stats["loads"] += 1
+        if value is not None and version == self._version:
+            await self.backend.set(key, value, self.default_ttl if ttl is None else ttl)
+        future.set_result(value)
+        return value
+
+    async def get(self, key: str) -> Any:
+        """Plain lookup for callers that want to decide how to load on a miss"""
+        value = await self.backend.get(key)
+        if value is _MISSING:
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Write-through after the caller has committed a change"""
+        await self.backend.set(key, value, self.default_ttl if ttl is None else ttl)
+
+    async def invalidate(self, *keys: str):
+        self._version += 1
+        for key in keys:
+            self._stats["invalidations"] += 1
+            self._inflight.pop(key, None)
+            await self.backend.delete(key)
+
+    async def clear(self):
+        self._version += 1
+        await self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+        return {
+            "backend": self.backend.name,
+            "size": self.backend.size(),
+            "inflight": len(self._inflight),
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            **self._stats,
+        }
+
+
+def create_cache(backend_name: str = CACHE_BACKEND) -> ReadThroughCache:
+    backend_class = BACKENDS.get(backend_name, LRUBackend)
+    return ReadThroughCache(backend_class())
+
+
+# Shared instance used by routers and the pipeline
+cache = create_cache()
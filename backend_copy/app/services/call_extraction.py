@@ -0,0 +1,238 @@
+"""
+In-call answer extraction.
+
+CallRecordExtractor reads every caller transcription as it happens and keeps
+a structured record in the same shape as the LLM summary (sentiment,
+key_points, health_concerns, follow_up_needed, follow_up_reason) plus
+questionnaire answers and red flags. The record and the conversation so far
+are written to the call's transcript row after each caller turn, so a usable
+summary exists the moment the call ends.
+
+SUMMARY_MODE decides what happens at hangup:
+
+    deferred   save the extracted record, then enrich it with the LLM summary in the background
+    extracted  save the extracted record only, no LLM summary
+    llm        generate the LLM summary before saving (the old behaviour)
+"""
+import os
+import re
+import json
+import asyncio
+from datetime import datetime
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from pipecat.frames.frames import BotStartedSpeakingFrame, Frame, TranscriptionFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+load_dotenv()
+
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "deferred").lower()
+# Coalesces the transcript writes of a burst of transcriptions
+EXTRACTION_FLUSH_SECS = float(os.getenv("EXTRACTION_FLUSH_SECS", "1.0"))
+
+DEFAULT_RED_FLAGS = (
+    "chest pain", "can't breathe", "cannot breathe", "short of breath", "shortness of breath",
+    "breathless", "bleeding", "blood", "fainted", "unconscious", "seizure", "fits",
+    "high fever", "severe pain", "unbearable", "vomiting", "pus", "suicide", "kill myself",
+    "सीने में दर्द", "सांस", "खून", "बेहोश",
+)
+RED_FLAG_KEYWORDS = tuple(
+    k.strip().lower() for k in os.getenv("RED_FLAG_KEYWORDS", "").split(",") if k.strip()
+) or DEFAULT_RED_FLAGS
+
+SYMPTOM_KEYWORDS = (
+    "pain", "fever", "swelling", "cough", "headache", "dizzy", "dizziness", "nausea",
+    "weak", "weakness", "tired", "rash", "itching", "infection", "constipation", "diarrhea",
+    "दर्द", "बुखार", "सूजन", "खांसी", "चक्कर",
+)
+POSITIVE_WORDS = {"better", "good", "fine", "great", "well", "okay", "ok", "improving", "theek", "accha", "अच्छा", "ठीक"}
+NEGATIVE_WORDS = {"worse", "bad", "terrible", "awful", "pain", "sick", "kharab", "खराब"}
+# Word characters including Devanagari vowel signs, which \w and \b don't count as letters
+WORD = r"[\wऀ-ॿ]"
+NON_WORD = r"[^\wऀ-ॿ]"
+# A negation only covers its own clause: "no fever, but I am bleeding" still flags bleeding
+CLAUSE_BREAK = re.compile(rf"[.?!,;।]|(?<!{WORD})(?:but|and|or|लेकिन|और|मगर)(?!{WORD})")
+# "no fever", "not had chest pain": at most three words between the negation and the keyword
+NEGATION_BEFORE = re.compile(
+    rf"(?<!{WORD})(?:no|not|never|without|nahi|nahin|नहीं|नही)(?:{NON_WORD}+{WORD}+){{0,3}}{NON_WORD}*$"
+)
+# Hindi puts it after the noun: "सीने में दर्द नहीं है", "खून नहीं आया"
+NEGATION_AFTER = re.compile(rf"^(?:{NON_WORD}+{WORD}+){{0,3}}?{NON_WORD}+(?:नहीं|नही|nahi|nahin)(?!{WORD})")
+
+
+def _negated(clause: str, match) -> bool:
+    return bool(NEGATION_BEFORE.search(clause[:match.start()]) or NEGATION_AFTER.match(clause[match.end():]))
+
+
+def _find_keywords(text: str, keywords) -> list:
+    """Keywords mentioned in the text, skipping negated ones; one plain mention is enough"""
+    clauses = CLAUSE_BREAK.split(text.lower())
+    found = []
+    for k in keywords:
+        pattern = re.compile(rf"(?<!{WORD}){re.escape(k)}(?!{WORD})")
+        if any(not _negated(clause, match) for clause in clauses for match in pattern.finditer(clause)):
+            found.append(k)
+    return found
+
+
+class CallRecordExtractor(FrameProcessor):
+    """Sits after screening, so it sees every caller turn the conversation uses"""
+
+    def __init__(self, call_id: int, context, questionnaire=None, **kwargs):
+        super().__init__(**kwargs)
+        self._call_id = call_id
+        self._context = context
+        self._questionnaire = questionnaire
+        self._flush_task = None
+        # Set once the final save starts, partial saves must not land after it
+        self._final = False
+        self._save_lock = asyncio.Lock()
+
+        self.user_turns = 0
+        # STT often splits one caller turn into several finals, they are one turn until the bot replies
+        self._turn_open = False
+        self.red_flags = []
+        self.symptoms = []
+        self._positive = 0
+        self._negative = 0
+        self._statements = []
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, TranscriptionFrame) and frame.text.strip():
+            self.observe(frame.text)
+            if not self._flush_task and not self._final:
+                self._flush_task = self.create_task(self._flush_later())
+        elif isinstance(frame, BotStartedSpeakingFrame):
+            self.end_turn()
+
+        await self.push_frame(frame, direction)
+
+    def end_turn(self):
+        self._turn_open = False
+
+    def observe(self, text: str):
+        if self._turn_open:
+            self._statements[-1] += f" {text.strip()}"
+        else:
+            self.user_turns += 1
+            self._turn_open = True
+            self._statements.append(text.strip())
+
+        for keyword in _find_keywords(text, RED_FLAG_KEYWORDS):
+            if keyword not in [flag["keyword"] for flag in self.red_flags]:
+                self.red_flags.append({"keyword": keyword, "text": text.strip(), "at": datetime.utcnow().isoformat()})
+                logger.warning(f"Red flag in call {self._call_id}: {keyword!r} in {text!r}")
+        for keyword in _find_keywords(text, SYMPTOM_KEYWORDS):
+            if keyword not in self.symptoms:
+                self.symptoms.append(keyword)
+
+        words = set(re.findall(r"[\wऀ-ॿ]+", text.lower()))
+        self._positive += len(words & POSITIVE_WORDS)
+        self._negative += len(words & NEGATIVE_WORDS)
+
+    def record(self) -> dict:
+        """Summary-shaped record of everything extracted so far"""
+        answers = dict(self._questionnaire.answers) if self._questionnaire else {}
+
+        if self.red_flags:
+            sentiment = "concerned"
+        elif self._positive > self._negative:
+            sentiment = "positive"
+        elif self._negative > self._positive:
+            sentiment = "negative"
+        else:
+            sentiment = "neutral"
+
+        if answers:
+            key_points = [f"{question_id}: {answer}" for question_id, answer in answers.items()]
+        else:
+            key_points = [s[:120] for s in self._statements[-3:]]
+
+        return {
+            "sentiment": sentiment,
+            "key_points": key_points,
+            "health_concerns": [flag["keyword"] for flag in self.red_flags]
+                               + [s for s in self.symptoms if s not in [f["keyword"] for f in self.red_flags]],
+            "follow_up_needed": bool(self.red_flags),
+            "follow_up_reason": f"Red flags: {', '.join(f['keyword'] for f in self.red_flags)}" if self.red_flags else "",
+            "answers": answers,
+            "red_flags": self.red_flags,
+            "user_turns": self.user_turns,
+            "source": "extracted",
+        }
+
+    async def cancel_flush(self):
+        """Called before the final save so a late partial write can't overwrite it"""
+        self._final = True
+        # Let a partial save that already started commit first
+        async with self._save_lock:
+            pass
+        if self._flush_task and not self._flush_task.done():
+            await self.cancel_task(self._flush_task)
+        self._flush_task = None
+
+    async def _flush_later(self):
+        await asyncio.sleep(EXTRACTION_FLUSH_SECS)
+        try:
+            async with self._save_lock:
+                if self._final:
+                    return
+                await save_partial_transcript(self._call_id, self._context.get_messages(), self.record())
+        except Exception as e:
+            # The final save at hangup writes everything again
+            logger.error(f"Error saving partial transcript for call {self._call_id}: {e}")
+        finally:
+            # Only now, so cancel_flush sees a save that is still running
+            if self._flush_task is asyncio.current_task():
+                self._flush_task = None
+
+
+async def save_partial_transcript(call_id: int, messages: list, record: dict):
+    """Upsert the in-progress transcript and extracted summary"""
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.models import Transcript
+    from app.services.cache import cache, transcript_key
+
+    full_transcript = json.dumps({
+        "conversation": [msg for msg in messages if msg["role"] != "system"],
+        "in_progress": True,
+    })
+    async with AsyncSessionLocal() as db:
+        transcript = (await db.execute(
+            select(Transcript).where(Transcript.call_id == call_id)
+        )).scalar_one_or_none()
+        if transcript:
+            transcript.full_transcript = full_transcript
+            transcript.summary = json.dumps(record)
+        else:
+            db.add(Transcript(call_id=call_id, full_transcript=full_transcript, summary=json.dumps(record)))
+        await db.commit()
+    await cache.invalidate(transcript_key(call_id))
+
+
+def merge_summaries(extracted: dict, llm_summary: str) -> str:
+    """LLM summary enriched with the extracted answers and red flags, which it must not drop"""
+    try:
+        summary = json.loads(llm_summary)
+    except (TypeError, ValueError):
+        return json.dumps(extracted)
+    # generate_call_summary reports failures as an "unknown" summary
+    if not isinstance(summary, dict) or summary.get("sentiment") == "unknown":
+        return json.dumps(extracted)
+
+    summary["answers"] = extracted.get("answers", {})
+    summary["red_flags"] = extracted.get("red_flags", [])
+    if extracted.get("red_flags"):
+        summary["follow_up_needed"] = True
+        summary["sentiment"] = "concerned"
+        concerns = summary.get("health_concerns") or []
+        summary["health_concerns"] = concerns + [f["keyword"] for f in extracted["red_flags"] if f["keyword"] not in concerns]
+        if not summary.get("follow_up_reason"):
+            summary["follow_up_reason"] = extracted.get("follow_up_reason", "")
+    summary["source"] = "llm"
+    return json.dumps(summary)
@@ -0,0 +1,173 @@
+"""
+Write-ahead journal for live calls.
+
+Every message added to a call's context is appended to a JSONL file in
+CALL_JOURNAL_DIR together with a usage checkpoint, so a worker crash or
+redeploy no longer loses the conversation. Appends are only flushed to the
+OS unless CALL_JOURNAL_FSYNC=true; the database gets the same data in
+batches through the partial transcript writes (app/services/call_extraction.py).
+
+The file is deleted once save_transcript succeeds. At startup,
+recover_orphaned_calls() finalizes any call whose journal was left behind
+with status "interrupted". Live journals hold an exclusive flock, so a
+worker sharing the directory never recovers another worker's call.
+
+CALL_JOURNAL_DIR defaults to data/call_journal in the backend directory,
+which is git-ignored: journals hold patient transcripts.
+"""
+import os
+import json
+import glob
+import fcntl
+from datetime import datetime
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from pipecat.frames.frames import Frame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from app.services.budget import LIVE_CALL_STATUSES
+
+load_dotenv()
+
+# Absolute, so it doesn't move with the working directory the server was started from
+CALL_JOURNAL_DIR = os.path.abspath(os.getenv(
+    "CALL_JOURNAL_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "data", "call_journal")
+))
+CALL_JOURNAL_FSYNC = os.getenv("CALL_JOURNAL_FSYNC", "false").lower() in ("1", "true", "yes")
+
+INTERRUPTED_STATUS = "interrupted"
+
+
+def journal_path(call_id: int) -> str:
+    return os.path.join(CALL_JOURNAL_DIR, f"call_{call_id}.jsonl")
+
+
+class CallJournal:
+    def __init__(self, call_id: int):
+        self.call_id = call_id
+        self.path = journal_path(call_id)
+        os.makedirs(CALL_JOURNAL_DIR, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._file.close()
+            raise
+        self._write({"type": "start", "call_id": call_id})
+
+    def _write(self, entry: dict):
+        if self._file is None:
+            return
+        entry["at"] = datetime.utcnow().isoformat()
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        if CALL_JOURNAL_FSYNC:
+            os.fsync(self._file.fileno())
+
+    def append_messages(self, messages: list, checkpoint: dict):
+        for message in messages:
+            self._write({"type": "message", "message": message})
+        self._write({"type": "checkpoint", **checkpoint})
+
+    def close(self, remove: bool = False):
+        """remove=True once the call is safely in the database"""
+        if self._file is None:
+            return
+        if remove:
+            os.remove(self.path)
+        self._file.close()
+        self._file = None
+
+
+class CallJournalProcessor(FrameProcessor):
+    """Last in the pipeline: appends context messages as soon as either aggregator adds them"""
+
+    def __init__(self, journal: CallJournal, context, checkpoint, **kwargs):
+        super().__init__(**kwargs)
+        self._journal = journal
+        self._context = context
+        self._checkpoint = checkpoint
+        # The system prompt is rebuilt from the patient record, not journaled
+        self._written = 1
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        messages = self._context.messages
+        if len(messages) > self._written:
+            try:
+                self._journal.append_messages(messages[self._written:], self._checkpoint())
+            except (OSError, ValueError) as e:
+                logger.error(f"Call journal write failed for call {self._journal.call_id}: {e}")
+            self._written = len(messages)
+
+        await self.push_frame(frame, direction)
+
+
+def read_journal(path: str) -> list:
+    """Entries in order; a line cut off by the crash is dropped"""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return entries
+
+
+async def recover_orphaned_calls() -> list:
+    """Finalize calls whose journal outlived their worker, returns their ids"""
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.models import Call
+    from app.services.pipeline_service import call_usage, save_transcript
+
+    recovered = []
+    for path in sorted(glob.glob(os.path.join(CALL_JOURNAL_DIR, "call_*.jsonl"))):
+        with open(path, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue  # live call on another worker
+
+            entries = read_journal(path)
+            start = next((e for e in entries if e.get("type") == "start"), None)
+            if not start:
+                os.remove(path)
+                continue
+            call_id = start["call_id"]
+
+            async with AsyncSessionLocal() as db:
+                status = (await db.execute(select(Call.status).where(Call.id == call_id))).scalar()
+                if status not in LIVE_CALL_STATUSES:
+                    # Finalized after all, or the call was deleted
+                    os.remove(path)
+                    continue
+
+                messages = [e["message"] for e in entries if e.get("type") == "message"]
+                checkpoint = next((e for e in reversed(entries) if e.get("type") == "checkpoint"), {})
+                usage = call_usage(
+                    messages,
+                    checkpoint.get("spoken_characters"),
+                    checkpoint.get("llm_input_tokens", 0),
+                    checkpoint.get("llm_output_tokens", 0),
+                )
+                ended_at = datetime.fromisoformat(entries[-1]["at"])
+                try:
+                    await save_transcript(
+                        call_id, messages, db, usage,
+                        status=INTERRUPTED_STATUS,
+                        extracted=checkpoint.get("extracted"),
+                        ended_at=ended_at,
+                    )
+                except Exception as e:
+                    logger.error(f"Could not recover call {call_id}, keeping its journal: {e}")
+                    continue
+
+            os.remove(path)
+            recovered.append(call_id)
+            logger.info(f"Recovered call {call_id} from its journal ({len(messages)} messages)")
+    return recovered
@@ -0,0 +1,187 @@
+"""
+Answering-machine and dead-air screening for the first seconds of a call.
+
+Sits between STT and the user context aggregator. Until the callee is judged
+human, transcriptions are held back so the LLM never runs for a voicemail
+greeting or an empty line. The verdict comes from VAD timing plus early STT
+text:
+
+    human    a short first utterance ("Hello?") without machine phrases
+    machine  a long uninterrupted greeting, or voicemail phrases in the text
+    silence  no speech at all within SCREENING_SILENCE_SECS
+
+Machines get VOICEMAIL_AUDIO_FILE (pre-rendered 8kHz 16-bit mono WAV) or
+VOICEMAIL_MESSAGE spoken through TTS, then the call ends. Input audio frames
+are the clock, so no timer task is needed.
+"""
+import os
+import time
+import wave
+from functools import lru_cache
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from pipecat.frames.frames import (
+    EndTaskFrame,
+    Frame,
+    InputAudioRawFrame,
+    InterimTranscriptionFrame,
+    OutputAudioRawFrame,
+    TranscriptionFrame,
+    TTSSpeakFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+load_dotenv()
+
+SCREENING_ENABLED = os.getenv("CALL_SCREENING", "true").lower() in ("1", "true", "yes")
+# No speech at all for this long after connecting -> no_answer
+SCREENING_SILENCE_SECS = float(os.getenv("SCREENING_SILENCE_SECS", "8"))
+# People answer with a word or two, greetings run on for several seconds
+MACHINE_SPEECH_SECS = float(os.getenv("MACHINE_SPEECH_SECS", "4"))
+# Give up and treat the callee as human after this long without a verdict
+SCREENING_MAX_SECS = float(os.getenv("SCREENING_MAX_SECS", "12"))
+
+VOICEMAIL_MESSAGE = os.getenv(
+    "VOICEMAIL_MESSAGE",
+    "Hello, this is Presco hospital calling to check on you. We will call you again later. Take care.",
+)
+VOICEMAIL_AUDIO_FILE = os.getenv("VOICEMAIL_AUDIO_FILE")
+
+MACHINE_PHRASES = (
+    "you have reached",
+    "you've reached",
+    "leave a message",
+    "leave your message",
+    "after the tone",
+    "after the beep",
+    "not available",
+    "unavailable",
+    "voicemail",
+    "voice mail",
+    "mailbox",
+    "record your message",
+    "is switched off",
+    "not reachable",
+    "does not exist",
+    "please try again later",
+    "सन्देश",
+    "संदेश",
+    "उपलब्ध नहीं",
+    "स्विच ऑफ",
+)
+
+# Call.status recorded for each verdict
+VERDICT_STATUS = {
+    "human": "completed",
+    "machine": "voicemail",
+    "silence": "no_answer",
+}
+
+
+def has_machine_phrase(text: str) -> bool:
+    text = text.lower()
+    return any(phrase in text for phrase in MACHINE_PHRASES)
+
+
+@lru_cache(maxsize=4)
+def load_prompt_audio(path: str, sample_rate: int = 8000) -> bytes:
+    """Pre-rendered prompt as raw PCM, read once per process"""
+    with wave.open(path, "rb") as wav:
+        if wav.getframerate() != sample_rate or wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError(f"{path} must be {sample_rate}Hz 16-bit mono")
+        return wav.readframes(wav.getnframes())
+
+
+class CallScreeningProcessor(FrameProcessor):
+    def __init__(self, call_id: int = None, sample_rate: int = 8000, **kwargs):
+        super().__init__(**kwargs)
+        self._call_id = call_id
+        self._sample_rate = sample_rate
+        self.verdict = None if SCREENING_ENABLED else "human"
+        self._connected_at = None
+        self._speech_started_at = None
+        self._speech_secs = 0.0
+        self._text = ""
+        self._held = []
+
+    @property
+    def call_status(self) -> str:
+        return VERDICT_STATUS.get(self.verdict, "completed")
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if self.verdict is not None:
+            await self.push_frame(frame, direction)
+            return
+
+        now = time.monotonic()
+        if self._connected_at is None:
+            self._connected_at = now
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            self._speech_started_at = now
+        elif isinstance(frame, UserStoppedSpeakingFrame) and self._speech_started_at is not None:
+            self._speech_secs += now - self._speech_started_at
+            self._speech_started_at = None
+        elif isinstance(frame, InterimTranscriptionFrame):
+            if has_machine_phrase(frame.text):
+                await self._decide("machine", f"interim text: {frame.text!r}")
+            # Dropped like the finals are held, downstream speculation would pay for LLM replies to greetings
+            return
+        elif isinstance(frame, TranscriptionFrame):
+            self._text = f"{self._text} {frame.text}".strip()
+            # Held until the verdict so the LLM only runs for people
+            self._held.append((frame, direction))
+            if has_machine_phrase(self._text):
+                await self._decide("machine", f"text: {self._text!r}")
+            elif self._speech_started_at is None:
+                if self._speech_secs < MACHINE_SPEECH_SECS:
+                    await self._decide("human", f"{self._speech_secs:.1f}s of speech: {self._text!r}")
+                else:
+                    await self._decide("machine", f"{self._speech_secs:.1f}s greeting: {self._text!r}")
+            return
+        elif isinstance(frame, InputAudioRawFrame):
+            await self._check_timers(now)
+
+        await self.push_frame(frame, direction)
+
+    async def _check_timers(self, now: float):
+        talking = now - self._speech_started_at if self._speech_started_at is not None else 0.0
+        if self._speech_secs + talking >= MACHINE_SPEECH_SECS:
+            await self._decide("machine", f"{self._speech_secs + talking:.1f}s of continuous speech")
+        elif self._speech_secs == 0 and talking == 0 and now - self._connected_at >= SCREENING_SILENCE_SECS:
+            await self._decide("silence", f"no speech in {SCREENING_SILENCE_SECS:.0f}s")
+        elif now - self._connected_at >= SCREENING_MAX_SECS:
+            await self._decide("human", "no verdict within the screening window")
+
+    async def _decide(self, verdict: str, reason: str):
+        self.verdict = verdict
+        logger.info(f"Call screening: {verdict} ({reason}) call_id={self._call_id}")
+
+        if verdict == "human":
+            for frame, direction in self._held:
+                await self.push_frame(frame, direction)
+            self._held.clear()
+            return
+
+        self._held.clear()
+        if verdict == "machine":
+            await self._leave_message()
+        # Ends after everything already queued (the message) has played
+        await self.push_frame(EndTaskFrame(), FrameDirection.UPSTREAM)
+
+    async def _leave_message(self):
+        if VOICEMAIL_AUDIO_FILE:
+            try:
+                audio = load_prompt_audio(VOICEMAIL_AUDIO_FILE, self._sample_rate)
+                await self.push_frame(OutputAudioRawFrame(audio, self._sample_rate, 1))
+                return
+            except (OSError, ValueError, wave.Error) as e:
+                logger.error(f"Voicemail audio unavailable, falling back to TTS: {e}")
+        if VOICEMAIL_MESSAGE:
+            await self.push_frame(TTSSpeakFrame(VOICEMAIL_MESSAGE))
@@ -0,0 +1,191 @@
+"""
+Drain mode for rolling restarts.
+
+POST /admin/drain stops the worker taking new calls: /ready turns 503,
+/initiate returns 503 and /answer webhooks are redirected to
+DRAIN_REDIRECT_URL (another worker) or refused. Live calls get up to
+DRAIN_TIMEOUT_SECS to finish on their own, the rest are asked to wrap up
+with a goodbye line and cancelled DRAIN_WRAP_UP_SECS later, which still
+saves their transcripts. Pending post-call jobs (summary enrichment) are
+awaited last. GET /admin/drain reports progress, DELETE /admin/drain
+takes calls again. All of them need the admin token (admin_auth.py).
+
+Deploys should drain and wait for phase "done" before sending SIGTERM:
+uvicorn closes open websockets before the lifespan shutdown runs. The
+shutdown path runs the same drain for whatever is left.
+"""
+import os
+import time
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+DRAIN_TIMEOUT_SECS = float(os.getenv("DRAIN_TIMEOUT_SECS", "300"))
+DRAIN_WRAP_UP_SECS = float(os.getenv("DRAIN_WRAP_UP_SECS", "15"))
+DRAIN_JOBS_TIMEOUT_SECS = float(os.getenv("DRAIN_JOBS_TIMEOUT_SECS", "30"))
+# Base URL of a worker that keeps taking calls, e.g. https://worker-2.example.com
+DRAIN_REDIRECT_URL = os.getenv("DRAIN_REDIRECT_URL")
+DRAIN_WRAP_UP_MESSAGE = os.getenv(
+    "DRAIN_WRAP_UP_MESSAGE",
+    "I'm sorry, I have to end the call now. Our team will call you back if anything else is needed. Goodbye.",
+)
+
+DRAIN_POLL_SECS = 0.5
+
+
+class LiveCallRegistry:
+    """Pipeline tasks of the calls running on this worker"""
+
+    def __init__(self):
+        self._calls = {}
+
+    def register(self, call_id: int, task, patient_name: str = None):
+        self._calls[call_id] = {"task": task, "patient_name": patient_name, "started_at": datetime.utcnow()}
+
+    def unregister(self, call_id: int):
+        self._calls.pop(call_id, None)
+
+    def __len__(self):
+        return len(self._calls)
+
+    def snapshot(self) -> list:
+        now = datetime.utcnow()
+        return [
+            {
+                "call_id": call_id,
+                "patient_name": call["patient_name"],
+                "started_at": call["started_at"].isoformat(),
+                "age_secs": int((now - call["started_at"]).total_seconds()),
+            }
+            for call_id, call in self._calls.items()
+        ]
+
+    async def wrap_up_all(self, message: str) -> list:
+        """Say goodbye and end every call once the line has played"""
+        from pipecat.frames.frames import EndFrame, TTSSpeakFrame
+
+        call_ids = list(self._calls)
+        for call_id in call_ids:
+            await self._calls[call_id]["task"].queue_frames([TTSSpeakFrame(message), EndFrame()])
+        return call_ids
+
+    async def cancel_all(self) -> list:
+        call_ids = list(self._calls)
+        for call_id in call_ids:
+            if call_id in self._calls:
+                await self._calls[call_id]["task"].cancel()
+        return call_ids
+
+
+live_calls = LiveCallRegistry()
+
+# Post-call jobs, referenced so they aren't garbage collected mid-run
+_jobs = set()
+
+
+def track_job(task: asyncio.Task):
+    _jobs.add(task)
+    task.add_done_callback(_jobs.discard)
+
+
+class DrainController:
+    def __init__(self, registry: LiveCallRegistry):
+        self._registry = registry
+        self._task = None
+        self.draining = False
+        self.phase = "serving"
+        self.started_at = None
+        self.deadline = None
+        self.calls_at_start = 0
+        self.wrapped_up = []
+        self.cancelled = []
+        self.unfinished_jobs = 0
+
+    def start(self, timeout: float = None) -> dict:
+        """Begin draining in the background, a second call only reports progress"""
+        if timeout is None:
+            timeout = DRAIN_TIMEOUT_SECS
+        if not self._task:
+            self.draining = True
+            self.phase = "waiting_for_calls"
+            self.started_at = datetime.utcnow()
+            self.deadline = time.monotonic() + timeout
+            self.calls_at_start = len(self._registry)
+            logger.warning(f"Draining: {self.calls_at_start} live call(s), deadline in {timeout:.0f}s")
+            self._task = asyncio.create_task(self._run())
+        return self.status()
+
+    def resume(self) -> dict:
+        """Undo start(): take calls again; calls already wrapped up or cancelled stay ended"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+        if self.draining:
+            logger.warning(f"Drain stopped in phase {self.phase}, taking calls again")
+        self._task = None
+        self.draining = False
+        self.phase = "serving"
+        self.started_at = None
+        self.deadline = None
+        self.calls_at_start = 0
+        self.wrapped_up = []
+        self.cancelled = []
+        self.unfinished_jobs = 0
+        return self.status()
+
+    async def wait(self, timeout: float = None):
+        self.start(timeout)
+        await self._task
+
+    async def _wait_for_calls(self, until: float) -> bool:
+        while len(self._registry) and time.monotonic() < until:
+            await asyncio.sleep(DRAIN_POLL_SECS)
+        return not len(self._registry)
+
+    async def _run(self):
+        if not await self._wait_for_calls(self.deadline):
+            self.phase = "wrapping_up"
+            self.wrapped_up = await self._registry.wrap_up_all(DRAIN_WRAP_UP_MESSAGE)
+            logger.warning(f"Drain deadline reached, wrapping up calls {self.wrapped_up}")
+            if not await self._wait_for_calls(time.monotonic() + DRAIN_WRAP_UP_SECS):
+                self.phase = "cancelling"
+                self.cancelled = await self._registry.cancel_all()
+                logger.warning(f"Cancelling calls still running after wrap-up: {self.cancelled}")
+                await self._wait_for_calls(time.monotonic() + DRAIN_WRAP_UP_SECS)
+
+        self.phase = "flushing_jobs"
+        if _jobs:
+            _, pending = await asyncio.wait(list(_jobs), timeout=DRAIN_JOBS_TIMEOUT_SECS)
+            self.unfinished_jobs = len(pending)
+            if pending:
+                logger.error(f"{len(pending)} post-call job(s) still running after drain")
+
+        self.phase = "done"
+        logger.info(f"Drain finished in {(datetime.utcnow() - self.started_at).total_seconds():.1f}s")
+
+    def answer_redirect(self, call_id: int) -> Optional[str]:
+        """Answer URL on the worker that takes over, None when there is none"""
+        if not DRAIN_REDIRECT_URL:
+            return None
+        return f"{DRAIN_REDIRECT_URL.rstrip('/')}/api/calls/answer/{call_id}"
+
+    def status(self) -> dict:
+        return {
+            "draining": self.draining,
+            "phase": self.phase,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "deadline_in_secs": max(0, int(self.deadline - time.monotonic())) if self.deadline else None,
+            "calls_at_start": self.calls_at_start,
+            "live_calls": self._registry.snapshot(),
+            "wrapped_up": self.wrapped_up,
+            "cancelled": self.cancelled,
+            "pending_jobs": len(_jobs),
+            "unfinished_jobs": self.unfinished_jobs,
+        }
+
+
+drain = DrainController(live_calls)
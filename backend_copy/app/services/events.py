@@ -0,0 +1,140 @@
+"""
+In-process pub/sub for call lifecycle events, served as server-sent events.
+
+initiate_call, handle_answer and save_transcript publish events such as
+call.initiated / call.answered / call.ended. Every event gets an increasing
+id and is kept in a ring buffer of EVENT_BUFFER_SIZE, so a reconnecting
+EventSource (which sends Last-Event-ID) resumes where it left off. A client
+whose queue (EVENT_CLIENT_QUEUE_SIZE) fills up is disconnected instead of
+slowing down publishers; it reconnects and catches up from the buffer. When
+the buffer no longer reaches back to its last id it gets a "reset" event
+and should refetch.
+
+Events only reach clients connected to the worker that published them.
+"""
+import os
+import json
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "1000"))
+EVENT_CLIENT_QUEUE_SIZE = int(os.getenv("EVENT_CLIENT_QUEUE_SIZE", "100"))
+# Comment lines keep proxies from closing idle streams
+EVENT_HEARTBEAT_SECS = float(os.getenv("EVENT_HEARTBEAT_SECS", "15"))
+
+
+def format_sse(event: dict) -> str:
+    data = json.dumps(event["data"], default=str)
+    event_id = f"id: {event['id']}\n" if event.get("id") is not None else ""
+    return f"{event_id}event: {event['type']}\ndata: {data}\n\n"
+
+
+class Subscription:
+    def __init__(self, bus: "EventBus"):
+        self._bus = bus
+        self.queue = asyncio.Queue(maxsize=EVENT_CLIENT_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event: dict) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = set()
+        self._next_id = 1
+        self._stats = {"published": 0, "dropped_clients": 0}
+
+    def publish(self, event_type: str, data: dict) -> dict:
+        """Never blocks, slow clients are cut off rather than waited for"""
+        event = {"id": self._next_id, "type": event_type, "data": {**data, "at": datetime.utcnow().isoformat()}}
+        self._next_id += 1
+        self._buffer.append(event)
+        self._stats["published"] += 1
+
+        for subscription in list(self._subscribers):
+            if not subscription.offer(event):
+                self._subscribers.discard(subscription)
+                self._stats["dropped_clients"] += 1
+                logger.warning(f"Event client fell {EVENT_CLIENT_QUEUE_SIZE} events behind, disconnecting it")
+        return event
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> tuple:
+        """(subscription, backlog); backlog is None when the buffer can't cover the gap"""
+        subscription = Subscription(self)
+        self._subscribers.add(subscription)
+
+        if last_event_id is None:
+            return subscription, []
+        oldest = self._buffer[0]["id"] if self._buffer else self._next_id
+        if last_event_id < oldest - 1 or last_event_id >= self._next_id:
+            # Evicted from the buffer, or an id from before a restart
+            return subscription, None
+        return subscription, [event for event in self._buffer if event["id"] > last_event_id]
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "subscribers": len(self._subscribers),
+            "buffered": len(self._buffer),
+            "last_event_id": self._next_id - 1,
+        }
+
+    async def stream(self, last_event_id: Optional[int] = None):
+        """SSE body: backlog first, then live events until the client disconnects or falls behind"""
+        subscription, backlog = self.subscribe(last_event_id)
+        try:
+            if backlog is None:
+                yield format_sse({"id": self._next_id - 1, "type": "reset", "data": {}})
+                backlog = []
+            for event in backlog:
+                yield format_sse(event)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=EVENT_HEARTBEAT_SECS)
+                except asyncio.TimeoutError:
+                    if subscription.overflowed:
+                        return
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_sse(event)
+                if subscription.overflowed and subscription.queue.empty():
+                    # Ends the response, EventSource reconnects with its last id
+                    return
+        finally:
+            subscription.close()
+
+
+event_bus = EventBus()
+
+
+def publish_call_event(event_type: str, call: dict):
+    """call.* event from a call snapshot"""
+    event_bus.publish(event_type, {
+        "call_id": call.get("id"),
+        "patient_id": call.get("patient_id"),
+        "status": call.get("status"),
+        "campaign": call.get("campaign"),
+        "duration": call.get("duration"),
+        "cost": call.get("cost"),
+    })
@@ -0,0 +1,263 @@
+"""
+Offline stand-ins for Deepgram, OpenAI and Cartesia.
+
+Selected through the provider registry (PROVIDER_MODE=fake or a per-role
+*_PROVIDER=fake) so benchmarks can drive the real Pipecat pipeline without
+network access or provider spend.
+
+Latencies are distribution specs, sampled from a seeded RNG so runs repeat:
+
+    "150"                 constant 150ms
+    "constant:150"
+    "uniform:100,300"     low, high
+    "normal:300,50"       mean, stddev (clamped at 0)
+    "lognormal:300,0.4"   median, sigma (long tail, like real APIs)
+"""
+import os
+import time
+import asyncio
+import random
+import itertools
+from typing import AsyncGenerator
+
+import numpy as np
+from loguru import logger
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice, ChoiceDelta
+from openai.types.completion_usage import CompletionUsage
+
+from pipecat.frames.frames import (
+    Frame,
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.services.openai.llm import OpenAILLMService
+from pipecat.services.stt_service import SegmentedSTTService
+from pipecat.services.tts_service import TTSService
+from pipecat.utils.time import time_now_iso8601
+
+FAKE_SEED = int(os.getenv("FAKE_SEED", "1234"))
+FAKE_STT_LATENCY_MS = os.getenv("FAKE_STT_LATENCY_MS", "150")
+# Send each transcript as an interim first, like Deepgram with interim_results
+FAKE_STT_INTERIMS = os.getenv("FAKE_STT_INTERIMS", "false").lower() in ("1", "true", "yes")
+FAKE_LLM_TTFB_MS = os.getenv("FAKE_LLM_TTFB_MS", "300")
+FAKE_LLM_TOKEN_MS = os.getenv("FAKE_LLM_TOKEN_MS", "15")
+FAKE_LLM_WORDS_PER_CHUNK = int(os.getenv("FAKE_LLM_WORDS_PER_CHUNK", "1"))
+FAKE_TTS_TTFB_MS = os.getenv("FAKE_TTS_TTFB_MS", "120")
+FAKE_TTS_MS_PER_CHAR = float(os.getenv("FAKE_TTS_MS_PER_CHAR", "60"))  # ~15 chars/s speech
+# Audio generation speed relative to playback, 0 = all at once after the TTFB
+FAKE_TTS_REALTIME_FACTOR = float(os.getenv("FAKE_TTS_REALTIME_FACTOR", "0"))
+FAKE_SUMMARY_LATENCY_MS = os.getenv("FAKE_SUMMARY_LATENCY_MS", "800")
+
+_rng = random.Random(FAKE_SEED)
+
+
+class LatencyDistribution:
+    """Parsed latency spec; sample() returns seconds"""
+
+    KINDS = ("constant", "uniform", "normal", "lognormal")
+
+    def __init__(self, spec: str):
+        self.spec = str(spec).strip()
+        kind, _, params = self.spec.partition(":")
+        if not params:
+            kind, params = "constant", kind
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{kind}' in '{self.spec}'")
+
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",")]
+        expected = 1 if kind == "constant" else 2
+        if len(self.params) != expected:
+            raise ValueError(f"'{kind}' latency takes {expected} parameter(s), got '{self.spec}'")
+
+    def sample_ms(self) -> float:
+        if self.kind == "constant":
+            return self.params[0]
+        if self.kind == "uniform":
+            return _rng.uniform(*self.params)
+        if self.kind == "normal":
+            return max(0.0, _rng.gauss(*self.params))
+        median, sigma = self.params
+        return median * _rng.lognormvariate(0, sigma)
+
+    def sample(self) -> float:
+        return self.sample_ms() / 1000
+
+    def __repr__(self):
+        return f"LatencyDistribution({self.spec!r})"
+
+
+def parse_latency(spec) -> LatencyDistribution:
+    return spec if isinstance(spec, LatencyDistribution) else LatencyDistribution(spec)
+
+
+summary_latency = parse_latency(FAKE_SUMMARY_LATENCY_MS)
+
+FAKE_TRANSCRIPTS = [
+    "Hello?",
+    "Yes, I am feeling better today.",
+    "The pain is much less than last week.",
+    "No, I have not had any fever.",
+    "Thank you, bye.",
+]
+
+FAKE_REPLIES = [
+    "Hello! This is Presco hospital calling to check on you. How are you feeling today?",
+    "That's good to hear. Are you taking your medicines on time?",
+    "Thank you for letting us know. Have you had any fever or swelling?",
+    "Great, please call us if anything changes. Take care!",
+]
+
+
+class FakeSTTService(SegmentedSTTService):
+    """Returns a canned transcript for every VAD speech segment"""
+
+    def __init__(self, latency_ms=FAKE_STT_LATENCY_MS, **kwargs):
+        super().__init__(**kwargs)
+        self._latency = parse_latency(latency_ms)
+        self._transcripts = itertools.cycle(FAKE_TRANSCRIPTS)
+
+    def can_generate_metrics(self) -> bool:
+        return True
+
+    async def run_stt(self, audio: bytes) -> AsyncGenerator[Frame, None]:
+        transcript = next(self._transcripts)
+        if FAKE_STT_INTERIMS:
+            yield InterimTranscriptionFrame(transcript, "", time_now_iso8601())
+        await self.start_processing_metrics()
+        await asyncio.sleep(self._latency.sample())
+        await self.stop_processing_metrics()
+        yield TranscriptionFrame(transcript, "", time_now_iso8601())
+
+
+class FakeLLMService(OpenAILLMService):
+    """OpenAILLMService whose chat completion stream is generated locally.
+
+    Everything above get_chat_completions (context handling, metrics, frame
+    pushing) is the real OpenAI service code.
+    """
+
+    def __init__(
+        self,
+        ttfb_ms=FAKE_LLM_TTFB_MS,
+        token_ms=FAKE_LLM_TOKEN_MS,
+        words_per_chunk: int = FAKE_LLM_WORDS_PER_CHUNK,
+        **kwargs,
+    ):
+        super().__init__(api_key="fake", model="fake-gpt-4o-mini", **kwargs)
+        self._ttfb = parse_latency(ttfb_ms)
+        self._token_delay = parse_latency(token_ms)
+        self._words_per_chunk = words_per_chunk
+        self._replies = itertools.cycle(FAKE_REPLIES)
+
+    async def get_chat_completions(self, params_from_context):
+        return self._stream_reply(params_from_context["messages"])
+
+    async def _stream_reply(self, messages):
+        async for chunk in stream_fake_completion(
+            messages,
+            next(self._replies),
+            self.model_name,
+            self._ttfb,
+            self._token_delay,
+            self._words_per_chunk,
+        ):
+            yield chunk
+
+
+def reply_chunks(reply: str, words_per_chunk: int = 1) -> list:
+    """Split a reply into streamed deltas of N words, keeping the spaces"""
+    words = reply.split(" ")
+    return [
+        (" " if i else "") + " ".join(words[i:i + words_per_chunk])
+        for i in range(0, len(words), words_per_chunk)
+    ]
+
+
+def estimate_usage(messages: list, reply: str) -> CompletionUsage:
+    prompt_tokens = max(1, sum(len(str(m.get("content", ""))) for m in messages) // 4)
+    completion_tokens = max(1, len(reply) // 4)
+    return CompletionUsage(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+
+
+async def stream_fake_completion(messages, reply, model, ttfb, token_delay, words_per_chunk=1):
+    """ChatCompletionChunk stream shared by FakeLLMService and the fake OpenAI server"""
+    created = int(time.time())
+
+    await asyncio.sleep(parse_latency(ttfb).sample())
+    token_delay = parse_latency(token_delay)
+    for text in reply_chunks(reply, words_per_chunk):
+        yield ChatCompletionChunk(
+            id="fake",
+            object="chat.completion.chunk",
+            created=created,
+            model=model,
+            choices=[Choice(index=0, delta=ChoiceDelta(content=text))],
+        )
+        await asyncio.sleep(token_delay.sample())
+
+    yield ChatCompletionChunk(
+        id="fake",
+        object="chat.completion.chunk",
+        created=created,
+        model=model,
+        choices=[],
+        usage=estimate_usage(messages, reply),
+    )
+
+
+class FakeTTSService(TTSService):
+    """Renders a quiet tone whose length tracks the text, like real speech would"""
+
+    def __init__(
+        self,
+        ttfb_ms=FAKE_TTS_TTFB_MS,
+        ms_per_char: float = FAKE_TTS_MS_PER_CHAR,
+        realtime_factor: float = FAKE_TTS_REALTIME_FACTOR,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._ttfb = parse_latency(ttfb_ms)
+        self._ms_per_char = ms_per_char
+        self._realtime_factor = realtime_factor
+
+    def can_generate_metrics(self) -> bool:
+        return True
+
+    def _render(self, text: str) -> bytes:
+        return render_tone(text, self.sample_rate, self._ms_per_char)
+
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        logger.debug(f"{self}: Generating fake TTS [{text}]")
+        await self.start_ttfb_metrics()
+        await asyncio.sleep(self._ttfb.sample())
+        await self.start_tts_usage_metrics(text)
+
+        yield TTSStartedFrame()
+        audio = self._render(text)
+        for i in range(0, len(audio), self.chunk_size):
+            await self.stop_ttfb_metrics()
+            chunk = audio[i:i + self.chunk_size]
+            yield TTSAudioRawFrame(chunk, self.sample_rate, 1)
+            if self._realtime_factor:
+                # Streaming synthesis: each chunk takes a fraction of its playback time
+                await asyncio.sleep(len(chunk) / 2 / self.sample_rate / self._realtime_factor)
+        yield TTSStoppedFrame()
+
+
+def render_tone(text: str, sample_rate: int, ms_per_char: float = FAKE_TTS_MS_PER_CHAR) -> bytes:
+    """16-bit mono tone as long as the text would take to speak"""
+    num_samples = int(sample_rate * len(text) * ms_per_char / 1000)
+    t = np.arange(num_samples) / sample_rate
+    return (3000 * np.sin(2 * np.pi * 220 * t)).astype("<i2").tobytes()
+
+
+FAKE_SUMMARY = """{"sentiment": "positive", "key_points": ["Load test call"], "health_concerns": [], "follow_up_needed": false, "follow_up_reason": ""}"""
@@ -0,0 +1,302 @@
+"""
+Hedged TTS across providers (TTS_PROVIDER=hedged).
+
+Every utterance goes to the healthiest provider in TTS_HEDGE_PROVIDERS
+first. If no audio has arrived after TTS_HEDGE_AFTER_MS (or it failed), the
+next provider gets the same text; whichever sends audio first is played and
+the other request is cancelled. Nothing is played if no provider has sent
+audio within TTS_FIRST_AUDIO_TIMEOUT_SECS.
+
+Providers are ranked by ProviderHealth (success rate and time to first
+audio) shared by all calls in the process, and a provider whose circuit
+breaker is open is skipped until its cooldown ends. Stats are on
+/health/tts.
+
+The Pipecat Cartesia/ElevenLabs services used by the single-provider modes
+stream over a websocket shared by the whole call, so a single utterance
+can't be raced or cancelled there. The synthesizers below use the
+providers' HTTP streaming endpoints instead.
+"""
+import os
+import time
+import random
+import asyncio
+from typing import AsyncGenerator, AsyncIterator, Optional
+
+import httpx
+from dotenv import load_dotenv
+from loguru import logger
+
+from pipecat.frames.frames import ErrorFrame, Frame, TTSAudioRawFrame, TTSStartedFrame, TTSStoppedFrame
+from pipecat.services.tts_service import TTSService
+
+from app.services.resilience import ProviderHealth, provider_guard
+
+load_dotenv()
+
+TTS_HEDGE_AFTER_MS = float(os.getenv("TTS_HEDGE_AFTER_MS", "400"))
+TTS_FIRST_AUDIO_TIMEOUT_SECS = float(os.getenv("TTS_FIRST_AUDIO_TIMEOUT_SECS", "5"))
+
+CARTESIA_URL = "https://api.cartesia.ai/tts/bytes"
+CARTESIA_VERSION = "2024-11-13"
+ELEVENLABS_URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
+
+_END = object()
+
+# Process-wide, see /health/tts
+hedge_stats = {"utterances": 0, "hedged": 0, "failovers": 0, "failed": 0, "wins": {}}
+_health = {}
+_client = None
+
+
+def provider_health(name: str) -> ProviderHealth:
+    if name not in _health:
+        # Same breaker as the provider's other requests, see resilience.py
+        _health[name] = ProviderHealth(
+            name, latency_target_secs=TTS_HEDGE_AFTER_MS / 1000, breaker=provider_guard(name).breaker
+        )
+    return _health[name]
+
+
+def tts_health_summary() -> dict:
+    return {**hedge_stats, "providers": {name: health.stats() for name, health in _health.items()}}
+
+
+def _http_client() -> httpx.AsyncClient:
+    # One pool for all calls, so utterances reuse warm TLS connections
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=httpx.Timeout(TTS_FIRST_AUDIO_TIMEOUT_SECS, read=10.0))
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _pcm_stream(response: httpx.Response) -> AsyncIterator[bytes]:
+    """Response body as whole 16-bit samples"""
+    leftover = b""
+    async for data in response.aiter_bytes():
+        data = leftover + data
+        cut = len(data) - len(data) % 2
+        leftover = data[cut:]
+        if cut:
+            yield data[:cut]
+
+
+# ---- Synthesizers ----
+class CartesiaSynthesizer:
+    name = "cartesia"
+
+    def __init__(self, api_key: str, voice_id: str, model: str = "sonic-2"):
+        self._api_key = api_key
+        self._voice_id = voice_id
+        self._model = model
+
+    async def synthesize(self, text: str, sample_rate: int, language: str = "en") -> AsyncIterator[bytes]:
+        payload = {
+            "model_id": self._model,
+            "transcript": text,
+            "voice": {"mode": "id", "id": self._voice_id},
+            "output_format": {"container": "raw", "encoding": "pcm_s16le", "sample_rate": sample_rate},
+            "language": language,
+        }
+        headers = {"X-API-Key": self._api_key, "Cartesia-Version": CARTESIA_VERSION}
+        async with _http_client().stream("POST", CARTESIA_URL, json=payload, headers=headers) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"Cartesia returned HTTP {response.status_code}: {(await response.aread())[:200]!r}")
+            async for chunk in _pcm_stream(response):
+                yield chunk
+
+
+class ElevenLabsSynthesizer:
+    name = "elevenlabs"
+
+    def __init__(self, api_key: str, voice_id: str, model: str = "eleven_turbo_v2_5"):
+        self._api_key = api_key
+        self._voice_id = voice_id
+        self._model = model
+
+    async def synthesize(self, text: str, sample_rate: int, language: str = "en") -> AsyncIterator[bytes]:
+        url = ELEVENLABS_URL.format(voice_id=self._voice_id)
+        payload = {"text": text, "model_id": self._model, "language_code": language}
+        headers = {"xi-api-key": self._api_key}
+        params = {"output_format": f"pcm_{sample_rate}"}
+        async with _http_client().stream("POST", url, json=payload, headers=headers, params=params) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"ElevenLabs returned HTTP {response.status_code}: {(await response.aread())[:200]!r}")
+            async for chunk in _pcm_stream(response):
+                yield chunk
+
+
+class FakeSynthesizer:
+    """Offline tone, see fake_providers"""
+
+    def __init__(self, name: str = "fake", ttfb_ms=None, failure_rate: float = 0.0):
+        from app.services.fake_providers import FAKE_SEED, FAKE_TTS_TTFB_MS, parse_latency
+
+        self.name = name
+        self._ttfb = parse_latency(ttfb_ms if ttfb_ms is not None else FAKE_TTS_TTFB_MS)
+        self._failure_rate = failure_rate
+        self._rng = random.Random(FAKE_SEED)
+
+    async def synthesize(self, text: str, sample_rate: int, language: str = "en") -> AsyncIterator[bytes]:
+        from app.services.fake_providers import render_tone
+
+        await asyncio.sleep(self._ttfb.sample())
+        if self._failure_rate and self._rng.random() < self._failure_rate:
+            raise RuntimeError(f"{self.name} failed (simulated)")
+        audio = render_tone(text, sample_rate)
+        for i in range(0, len(audio), 3200):
+            yield audio[i:i + 3200]
+
+
+# ---- Hedged service ----
+class _Attempt:
+    """One provider's request for one utterance; audio is queued until it wins or loses"""
+
+    def __init__(self, synthesizer, progress: asyncio.Event):
+        self.synthesizer = synthesizer
+        self.health = provider_health(synthesizer.name)
+        self.queue = asyncio.Queue()
+        self.started_at = time.monotonic()
+        self.ttfb = None
+        self.error = None
+        self.finished = False
+        self.task = None
+        self._progress = progress
+
+    async def run(self, text: str, sample_rate: int, language: str):
+        try:
+            async for chunk in self.synthesizer.synthesize(text, sample_rate, language):
+                if self.ttfb is None:
+                    self.ttfb = time.monotonic() - self.started_at
+                    self.health.record_success(self.ttfb)
+                    self._progress.set()
+                self.queue.put_nowait(chunk)
+            if self.ttfb is None:
+                raise RuntimeError("no audio returned")
+        except Exception as e:
+            self.error = e
+            self.health.record_failure()
+            logger.warning(f"TTS provider {self.synthesizer.name} failed: {e}")
+        finally:
+            self.finished = True
+            self.queue.put_nowait(_END)
+            self._progress.set()
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while (chunk := await self.queue.get()) is not _END:
+            yield chunk
+
+
+class HedgedTTSService(TTSService):
+    def __init__(self, synthesizers: list, language: str = "en", **kwargs):
+        super().__init__(**kwargs)
+        self._synthesizers = synthesizers
+        # The patient's language as an ISO 639-1 code, every provider gets the same one
+        self._language = language
+        # Also the latency target of the health scores, a provider that gets hedged scores below 1
+        self._hedge_after = TTS_HEDGE_AFTER_MS / 1000
+
+    def can_generate_metrics(self) -> bool:
+        return True
+
+    def _ranked(self) -> list:
+        # sorted() is stable, equal scores keep the configured order
+        return sorted(self._synthesizers, key=lambda s: -provider_health(s.name).score)
+
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        logger.debug(f"{self}: Generating hedged TTS [{text}]")
+        hedge_stats["utterances"] += 1
+        attempts = []
+        try:
+            await self.start_ttfb_metrics()
+            winner = await self._first_audio(text, attempts)
+            if not winner:
+                hedge_stats["failed"] += 1
+                await self.stop_ttfb_metrics()
+                await self.push_error(ErrorFrame(f"No TTS provider produced audio for: {text[:60]}"))
+                return
+
+            await self.start_tts_usage_metrics(text)
+            yield TTSStartedFrame()
+            async for chunk in winner.chunks():
+                await self.stop_ttfb_metrics()
+                yield TTSAudioRawFrame(chunk, self.sample_rate, 1)
+            if winner.error:
+                logger.error(f"{self}: {winner.synthesizer.name} stopped mid-utterance: {winner.error}")
+            yield TTSStoppedFrame()
+        finally:
+            # Also runs when an interruption cancels the utterance
+            for attempt in attempts:
+                if not attempt.task.done():
+                    attempt.task.cancel()
+
+    async def _first_audio(self, text: str, attempts: list) -> Optional[_Attempt]:
+        """Start providers until one sends audio; attempts collects every request made"""
+        candidates = self._ranked()
+        progress = asyncio.Event()
+        deadline = time.monotonic() + TTS_FIRST_AUDIO_TIMEOUT_SECS
+
+        def launch(force: bool = False) -> bool:
+            while candidates:
+                synthesizer = candidates.pop(0)
+                if not force and not provider_health(synthesizer.name).breaker.allow():
+                    continue
+                attempt = _Attempt(synthesizer, progress)
+                attempt.task = self.create_task(attempt.run(text, self.sample_rate, self._language))
+                attempts.append(attempt)
+                return True
+            return False
+
+        if not launch():
+            # Every breaker is open, trying the best one beats saying nothing
+            candidates = self._ranked()
+            launch(force=True)
+        hedge_at = time.monotonic() + self._hedge_after
+
+        while True:
+            winner = next((a for a in attempts if a.ttfb is not None), None)
+            if winner:
+                break
+            now = time.monotonic()
+            running = [a for a in attempts if not a.finished]
+            if not running or now >= hedge_at:
+                if launch():
+                    hedge_stats["hedged" if running else "failovers"] += 1
+                    logger.info(
+                        f"{self}: {'hedging' if running else 'failing over'} to {attempts[-1].synthesizer.name} "
+                        f"after {(now - attempts[0].started_at) * 1000:.0f}ms"
+                    )
+                    hedge_at = now + self._hedge_after
+                    continue
+                if not running:
+                    return None
+                hedge_at = deadline
+            if now >= deadline:
+                for attempt in running:
+                    attempt.task.cancel()
+                    attempt.health.record_failure()
+                logger.error(f"{self}: no TTS audio after {TTS_FIRST_AUDIO_TIMEOUT_SECS}s")
+                return None
+
+            progress.clear()
+            try:
+                await asyncio.wait_for(progress.wait(), timeout=min(hedge_at, deadline) - now)
+            except asyncio.TimeoutError:
+                pass
+
+        now = time.monotonic()
+        for attempt in attempts:
+            if attempt is not winner and not attempt.finished:
+                attempt.task.cancel()
+                attempt.health.record_slow(now - attempt.started_at)
+        hedge_stats["wins"][winner.synthesizer.name] = hedge_stats["wins"].get(winner.synthesizer.name, 0) + 1
+        if len(attempts) > 1:
+            logger.info(f"{self}: {winner.synthesizer.name} won after {winner.ttfb * 1000:.0f}ms")
+        return winner
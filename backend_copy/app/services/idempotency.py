@@ -0,0 +1,60 @@
+"""
+Idempotent call initiation.
+
+POST /api/calls/initiate takes an Idempotency-Key header (or idempotency_key
+in the body). Without one the key is derived from the patient, the campaign
+and a window of INITIATE_DEDUP_WINDOW_SECS, so a retried or double-clicked
+request doesn't dial the patient twice.
+
+The key is stored on the call row under a unique index, which stops
+duplicates across workers. Within a worker, concurrent requests with the
+same key wait for the one dial already in flight (single_flight). A failed
+dial releases its key so the request can be retried. A derived key is also
+released once its call has ended, so a deliberate redial after a completed,
+voicemail or no-answer call isn't refused for the rest of the window; a key
+the client sent is kept.
+"""
+import os
+import time
+import asyncio
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INITIATE_DEDUP_WINDOW_SECS = int(os.getenv("INITIATE_DEDUP_WINDOW_SECS", "300"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 100
+DERIVED_KEY_PREFIX = "auto:"
+
+_in_flight = {}
+
+
+def derived_keys(patient_id: int, campaign: str = None, now: float = None) -> list:
+    """The current window's key, then the previous one's, so a retry just past a window boundary still matches"""
+    window = int((now or time.time()) // INITIATE_DEDUP_WINDOW_SECS)
+    return [f"{DERIVED_KEY_PREFIX}{patient_id}:{campaign or ''}:{w}" for w in (window, window - 1)]
+
+
+def key_after_call(key: Optional[str]) -> Optional[str]:
+    """The key a finished call keeps: None for a derived key, the client's own key as is"""
+    return None if key and key.startswith(DERIVED_KEY_PREFIX) else key
+
+
+async def single_flight(key: str, start) -> tuple:
+    """(result, shared): start() runs once per key at a time, concurrent callers share its outcome.
+
+    The work runs in its own task, so a caller that disconnects doesn't
+    cancel a dial the others are waiting for.
+    """
+    task = _in_flight.get(key)
+    shared = task is not None
+    if not shared:
+        task = asyncio.create_task(start())
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return await asyncio.shield(task), shared
+
+
+def in_flight_count() -> int:
+    return len(_in_flight)
@@ -0,0 +1,156 @@
+"""
+Live transcripts of in-progress calls for supervisors.
+
+LiveTranscriptProcessor sits at the end of the pipeline and hands every
+finalized user/assistant turn to the broadcaster as it lands in the
+context. Viewers (GET /api/calls/calls/{call_id}/live, server-sent events)
+each get a bounded queue of LIVE_TRANSCRIPT_QUEUE_SIZE turns; when a viewer
+can't keep up its turns are dropped and it is told how many it missed, so
+watching a call never slows the patient's audio. A viewer that joins late
+first gets the turns so far.
+
+Only calls running on the worker that serves the request can be watched.
+"""
+import os
+import asyncio
+from datetime import datetime
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from pipecat.frames.frames import Frame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from app.services.events import EVENT_HEARTBEAT_SECS, format_sse
+
+load_dotenv()
+
+LIVE_TRANSCRIPT_QUEUE_SIZE = int(os.getenv("LIVE_TRANSCRIPT_QUEUE_SIZE", "50"))
+
+END = None
+
+
+class Viewer:
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=LIVE_TRANSCRIPT_QUEUE_SIZE)
+        self.dropped = 0
+
+    def offer(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+
+class TranscriptBroadcaster:
+    def __init__(self):
+        self._calls = {}
+
+    def open_call(self, call_id: int):
+        self._calls[call_id] = {"turns": [], "viewers": set()}
+
+    def close_call(self, call_id: int):
+        call = self._calls.pop(call_id, None)
+        if call:
+            for viewer in call["viewers"]:
+                # Must arrive even when the queue is full, or the stream would never end
+                if viewer.queue.full():
+                    viewer.queue.get_nowait()
+                    viewer.dropped += 1
+                viewer.queue.put_nowait(END)
+
+    def is_live(self, call_id: int) -> bool:
+        return call_id in self._calls
+
+    def publish(self, call_id: int, message: dict):
+        call = self._calls.get(call_id)
+        if not call:
+            return
+        turn = {
+            "index": len(call["turns"]),
+            "role": message.get("role"),
+            "content": message.get("content"),
+            "at": datetime.utcnow().isoformat(),
+        }
+        call["turns"].append(turn)
+        for viewer in call["viewers"]:
+            viewer.offer(turn)
+
+    def watch(self, call_id: int) -> tuple:
+        """(viewer, turns so far); the viewer must be passed to unwatch"""
+        call = self._calls[call_id]
+        viewer = Viewer()
+        call["viewers"].add(viewer)
+        return viewer, list(call["turns"])
+
+    def unwatch(self, call_id: int, viewer: Viewer):
+        call = self._calls.get(call_id)
+        if call:
+            call["viewers"].discard(viewer)
+
+    def stats(self) -> dict:
+        return {
+            "live_calls": len(self._calls),
+            "viewers": sum(len(call["viewers"]) for call in self._calls.values()),
+        }
+
+    async def stream(self, call_id: int, viewer: Viewer, turns: list):
+        """SSE body for a viewer from watch(), ends with an "end" event when the call does
+
+        watch() runs before the response starts: the body only runs on its
+        first read, by when the call may have ended.
+        """
+        reported_drops = 0
+        try:
+            for turn in turns:
+                yield format_sse({"id": turn["index"], "type": "turn", "data": turn})
+
+            while True:
+                try:
+                    turn = await asyncio.wait_for(viewer.queue.get(), timeout=EVENT_HEARTBEAT_SECS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+
+                if viewer.dropped > reported_drops:
+                    yield format_sse({"id": None, "type": "dropped", "data": {"turns": viewer.dropped - reported_drops}})
+                    reported_drops = viewer.dropped
+                if turn is END:
+                    yield format_sse({"id": None, "type": "end", "data": {"call_id": call_id}})
+                    return
+                yield format_sse({"id": turn["index"], "type": "turn", "data": turn})
+        finally:
+            self.unwatch(call_id, viewer)
+            if viewer.dropped:
+                logger.warning(f"Live transcript viewer of call {call_id} missed {viewer.dropped} turn(s)")
+
+
+live_transcripts = TranscriptBroadcaster()
+
+
+class LiveTranscriptProcessor(FrameProcessor):
+    """Last in the pipeline, after the assistant aggregator, so both sides' turns are final"""
+
+    def __init__(self, call_id: int, context, broadcaster: TranscriptBroadcaster = live_transcripts, **kwargs):
+        super().__init__(**kwargs)
+        self._call_id = call_id
+        self._context = context
+        self._broadcaster = broadcaster
+        # Skip the system prompt
+        self._published = 1
+        broadcaster.open_call(call_id)
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        messages = self._context.messages
+        while self._published < len(messages):
+            message = messages[self._published]
+            self._published += 1
+            if message.get("role") in ("user", "assistant"):
+                self._broadcaster.publish(self._call_id, message)
+
+        await self.push_frame(frame, direction)
+
+    def close(self):
+        self._broadcaster.close_call(self._call_id)
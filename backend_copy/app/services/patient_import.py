@@ -0,0 +1,287 @@
+"""
+Streaming bulk patient import (CSV or NDJSON).
+
+Rows are parsed as the request body arrives, validated in chunks and written
+with one multi-row upsert per chunk that relies on the unique phone index.
+"""
+import os
+import csv
+import json
+import codecs
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+from pydantic import ValidationError
+from sqlalchemy import select, String
+
+from app.models import Patient
+from app.services.cache import cache, patient_key
+from app.services.questionnaire import parse_questionnaire
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "1000"))
+
+# Columns an import may overwrite on an existing patient (never id/created_at)
+UPDATABLE_COLUMNS = ["name", "age", "language", "custom_questions", "patient_type"]
+
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+def detect_import_format(content_type: Optional[str], explicit: Optional[str] = None) -> Optional[str]:
+    if explicit:
+        return explicit.lower() if explicit.lower() in ("csv", "ndjson") else None
+    if not content_type:
+        return None
+    return CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+# ---- Incremental parsing ----
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without buffering the whole body"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple]:
+    """Yield (row_number, record, error) with the header row mapped to keys"""
+    header = None
+    pending = []
+    row_number = 0
+
+    async for line in lines:
+        pending.append(line)
+        text = "\n".join(pending)
+        # A quoted field may contain newlines, keep reading until quotes balance
+        if text.count('"') % 2:
+            continue
+        pending = []
+
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            continue
+
+        row_number += 1
+        if len(values) > len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+
+        record = {}
+        for key, value in zip(header, values):
+            value = value.strip()
+            # Empty cells mean "not provided", so optional fields fall back to defaults
+            if key and value != "":
+                record[key] = value
+        yield row_number, record, None
+
+    if pending:
+        yield row_number + 1, None, "Unterminated quoted field"
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple]:
+    row_number = 0
+
+    async for line in lines:
+        if not line.strip():
+            continue
+
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, None, f"Invalid JSON: {e.msg}"
+            continue
+
+        if not isinstance(record, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+
+        yield row_number, record, None
+
+
+# ---- Validation ----
+def _column_length_errors(values: dict) -> list:
+    """PatientCreate doesn't know the VARCHAR limits, MySQL would reject the whole chunk"""
+    errors = []
+    for key, value in values.items():
+        column = Patient.__table__.c.get(key)
+        if column is None or not isinstance(column.type, String) or not column.type.length:
+            continue
+        if isinstance(value, str) and len(value) > column.type.length:
+            errors.append(f"{key}: longer than {column.type.length} characters")
+    return errors
+
+
+def validate_record(schema, record: dict) -> tuple:
+    """Return (values, errors) using the same schema as create_patient"""
+    try:
+        patient = schema.model_validate(record)
+    except ValidationError as e:
+        return None, [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+
+    values = patient.model_dump(exclude_unset=True)
+    errors = _column_length_errors(values)
+    # Same check as create_patient/update_patient, a bad questionnaire would be ignored at call time
+    try:
+        parse_questionnaire(values.get("custom_questions"))
+    except ValueError as e:
+        errors.append(str(e))
+    return (None, errors) if errors else (values, [])
+
+
+# ---- Upsert ----
+def build_upsert(dialect_name: str, rows: list):
+    """Multi-row INSERT that updates the provided columns when the phone already exists"""
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(Patient).values(rows)
+        update_columns = {c: stmt.inserted[c] for c in UPDATABLE_COLUMNS if c in rows[0]}
+        return stmt.on_duplicate_key_update(**update_columns)
+
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    stmt = insert(Patient).values(rows)
+    update_columns = {c: stmt.excluded[c] for c in UPDATABLE_COLUMNS if c in rows[0]}
+    return stmt.on_conflict_do_update(index_elements=[Patient.phone], set_=update_columns)
+
+
+class ImportReport:
+    def __init__(self, dry_run: bool):
+        self.dry_run = dry_run
+        self.total_rows = 0
+        self.valid_rows = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.chunks = 0
+        self.errors = []
+        self.errors_truncated = False
+
+    def add_error(self, row_number: int, messages: list, phone: Optional[str] = None):
+        self.failed += 1
+        if len(self.errors) >= MAX_REPORTED_ERRORS:
+            self.errors_truncated = True
+            return
+        self.errors.append({"row": row_number, "phone": phone, "errors": messages})
+
+    def to_dict(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "total_rows": self.total_rows,
+            "valid_rows": self.valid_rows,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "errors": self.errors,
+            "errors_truncated": self.errors_truncated,
+        }
+
+
+async def _flush_chunk(db, chunk: list, report: ImportReport):
+    """Upsert one chunk of (row_number, values) and commit it"""
+    # Same phone twice in a chunk can't go in one statement, the last row wins
+    latest = {}
+    for row_number, values in chunk:
+        previous = latest.get(values["phone"])
+        if previous:
+            report.add_error(previous[0], [f"Duplicate phone in upload, replaced by row {row_number}"], values["phone"])
+            report.valid_rows -= 1
+        latest[values["phone"]] = (row_number, values)
+
+    existing = dict((await db.execute(
+        select(Patient.phone, Patient.id).where(Patient.phone.in_(list(latest)))
+    )).all())
+
+    report.chunks += 1
+    if report.dry_run:
+        report.updated += len(existing)
+        report.created += len(latest) - len(existing)
+        return
+
+    # Rows in one multi-row statement need identical keys, group by key set
+    now = datetime.utcnow()
+    groups = {}
+    for row_number, values in latest.values():
+        groups.setdefault(tuple(sorted(values)), []).append({**values, "created_at": now})
+
+    try:
+        for rows in groups.values():
+            await db.execute(build_upsert(db.bind.dialect.name, rows))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Patient import chunk failed: {e}")
+        for row_number, values in latest.values():
+            report.add_error(row_number, [f"Database error: {e.__class__.__name__}"], values["phone"])
+        report.valid_rows -= len(latest)
+        return
+
+    report.updated += len(existing)
+    report.created += len(latest) - len(existing)
+    await cache.invalidate(*[patient_key(patient_id) for patient_id in existing.values()])
+
+
+async def import_patients(
+    db,
+    body: AsyncIterator[bytes],
+    fmt: str,
+    schema,
+    dry_run: bool = False,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> dict:
+    """Stream, validate and upsert patients, returning a per-row error report"""
+    report = ImportReport(dry_run)
+    lines = iter_lines(body)
+    records = iter_csv_records(lines) if fmt == "csv" else iter_ndjson_records(lines)
+
+    chunk = []
+    async for row_number, record, parse_error in records:
+        report.total_rows += 1
+
+        if parse_error:
+            report.add_error(row_number, [parse_error])
+            continue
+
+        values, errors = validate_record(schema, record)
+        if errors:
+            report.add_error(row_number, errors, record.get("phone"))
+            continue
+
+        report.valid_rows += 1
+        chunk.append((row_number, values))
+        if len(chunk) >= chunk_size:
+            await _flush_chunk(db, chunk, report)
+            chunk = []
+
+    if chunk:
+        await _flush_chunk(db, chunk, report)
+
+    logger.info(
+        f"Patient import ({fmt}, dry_run={dry_run}): {report.total_rows} rows, "
+        f"{report.created} created, {report.updated} updated, {report.failed} failed"
+    )
+    return report.to_dict()
@@ -1,11 +1,12 @@
 import os
 import json
+import asyncio
 from loguru import logger
 from dotenv import load_dotenv
 from datetime import datetime
-from pipecat.services.cartesia import CartesiaTTSService
 
 from pipecat.audio.vad.silero import SileroVADAnalyzer
+from pipecat.frames.frames import ErrorFrame
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
@@ -13,10 +14,6 @@ from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
 from pipecat.runner.utils import parse_telephony_websocket
 from pipecat.serializers.plivo import PlivoFrameSerializer
 
-from pipecat.services.elevenlabs.tts import ElevenLabsTTSService
-from pipecat.services.deepgram.stt import DeepgramSTTService
-from pipecat.services.openai.llm import OpenAILLMService
-
 from pipecat.transports.websocket.fastapi import (
     FastAPIWebsocketParams,
     FastAPIWebsocketTransport,
@@ -28,14 +25,33 @@ from app.utils.cost_calculator import (
     calculate_tts_cost,
     calculate_telephony_cost
 )
+from app.services.cache import cache, call_key, transcript_key
+from app.services import providers
+from app.services.usage_tracker import SpokenTextTracker
+from app.services.call_screening import CallScreeningProcessor
+from app.services.budget import BudgetEnforcer, BUDGET_EXCEEDED_STATUS, call_limits
+from app.services.questionnaire import QuestionnaireProcessor, parse_questionnaire
+from app.services.prompt_audio import PromptAudioRecorder
+from app.services.call_extraction import SUMMARY_MODE, CallRecordExtractor, merge_summaries
+from app.services.call_journal import CallJournal, CallJournalProcessor
+from app.services.idempotency import key_after_call
+from app.services.drain import live_calls, track_job
+from app.services.events import publish_call_event
+from app.services.live_transcript import LiveTranscriptProcessor
+from app.services.speculative_llm import SPECULATIVE_LLM, SpeculativeLLM
+from app.services.adaptive_vad import ADAPTIVE_VAD, AdaptiveVADAnalyzer, initial_stop_secs
+from app.services.resilience import PipelineErrorTracker, ProviderUnavailable
 
 load_dotenv()
 
 
-def calculate_usage_from_transcript(messages: list) -> dict:
+def calculate_usage_from_transcript(messages: list, spoken_characters: int = None) -> dict:
     """
     Calculate token and character usage from conversation transcript.
     Uses simple approximation: 1 token ≈ 4 characters (good enough for cost estimation)
+
+    spoken_characters (from SpokenTextTracker) replaces the assistant text length
+    for TTS, so audio cut off by a barge-in isn't counted.
     """
 
     total_input_tokens = 0
@@ -57,6 +73,9 @@ def calculate_usage_from_transcript(messages: list) -> dict:
             total_output_tokens += token_estimate
             total_tts_characters += len(content)
 
+    if spoken_characters is not None:
+        total_tts_characters = spoken_characters
+
     return {
         'llm_input_tokens': total_input_tokens,
         'llm_output_tokens': total_output_tokens,
@@ -64,7 +83,17 @@ def calculate_usage_from_transcript(messages: list) -> dict:
     }
 
 
-async def run_patient_call(websocket, patient_name: str, questions: str, call_id: int, db_session):
+def call_usage(messages: list, spoken_characters: int = None, llm_input_tokens: int = 0, llm_output_tokens: int = 0) -> dict:
+    """Transcript estimate, with real token counts from the LLM's usage metrics when there are any"""
+    usage = calculate_usage_from_transcript(messages, spoken_characters)
+    if llm_input_tokens:
+        # Scripted turns cost no tokens
+        usage["llm_input_tokens"] = llm_input_tokens
+        usage["llm_output_tokens"] = llm_output_tokens
+    return usage
+
+
+async def run_patient_call(websocket, patient_name: str, questions: str, call_id: int, db_session, campaign: str = None, patient_age: int = None, patient_language: str = None):
     """Run the patient follow-up call using Pipecat"""
 
     # Parse the Plivo WebSocket connection
@@ -77,8 +106,16 @@ async def run_patient_call(websocket, patient_name: str, questions: str, call_id
         call_id=call_data["call_id"],
         auth_id=os.getenv("PLIVO_AUTH_ID", ""),
         auth_token=os.getenv("PLIVO_AUTH_TOKEN", ""),
+        # Load test calls don't exist on Plivo, so there is nothing to hang up
+        params=PlivoFrameSerializer.InputParams(auto_hang_up=providers.PROVIDER_MODE != "fake"),
     )
 
+    # End-of-turn silence learned from the caller's pauses, older callers start with more
+    if ADAPTIVE_VAD:
+        vad_analyzer = AdaptiveVADAnalyzer(call_id=call_id, stop_secs=initial_stop_secs(patient_age))
+    else:
+        vad_analyzer = SileroVADAnalyzer()
+
     # Create transport
     transport = FastAPIWebsocketTransport(
         websocket=websocket,
@@ -86,49 +123,94 @@ async def run_patient_call(websocket, patient_name: str, questions: str, call_id
             audio_in_enabled=True,
             audio_out_enabled=True,
             add_wav_header=False,
-            vad_analyzer=SileroVADAnalyzer(),
+            vad_analyzer=vad_analyzer,
             serializer=serializer,
         ),
     )
 
-    # Create AI services
-    llm = OpenAILLMService(api_key=os.getenv("OPENAI_API_KEY"), model="gpt-4o-mini")
-    stt = DeepgramSTTService(api_key=os.getenv("DEEPGRAM_API_KEY"))
-
-    # ElevenLabs TTS - faster and higher quality
-    # tts = ElevenLabsTTSService(
-    #     api_key=os.getenv("ELEVENLABS_API_KEY"),
-    #     voice_id=os.getenv("ELEVENLABS_VOICE_ID"),
-    #     model="eleven_turbo_v2_5",  # Fastest model
-    # )
-    tts = CartesiaTTSService(
-    api_key=os.getenv("CARTESIA_API_KEY"),
-    # voice_id="9cebb910-d4b7-4a4a-85a4-12c79137724c",
-    voice_id="bdab08ad-4137-4548-b9db-6142854c7525",
-)
+    # Create AI services (STT_PROVIDER / LLM_PROVIDER / TTS_PROVIDER)
+    llm = providers.create_llm()
+    stt = providers.create_stt()
+    tts = providers.create_tts(language=providers.tts_language(patient_language))
+
 
+    # Structured questionnaires run scripted turns, free text goes to the LLM as before
+    try:
+        questionnaire = parse_questionnaire(questions)
+    except ValueError as e:
+        logger.error(f"Ignoring questionnaire for call {call_id}: {e}")
+        questionnaire = None
+    if questionnaire:
+        task_prompt = f"Your task: follow up on these questions: {questionnaire.describe()}."
+    else:
+        task_prompt = f"Your task: {questions}. Start by greeting them warmly and asking the question."
 
     # Conversation context
     messages = [
         {
             "role": "system",
-            "content": f"You are a  hospital assistant of presco hospital calling {patient_name}. Your task: {questions}. Start by greeting them warmly and asking the question. Keep responses under 2 sentences."
+            "content": f"You are a  hospital assistant of presco hospital calling {patient_name}. {task_prompt} Keep responses under 2 sentences."
         },
 
     ]
 
     context = OpenAILLMContext(messages)
     context_aggregator = llm.create_context_aggregator(context)
+    spoken_tracker = SpokenTextTracker(call_id=call_id)
+    screening = CallScreeningProcessor(call_id=call_id)
+    budget = BudgetEnforcer(await call_limits(db_session, campaign, call_id=call_id), call_id=call_id)
+
+    scripted = []
+    recorders = []
+    if questionnaire:
+        recorder = PromptAudioRecorder()
+        scripted = [QuestionnaireProcessor(questionnaire, context, patient_name, recorder=recorder, call_id=call_id)]
+        recorders = [recorder]
+    extractor = CallRecordExtractor(call_id, context, questionnaire=scripted[0] if scripted else None)
+
+    try:
+        journal = CallJournal(call_id)
+    except OSError as e:
+        # A redialed call still being finalized by a previous worker, or an unwritable journal dir
+        logger.error(f"Call {call_id} runs without a journal: {e}")
+        journal = None
+
+    def checkpoint() -> dict:
+        """What recovery needs besides the messages to finalize the call"""
+        return {
+            "spoken_characters": spoken_tracker.spoken_characters,
+            "llm_input_tokens": budget.llm_input_tokens,
+            "llm_output_tokens": budget.llm_output_tokens,
+            "extracted": extractor.record(),
+        }
+
+    journaling = [CallJournalProcessor(journal, context, checkpoint)] if journal else []
+
+    # Scripted turns never reach the LLM, speculating for them would only waste tokens
+    speculative = SpeculativeLLM(llm, context, call_id=call_id) if SPECULATIVE_LLM and not questionnaire else None
+    speculation_observer = [speculative.observer()] if speculative else []
+    speculation_gate = [speculative.gate()] if speculative else []
+    live_transcript = LiveTranscriptProcessor(call_id, context)
 
     # Build pipeline
     pipeline = Pipeline([
         transport.input(),
         stt,
+        screening,  # Holds transcriptions until the callee is judged human
+        extractor,  # Answers and red flags per turn, saved as the call goes
+        *scripted,  # Answers interpretable turns itself, the rest go to the LLM
+        *speculation_observer,  # Starts LLM replies on stable interim transcripts
         context_aggregator.user(),
+        *speculation_gate,  # Uses the speculative reply when the final transcript matches
         llm,
+        budget,  # Wraps up and hangs up once a duration/token/spend limit is hit
         tts,
+        *recorders,  # Keeps scripted lines' audio for replay on later calls
         transport.output(),
+        spoken_tracker,  # Only sees text whose audio was actually played
         context_aggregator.assistant(),
+        *journaling,  # Appends each new message to the on-disk journal
+        live_transcript,  # Supervisors' live view, drops turns for slow viewers
     ])
 
     # Create task
@@ -142,40 +224,86 @@ async def run_patient_call(websocket, patient_name: str, questions: str, call_id
         ),
     )
 
+    # Service errors count towards the providers' circuit breakers, one outcome per call
+    provider_errors = PipelineErrorTracker({
+        stt: providers.STT_PROVIDER,
+        llm: providers.LLM_PROVIDER,
+        tts: providers.TTS_PROVIDER,
+    })
+    task.set_reached_upstream_filter((ErrorFrame,))
+
+    @task.event_handler("on_frame_reached_upstream")
+    async def on_frame_reached_upstream(task, frame):
+        provider_errors.record(frame)
+
     # Event handlers
     @transport.event_handler("on_client_connected")
     async def on_client_connected(transport, client):
         logger.info(f"Call connected for {patient_name} (call_id={call_id})")
         # Bot speaks automatically from pre-filled assistant message
 
-    @transport.event_handler("on_client_disconnected")
-    async def on_client_disconnected(transport, client):
-        logger.info(f"Call disconnected for {patient_name} (call_id={call_id})")
+    call_saved = False
+
+    async def finish_call():
+        """Post-call work, once, whether the caller hung up or the pipeline ended the call"""
+        nonlocal call_saved
+        if call_saved:
+            return
+        call_saved = True
 
         # Get conversation from context
         all_messages = context.get_messages()
 
         # Calculate usage from transcript (simplified, no blocking operations)
-        usage = calculate_usage_from_transcript(all_messages)
-
-        logger.info(f"Usage calculated: {usage}")
-
-        # Save transcript with costs
-        await save_transcript(call_id, all_messages, db_session, usage)
+        usage = call_usage(
+            all_messages, spoken_tracker.spoken_characters, budget.llm_input_tokens, budget.llm_output_tokens
+        )
+        if scripted:
+            logger.info(f"Questionnaire: {scripted[0].summary()}")
+        if speculative:
+            logger.info(f"Speculation: {speculative.summary()}")
+        if ADAPTIVE_VAD:
+            logger.info(f"Endpointing: {vad_analyzer.summary()}")
+
+        logger.info(f"Usage calculated: {usage}, speech: {spoken_tracker.summary()}")
+        provider_errors.finish()
+
+        # Save transcript with costs (voicemail / no_answer when screened out,
+        # budget_exceeded flags the call for review)
+        status = BUDGET_EXCEEDED_STATUS if budget.exceeded else screening.call_status
+        await extractor.cancel_flush()
+        try:
+            await save_transcript(call_id, all_messages, db_session, usage, status=status, extracted=extractor.record())
+        except Exception:
+            # The journal stays on disk, the next startup finalizes the call from it
+            if journal:
+                journal.close()
+            raise
+        if journal:
+            journal.close(remove=True)
 
+    @transport.event_handler("on_client_disconnected")
+    async def on_client_disconnected(transport, client):
+        logger.info(f"Call disconnected for {patient_name} (call_id={call_id})")
+        await finish_call()
         await task.cancel()
 
-    # Run pipeline
-    runner = PipelineRunner(handle_sigint=False)
-    await runner.run(task)
+    # Run pipeline, registered so a drain can wait for it or wrap it up
+    live_calls.register(call_id, task, patient_name)
+    try:
+        runner = PipelineRunner(handle_sigint=False)
+        await runner.run(task)
+
+        # Screening hangs up from inside the pipeline, the disconnect handler never runs then
+        await finish_call()
+    finally:
+        live_calls.unregister(call_id)
+        live_transcript.close()
 
     logger.info(f"Pipeline finished for call_id={call_id}")
 
 async def generate_call_summary(messages: list) -> dict:
     """Generate AI summary of the call conversation"""
-    from openai import AsyncOpenAI
-    import os
-
     # Extract conversation (skip system prompt)
     conversation = [msg for msg in messages if msg["role"] != "system"]
 
@@ -201,23 +329,19 @@ Provide a JSON response with:
 Be concise and focus on medically relevant information."""
 
     try:
-        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a medical assistant analyzing patient call transcripts. Always respond with valid JSON."},
-                {"role": "user", "content": summary_prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.3
-        )
-
-        summary_text = response.choices[0].message.content
+        summary_text = await providers.complete_summary([
+            {"role": "system", "content": "You are a medical assistant analyzing patient call transcripts. Always respond with valid JSON."},
+            {"role": "user", "content": summary_prompt}
+        ])
         logger.info(f"Generated call summary: {summary_text}")
         return summary_text
 
     except Exception as e:
-        logger.error(f"Error generating summary: {e}")
+        if isinstance(e, ProviderUnavailable):
+            # Fast-fail while the provider is down, the extracted summary stays
+            logger.warning(f"Skipping LLM summary: {e}")
+        else:
+            logger.error(f"Error generating summary: {e}")
         return json.dumps({
             "sentiment": "unknown",
             "key_points": ["Error generating summary"],
@@ -229,22 +353,67 @@ Be concise and focus on medically relevant information."""
 
 
 
-async def save_transcript(call_id: int, messages: list, db_session, usage: dict):
-    """Save transcript and calculate costs"""
+def schedule_summary_enrichment(call_id: int, messages: list, extracted: dict):
+    # Tracked so a drain waits for it before the worker exits
+    track_job(asyncio.create_task(enrich_call_summary(call_id, messages, extracted)))
+
+
+async def enrich_call_summary(call_id: int, messages: list, extracted: dict):
+    """Replace the extracted summary with the LLM summary, keeping answers and red flags"""
+    from app.database import AsyncSessionLocal
+    from app.models import Transcript
+    from sqlalchemy import update
+
+    summary = merge_summaries(extracted, await generate_call_summary(messages))
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Transcript).where(Transcript.call_id == call_id).values(summary=summary)
+            )
+            await db.commit()
+        await cache.invalidate(transcript_key(call_id))
+        logger.info(f"Enriched summary for call {call_id}")
+    except Exception as e:
+        logger.error(f"Error enriching summary for call {call_id}: {e}")
+
+
+async def save_transcript(call_id: int, messages: list, db_session, usage: dict, status: str = "completed", extracted: dict = None, ended_at: datetime = None):
+    """Save transcript and calculate costs
+
+    With an extracted record (CallRecordExtractor) the LLM summary follows
+    SUMMARY_MODE instead of always running before the save. ended_at defaults
+    to now; calls recovered from their journal pass the last journaled time.
+    """
     from app.models import Transcript, Call
     from sqlalchemy import select
 
     # Extract conversation (skip system prompt)
     conversation_messages = [msg for msg in messages if msg["role"] != "system"]
 
+    ended_at = ended_at or datetime.utcnow()
     full_transcript = {
         "conversation": conversation_messages,
-        "call_ended_at": datetime.utcnow().isoformat()
+        "call_ended_at": ended_at.isoformat()
     }
 
-    # Generate AI summary
-    logger.info(f"Generating summary for call {call_id}")
-    summary = await generate_call_summary(messages)
+    # Generate AI summary, screened-out calls never reached the caller
+    has_conversation = any(msg["role"] == "user" for msg in conversation_messages)
+    if not has_conversation:
+        summary = json.dumps({
+            "sentiment": "unknown",
+            "key_points": [f"Call ended early: {status}"],
+            "health_concerns": [],
+            "follow_up_needed": True,
+            "follow_up_reason": "Patient was not reached, call again"
+        })
+    elif extracted is None or SUMMARY_MODE == "llm":
+        logger.info(f"Generating summary for call {call_id}")
+        summary = await generate_call_summary(messages)
+        if extracted is not None:
+            summary = merge_summaries(extracted, summary)
+    else:
+        # Ready now; "deferred" swaps in the LLM summary once it is done
+        summary = json.dumps(extracted)
 
     try:
         # Check if transcript exists
@@ -266,8 +435,10 @@ async def save_transcript(call_id: int, messages: list, db_session, usage: dict)
         telephony_cost = 0.0
 
         if call:
-            call.ended_at = datetime.utcnow()
-            call.status = "completed"
+            call.ended_at = ended_at
+            call.status = status
+            # Over, a deliberate redial of the patient is no longer a duplicate
+            call.idempotency_key = key_after_call(call.idempotency_key)
 
             # Calculate duration
             if call.started_at:
@@ -310,7 +481,16 @@ async def save_transcript(call_id: int, messages: list, db_session, usage: dict)
             db_session.add(transcript)
 
         await db_session.commit()
+        await cache.invalidate(call_key(call_id), transcript_key(call_id))
         logger.info(f"Saved transcript with summary for call {call_id}")
+        if call:
+            publish_call_event("call.ended", {
+                "id": call.id, "patient_id": call.patient_id, "status": call.status,
+                "campaign": call.campaign, "duration": call.duration, "cost": call.cost,
+            })
+
+        if has_conversation and extracted is not None and SUMMARY_MODE == "deferred":
+            schedule_summary_enrichment(call_id, messages, extracted)
 
     except Exception as e:
         logger.error(f"Error saving transcript: {e}")
@@ -1,6 +1,7 @@
 import os
 import plivo
 from dotenv import load_dotenv
+from loguru import logger
 from typing import Optional
 
 load_dotenv()
@@ -16,7 +17,9 @@ class PlivoService:
 
         # Initialize Plivo client
         if self.auth_id and self.auth_token:
-            self.client = plivo.RestClient(self.auth_id, self.auth_token)
+            # Bounded like the guard's timeout, so abandoned worker threads don't linger
+            from app.services.resilience import provider_guard
+            self.client = plivo.RestClient(self.auth_id, self.auth_token, timeout=provider_guard("plivo").timeout_secs)
         else:
             self.client = None
 
@@ -48,14 +51,14 @@ class PlivoService:
 
             # Access response correctly - it's an object with direct attributes
             call_uuid = response.request_uuid
-            print(f"✅ Call initiated: {call_uuid}")
+            logger.info(f"Call initiated: {call_uuid}")
             return call_uuid
 
         except plivo.exceptions.PlivoRestError as e:
-            print(f"❌ Plivo error: {e}")
+            logger.error(f"Plivo error: {e}")
             return None
         except Exception as e:
-            print(f"❌ Unexpected error making call: {e}")
+            logger.exception(f"Unexpected error making call: {e}")
             return None
 
     @staticmethod
@@ -0,0 +1,164 @@
+"""
+Pre-rendered audio for fixed bot lines (questionnaire prompts).
+
+The first time a scripted line is spoken it goes through TTS as usual and
+PromptAudioRecorder, placed right after the TTS service, keeps the audio.
+Later calls replay it straight to the transport with no TTS round trip or
+per-character cost. Set PROMPT_AUDIO_DIR to keep renders across restarts.
+Renders are keyed by provider and voice, so changing either renders afresh.
+"""
+import os
+import re
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from pipecat.frames.frames import (
+    Frame,
+    InterruptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    TTSTextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+load_dotenv()
+
+PROMPT_AUDIO_DIR = os.getenv("PROMPT_AUDIO_DIR")
+PROMPT_AUDIO_CACHE_SIZE = int(os.getenv("PROMPT_AUDIO_CACHE_SIZE", "256"))
+
+
+def _normalize(text: str) -> str:
+    # Word-timestamp TTS services re-emit text word by word, compare letters only
+    return re.sub(r"\W+", "", text.lower())
+
+
+class PromptAudioCache:
+    """LRU of rendered prompts keyed by TTS provider, voice and text"""
+
+    def __init__(self, max_entries: int = PROMPT_AUDIO_CACHE_SIZE, directory: Optional[str] = PROMPT_AUDIO_DIR):
+        self._max_entries = max_entries
+        self._directory = directory
+        self._entries = OrderedDict()
+        # key -> file name, read once here so a miss mid-call never lists the directory
+        self._files = self._index()
+        self.hits = 0
+        self.misses = 0
+
+    def _index(self) -> dict:
+        if not self._directory or not os.path.isdir(self._directory):
+            return {}
+        return {name.split(".", 1)[0]: name for name in os.listdir(self._directory) if name.endswith(".pcm")}
+
+    def _key(self, text: str) -> str:
+        from app.services import providers
+
+        return hashlib.sha1(f"{providers.TTS_PROVIDER}|{providers.tts_voice()}|{text}".encode()).hexdigest()
+
+    def _read(self, name: str) -> bytes:
+        with open(os.path.join(self._directory, name), "rb") as f:
+            return f.read()
+
+    def _write(self, name: str, audio: bytes):
+        os.makedirs(self._directory, exist_ok=True)
+        with open(os.path.join(self._directory, name), "wb") as f:
+            f.write(audio)
+
+    async def get(self, text: str) -> Optional[tuple]:
+        """(pcm bytes, sample rate) or None"""
+        key = self._key(text)
+        entry = self._entries.get(key)
+        name = self._files.get(key)
+        if entry is None and name:
+            try:
+                entry = (await asyncio.to_thread(self._read, name), int(name.rsplit(".", 2)[1]))
+                self._store(key, entry)
+            except OSError as e:
+                logger.warning(f"Prompt audio {name} unreadable, rendering again: {e}")
+                self._files.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    async def put(self, text: str, audio: bytes, sample_rate: int):
+        key = self._key(text)
+        self._store(key, (audio, sample_rate))
+        if self._directory:
+            name = f"{key}.{sample_rate}.pcm"
+            await asyncio.to_thread(self._write, name, audio)
+            self._files[key] = name
+
+    def _store(self, key: str, entry: tuple):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+prompt_audio = PromptAudioCache()
+
+
+class PromptAudioRecorder(FrameProcessor):
+    """Captures TTS output for lines registered with expect()"""
+
+    def __init__(self, cache: PromptAudioCache = prompt_audio, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = cache
+        self._expected = {}
+        self._reset()
+
+    def expect(self, text: str):
+        self._expected[_normalize(text)] = text
+
+    def _reset(self):
+        self._recording = False
+        self._stopped = False
+        self._matched = None
+        self._audio = bytearray()
+        self._sample_rate = None
+        self._text = ""
+
+    async def _finish(self):
+        if self._audio:
+            await self._cache.put(self._matched, bytes(self._audio), self._sample_rate)
+            logger.debug(f"Cached prompt audio ({len(self._audio)} bytes): {self._matched[:40]}")
+        self._reset()
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        # Text arrives after the audio for plain TTS and word by word alongside it
+        # for timestamped TTS, so a render is complete once both the full text
+        # and TTSStoppedFrame have been seen
+        if self._expected or self._matched:
+            if isinstance(frame, TTSStartedFrame):
+                self._reset()
+                self._recording = True
+            elif isinstance(frame, TTSAudioRawFrame) and self._recording:
+                self._audio.extend(frame.audio)
+                self._sample_rate = frame.sample_rate
+            elif isinstance(frame, TTSStoppedFrame) and self._recording:
+                self._stopped = True
+                if self._matched:
+                    await self._finish()
+            elif isinstance(frame, TTSTextFrame) and self._recording:
+                self._text += frame.text
+                self._matched = self._expected.pop(_normalize(self._text), None) or self._matched
+                if self._matched and self._stopped:
+                    await self._finish()
+            elif isinstance(frame, InterruptionFrame):
+                # Partial renders must never be replayed
+                self._reset()
+
+        await self.push_frame(frame, direction)
@@ -0,0 +1,269 @@
+"""
+Provider registry for the call pipeline.
+
+Each pipeline role (STT, LLM, TTS, post-call summary) is picked by config:
+
+    STT_PROVIDER=deepgram|openai|fake
+    LLM_PROVIDER=openai|fake
+    TTS_PROVIDER=cartesia|elevenlabs|openai|hedged|fake
+    SUMMARY_PROVIDER=openai|fake
+
+"hedged" races the providers listed in TTS_HEDGE_PROVIDERS (cartesia,
+elevenlabs, fake), see hedged_tts.py.
+
+PROVIDER_MODE=fake switches the defaults of every role to the offline fakes.
+The "openai" providers honour OPENAI_BASE_URL, so they can also be pointed at
+benchmarks/fake_openai_server.py to exercise the real HTTP client code.
+"""
+import os
+import asyncio
+import importlib
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "live" uses the real providers, "fake" swaps in offline stand-ins for load tests
+PROVIDER_MODE = os.getenv("PROVIDER_MODE", "live").lower()
+
+
+def _provider_setting(name: str, live_default: str) -> str:
+    default = "fake" if PROVIDER_MODE == "fake" else live_default
+    return os.getenv(name, default).lower()
+
+
+STT_PROVIDER = _provider_setting("STT_PROVIDER", "deepgram")
+LLM_PROVIDER = _provider_setting("LLM_PROVIDER", "openai")
+TTS_PROVIDER = _provider_setting("TTS_PROVIDER", "cartesia")
+SUMMARY_PROVIDER = _provider_setting("SUMMARY_PROVIDER", "openai")
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4o-mini")
+CARTESIA_VOICE_ID = os.getenv("CARTESIA_VOICE_ID", "bdab08ad-4137-4548-b9db-6142854c7525")
+ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
+OPENAI_TTS_VOICE = os.getenv("OPENAI_TTS_VOICE", "alloy")
+# Patient.language -> the ISO 639-1 code the TTS providers take, English otherwise
+TTS_LANGUAGES = {"english": "en", "hindi": "hi"}
+# In the order they are tried while all are healthy
+TTS_HEDGE_PROVIDERS = [
+    name.strip().lower()
+    for name in os.getenv("TTS_HEDGE_PROVIDERS", "cartesia,elevenlabs").split(",")
+    if name.strip()
+]
+
+
+# ---- STT ----
+def _deepgram_stt():
+    from pipecat.services.deepgram.stt import DeepgramSTTService
+    return DeepgramSTTService(api_key=os.getenv("DEEPGRAM_API_KEY"))
+
+
+def _openai_stt():
+    from pipecat.services.openai.stt import OpenAISTTService
+    return OpenAISTTService(api_key=os.getenv("OPENAI_API_KEY"), base_url=OPENAI_BASE_URL)
+
+
+def _fake_stt():
+    from app.services.fake_providers import FakeSTTService
+    return FakeSTTService()
+
+
+# ---- LLM ----
+def _openai_llm():
+    from pipecat.services.openai.llm import OpenAILLMService
+    return OpenAILLMService(api_key=os.getenv("OPENAI_API_KEY"), model=LLM_MODEL, base_url=OPENAI_BASE_URL)
+
+
+def _fake_llm():
+    from app.services.fake_providers import FakeLLMService
+    return FakeLLMService()
+
+
+# ---- TTS ----
+def tts_language(language: str = None) -> str:
+    return TTS_LANGUAGES.get((language or "").lower(), "en")
+
+
+def _cartesia_tts(language: str = "en"):
+    from pipecat.services.cartesia.tts import CartesiaTTSService
+    from pipecat.transcriptions.language import Language
+    return CartesiaTTSService(
+        api_key=os.getenv("CARTESIA_API_KEY"),
+        voice_id=CARTESIA_VOICE_ID,
+        params=CartesiaTTSService.InputParams(language=Language(language)),
+    )
+
+
+def _elevenlabs_tts(language: str = "en"):
+    from pipecat.services.elevenlabs.tts import ElevenLabsTTSService
+    from pipecat.transcriptions.language import Language
+    return ElevenLabsTTSService(
+        api_key=os.getenv("ELEVENLABS_API_KEY"),
+        voice_id=ELEVENLABS_VOICE_ID,
+        model="eleven_turbo_v2_5",  # Fastest model
+        params=ElevenLabsTTSService.InputParams(language=Language(language)),
+    )
+
+
+def _openai_tts(language: str = "en"):
+    # Speaks the language of the text, there is nothing to set
+    from pipecat.services.openai.tts import OpenAITTSService
+    return OpenAITTSService(api_key=os.getenv("OPENAI_API_KEY"), base_url=OPENAI_BASE_URL, voice=OPENAI_TTS_VOICE)
+
+
+def _fake_tts(language: str = "en"):
+    from app.services.fake_providers import FakeTTSService
+    return FakeTTSService()
+
+
+def _hedged_tts(language: str = "en"):
+    from app.services.hedged_tts import (
+        CartesiaSynthesizer,
+        ElevenLabsSynthesizer,
+        FakeSynthesizer,
+        HedgedTTSService,
+    )
+
+    synthesizers = {
+        "cartesia": lambda: CartesiaSynthesizer(api_key=os.getenv("CARTESIA_API_KEY"), voice_id=CARTESIA_VOICE_ID),
+        "elevenlabs": lambda: ElevenLabsSynthesizer(
+            api_key=os.getenv("ELEVENLABS_API_KEY"),
+            voice_id=ELEVENLABS_VOICE_ID,
+        ),
+        "fake": FakeSynthesizer,
+    }
+    return HedgedTTSService(
+        [_lookup(synthesizers, "hedged TTS", name)() for name in TTS_HEDGE_PROVIDERS], language=language
+    )
+
+
+# ---- Summary ----
+_summary_client = None
+
+
+async def _openai_summary(messages: list) -> str:
+    from openai import AsyncOpenAI
+    from app.services.resilience import provider_guard
+
+    global _summary_client
+    guard = provider_guard("openai")
+    if _summary_client is None:
+        # The guard owns timeouts and failure handling, SDK retries would multiply the wait
+        _summary_client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=OPENAI_BASE_URL,
+            timeout=guard.timeout_secs,
+            max_retries=0,
+        )
+    response = await guard.call(
+        _summary_client.chat.completions.create,
+        model=SUMMARY_MODEL,
+        messages=messages,
+        response_format={"type": "json_object"},
+        temperature=0.3
+    )
+    return response.choices[0].message.content
+
+
+async def _fake_summary(messages: list) -> str:
+    from app.services.fake_providers import FAKE_SUMMARY, summary_latency
+
+    await asyncio.sleep(summary_latency.sample())
+    return FAKE_SUMMARY
+
+
+STT_PROVIDERS = {"deepgram": _deepgram_stt, "openai": _openai_stt, "fake": _fake_stt}
+LLM_PROVIDERS = {"openai": _openai_llm, "fake": _fake_llm}
+TTS_PROVIDERS = {
+    "cartesia": _cartesia_tts,
+    "elevenlabs": _elevenlabs_tts,
+    "openai": _openai_tts,
+    "hedged": _hedged_tts,
+    "fake": _fake_tts,
+}
+SUMMARY_PROVIDERS = {"openai": _openai_summary, "fake": _fake_summary}
+
+# Imported during startup warm-up so the first call doesn't pay for them
+PROVIDER_MODULES = {
+    "deepgram": "pipecat.services.deepgram.stt",
+    "openai": "pipecat.services.openai.llm",
+    "cartesia": "pipecat.services.cartesia.tts",
+    "elevenlabs": "pipecat.services.elevenlabs.tts",
+    "hedged": "app.services.hedged_tts",
+    "fake": "app.services.fake_providers",
+}
+
+
+def _lookup(registry: dict, role: str, name: str):
+    try:
+        return registry[name]
+    except KeyError:
+        raise ValueError(f"Unknown {role} provider '{name}', expected one of {sorted(registry)}")
+
+
+def create_stt(name: str = STT_PROVIDER):
+    return _lookup(STT_PROVIDERS, "STT", name)()
+
+
+def create_llm(name: str = LLM_PROVIDER):
+    return _lookup(LLM_PROVIDERS, "LLM", name)()
+
+
+def create_tts(name: str = TTS_PROVIDER, language: str = "en"):
+    """language is an ISO 639-1 code, see tts_language()"""
+    return _lookup(TTS_PROVIDERS, "TTS", name)(language=language)
+
+
+async def complete_summary(messages: list, name: str = SUMMARY_PROVIDER) -> str:
+    """Run the summary prompt and return the raw JSON text"""
+    return await _lookup(SUMMARY_PROVIDERS, "summary", name)(messages)
+
+
+def active_providers() -> dict:
+    return {
+        "stt": STT_PROVIDER,
+        "llm": LLM_PROVIDER,
+        "tts": TTS_PROVIDER,
+        "summary": SUMMARY_PROVIDER,
+    }
+
+
+def tts_voice(name: str = TTS_PROVIDER) -> str:
+    """Voice the TTS provider speaks with; every voice a hedged render may come from"""
+    if name == "hedged":
+        return ",".join(f"{provider}:{tts_voice(provider)}" for provider in TTS_HEDGE_PROVIDERS)
+    voices = {"cartesia": CARTESIA_VOICE_ID, "elevenlabs": ELEVENLABS_VOICE_ID, "openai": OPENAI_TTS_VOICE}
+    return voices.get(name) or ""
+
+
+def checked_providers() -> set:
+    """Providers the startup checks should cover, including every hedged TTS provider"""
+    names = set(active_providers().values())
+    if TTS_PROVIDER == "hedged":
+        names |= set(TTS_HEDGE_PROVIDERS)
+    return names
+
+
+def pipeline_unavailable() -> list:
+    """Roles whose provider circuit is open, a call answered now would fail"""
+    from app.services.resilience import provider_guard
+
+    down = []
+    for role, name in (("stt", STT_PROVIDER), ("llm", LLM_PROVIDER), ("tts", TTS_PROVIDER)):
+        names = TTS_HEDGE_PROVIDERS if name == "hedged" else [name]
+        if name != "fake" and not any(provider_guard(n).available() for n in names):
+            down.append(f"{role}:{name}")
+    return down
+
+
+def is_offline() -> bool:
+    """True when no role talks to a real provider (load tests, CI)"""
+    return all(name == "fake" for name in active_providers().values())
+
+
+def import_provider_modules():
+    for name in set(active_providers().values()):
+        module = PROVIDER_MODULES.get(name)
+        if module:
+            importlib.import_module(module)
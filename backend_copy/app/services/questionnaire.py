@@ -0,0 +1,298 @@
+"""
+Scripted follow-up questionnaires.
+
+Patient.custom_questions may hold a JSON questionnaire instead of free text:
+
+    {
+      "greeting": "Hello {name}, this is Presco hospital calling to check on you.",
+      "questions": [
+        {"id": "feeling", "text": "How are you feeling today?"},
+        {"id": "medicines", "text": "Are you taking your medicines on time?",
+         "type": "yes_no", "next": {"no": "medicine_problem"}},
+        {"id": "pain", "text": "From 1 to 10, how bad is your pain?", "type": "number", "min": 1, "max": 10},
+        {"id": "fever", "text": "Have you had any fever?", "type": "yes_no", "next": {"*": "end"}},
+        {"id": "medicine_problem", "text": "What is stopping you from taking them?"}
+      ],
+      "closing": "Thank you for your time. Take care!"
+    }
+
+Types are open (default), yes_no, number and choice (with "choices").
+"next" maps an answer to the id of the following question or "end"; "*"
+matches any answer, otherwise questions run in order.
+
+QuestionnaireProcessor answers every turn it can interpret with a scripted
+line (pre-rendered audio once cached) and only hands the turn to the LLM
+when the reply doesn't answer the current question.
+"""
+import os
+import re
+import json
+import asyncio
+from typing import Dict, List, Literal, Optional
+
+from dotenv import load_dotenv
+from loguru import logger
+from pydantic import BaseModel, ValidationError, model_validator
+
+from pipecat.frames.frames import (
+    EndTaskFrame,
+    Frame,
+    OutputAudioRawFrame,
+    TranscriptionFrame,
+    TTSSpeakFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from app.services.prompt_audio import prompt_audio
+
+load_dotenv()
+
+# Quiet time after the caller's last words before a scripted reply
+QUESTIONNAIRE_TURN_SECS = float(os.getenv("QUESTIONNAIRE_TURN_SECS", "0.3"))
+# LLM turns allowed on one question before the raw reply is recorded and we move on
+QUESTIONNAIRE_MAX_FALLBACKS = int(os.getenv("QUESTIONNAIRE_MAX_FALLBACKS", "2"))
+
+END = "end"
+
+YES_WORDS = {"yes", "yeah", "yep", "yup", "sure", "correct", "right", "haan", "han", "ha", "ji", "हाँ", "हां", "जी"}
+NO_WORDS = {"no", "nope", "not", "never", "nahi", "nahin", "na", "नहीं", "ना"}
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+
+
+class Question(BaseModel):
+    id: str
+    text: str
+    type: Literal["open", "yes_no", "number", "choice"] = "open"
+    choices: List[str] = []
+    min: Optional[float] = None
+    max: Optional[float] = None
+    next: Dict[str, str] = {}
+
+    @model_validator(mode="after")
+    def check_choices(self):
+        if self.type == "choice" and not self.choices:
+            raise ValueError(f"question '{self.id}' needs choices")
+        return self
+
+
+class Questionnaire(BaseModel):
+    greeting: str = "Hello {name}, this is Presco hospital calling to check on you."
+    questions: List[Question]
+    acknowledgement: str = "Thank you."
+    closing: str = "Thank you for your time. Take care!"
+
+    @model_validator(mode="after")
+    def check_branches(self):
+        if not self.questions:
+            raise ValueError("questionnaire has no questions")
+        ids = [q.id for q in self.questions]
+        if len(set(ids)) != len(ids):
+            raise ValueError("question ids must be unique")
+        for q in self.questions:
+            for target in q.next.values():
+                if target != END and target not in ids:
+                    raise ValueError(f"question '{q.id}' branches to unknown question '{target}'")
+        return self
+
+    def get(self, question_id: str) -> Question:
+        return next(q for q in self.questions if q.id == question_id)
+
+    def next_question(self, question: Question, answer) -> Optional[Question]:
+        target = question.next.get(str(answer).lower(), question.next.get("*"))
+        if target == END:
+            return None
+        if target:
+            return self.get(target)
+        index = self.questions.index(question) + 1
+        return self.questions[index] if index < len(self.questions) else None
+
+    def describe(self) -> str:
+        """Question list for the LLM fallback prompt"""
+        return " ".join(f"({i}) {q.text}" for i, q in enumerate(self.questions, 1))
+
+
+def parse_questionnaire(custom_questions: Optional[str]) -> Optional[Questionnaire]:
+    """Questionnaire from custom_questions, None for free-text questions.
+
+    Raises ValueError for JSON that isn't a valid questionnaire.
+    """
+    if not custom_questions or not custom_questions.lstrip().startswith("{"):
+        return None
+    try:
+        return Questionnaire.model_validate(json.loads(custom_questions))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"custom_questions is not valid JSON: {e}")
+    except ValidationError as e:
+        raise ValueError(f"Invalid questionnaire: {e.errors()[0]['msg']}")
+
+
+def interpret_answer(question: Question, text: str):
+    """Answer value for the question, None when the reply doesn't answer it"""
+    words = re.findall(r"[\wऀ-ॿ]+", text.lower())
+    if not words:
+        return None
+
+    if question.type == "open":
+        return text.strip()
+
+    if question.type == "yes_no":
+        said_yes = any(w in YES_WORDS for w in words)
+        said_no = any(w in NO_WORDS for w in words)
+        if said_yes != said_no:
+            return "yes" if said_yes else "no"
+        return None
+
+    if question.type == "number":
+        for w in words:
+            value = float(w) if w.isdigit() else NUMBER_WORDS.get(w)
+            if value is None:
+                continue
+            if (question.min is not None and value < question.min) or (question.max is not None and value > question.max):
+                return None
+            return int(value) if value == int(value) else value
+        return None
+
+    if question.type == "choice":
+        spoken = " ".join(words)
+        for choice in question.choices:
+            if re.search(rf"\b{re.escape(choice.lower())}\b", spoken):
+                return choice
+        return None
+
+    return None
+
+
+class QuestionnaireProcessor(FrameProcessor):
+    """Sits in front of the user context aggregator, scripted turns never reach the LLM"""
+
+    def __init__(self, questionnaire: Questionnaire, context, patient_name: str, recorder=None, call_id: int = None, **kwargs):
+        super().__init__(**kwargs)
+        self._questionnaire = questionnaire
+        self._context = context
+        self._patient_name = patient_name
+        self._recorder = recorder
+        self._call_id = call_id
+        self._system_prompt = context.messages[0]["content"]
+
+        self.current = None
+        self.answers = {}
+        self.scripted_turns = 0
+        self.llm_turns = 0
+        self._started = False
+        self._finished = False
+        self._fallbacks = 0
+        self._user_speaking = False
+        self._pending = []
+        self._turn_task = None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if self._finished:
+            # Closing line is playing, nothing left for the LLM to answer
+            if not isinstance(frame, TranscriptionFrame):
+                await self.push_frame(frame, direction)
+            return
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            self._user_speaking = True
+            # Still talking, the turn isn't over
+            await self._cancel_turn()
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            self._user_speaking = False
+            self._schedule_turn()
+        elif isinstance(frame, TranscriptionFrame):
+            self._pending.append(frame)
+            self._schedule_turn()
+            return
+
+        await self.push_frame(frame, direction)
+
+    def _schedule_turn(self):
+        if self._pending and not self._user_speaking and not self._turn_task:
+            self._turn_task = self.create_task(self._end_of_turn())
+
+    async def _cancel_turn(self):
+        if self._turn_task:
+            await self.cancel_task(self._turn_task)
+            self._turn_task = None
+
+    async def _end_of_turn(self):
+        await asyncio.sleep(QUESTIONNAIRE_TURN_SECS)
+        self._turn_task = None
+        frames, self._pending = self._pending, []
+        text = " ".join(f.text.strip() for f in frames if f.text.strip())
+        if text:
+            await self._handle_turn(text, frames)
+
+    async def _handle_turn(self, text: str, frames: list):
+        if not self._started:
+            # Whatever the callee answered with, greet and ask the first question
+            self._started = True
+            self.current = self._questionnaire.questions[0]
+            greeting = self._questionnaire.greeting.replace("{name}", self._patient_name)
+            await self._say(text, f"{greeting} {self.current.text}")
+            return
+
+        answer = interpret_answer(self.current, text)
+        if answer is None and self._fallbacks < QUESTIONNAIRE_MAX_FALLBACKS:
+            await self._fallback(frames)
+            return
+
+        self.answers[self.current.id] = answer if answer is not None else text
+        logger.info(f"Questionnaire answer {self.current.id}={self.answers[self.current.id]!r} (call_id={self._call_id})")
+        self._fallbacks = 0
+        self._restore_prompt()
+
+        next_question = self._questionnaire.next_question(self.current, self.answers[self.current.id])
+        if next_question:
+            self.current = next_question
+            await self._say(text, f"{self._questionnaire.acknowledgement} {next_question.text}")
+        else:
+            self.current = None
+            self._finished = True
+            await self._say(text, self._questionnaire.closing)
+            # Hang up once the closing line has played
+            await self.push_frame(EndTaskFrame(), FrameDirection.UPSTREAM)
+
+    async def _fallback(self, frames: list):
+        """Let the LLM handle a reply that doesn't answer the current question"""
+        self._fallbacks += 1
+        self.llm_turns += 1
+        self._context.messages[0]["content"] = (
+            f"{self._system_prompt} You are going through these questions in order: "
+            f"{self._questionnaire.describe()}. The patient's last reply did not clearly answer: "
+            f"\"{self.current.text}\". Respond briefly to what they said, then ask that question again."
+        )
+        for frame in frames:
+            await self.push_frame(frame)
+
+    def _restore_prompt(self):
+        self._context.messages[0]["content"] = self._system_prompt
+
+    async def _say(self, user_text: str, reply: str):
+        self.scripted_turns += 1
+        self._context.add_message({"role": "user", "content": user_text})
+        self._context.add_message({"role": "assistant", "content": reply})
+
+        cached = await prompt_audio.get(reply)
+        if cached:
+            audio, sample_rate = cached
+            await self.push_frame(OutputAudioRawFrame(audio, sample_rate, 1))
+            return
+        if self._recorder:
+            self._recorder.expect(reply)
+        await self.push_frame(TTSSpeakFrame(reply))
+
+    def summary(self) -> dict:
+        return {
+            "answers": self.answers,
+            "scripted_turns": self.scripted_turns,
+            "llm_turns": self.llm_turns,
+            "completed": self._finished,
+        }
@@ -0,0 +1,324 @@
+"""
+Failure tracking and fast-fail for outbound providers.
+
+Every request to a provider (OpenAI, Deepgram, Cartesia, ElevenLabs, Plivo)
+goes through its ProviderGuard, see provider_guard():
+
+    timeout       <PROVIDER>_TIMEOUT_SECS, the request is abandoned and counts
+                  as a failure
+    concurrency   <PROVIDER>_MAX_IN_FLIGHT; over it, requests are rejected
+                  rather than queued, so an outage can't pile up coroutines
+    breaker       CircuitBreaker below, shared with the in-call services
+
+A guard that can't take a request raises ProviderUnavailable right away and
+the caller uses its fallback. State of every guard is on /health.
+
+CircuitBreaker keeps the outcomes of the last BREAKER_WINDOW requests to a
+provider. Once at least BREAKER_MIN_CALLS of them are in and more than
+BREAKER_FAILURE_RATE failed, the breaker opens and requests fail fast for
+BREAKER_COOLDOWN_SECS. After that a single probe request is let through
+(half-open): success closes the breaker, failure opens it again.
+
+ProviderHealth adds a score on top for callers that can choose between
+providers (hedged TTS): recent success rate, scaled down when the time to
+first byte is slower than the caller's latency target.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "4"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_COOLDOWN_SECS = float(os.getenv("BREAKER_COOLDOWN_SECS", "30"))
+
+# Spoken to a caller who answers while the call pipeline's providers are down
+PROVIDER_OUTAGE_MESSAGE = os.getenv(
+    "PROVIDER_OUTAGE_MESSAGE",
+    "Sorry, we can't continue this call right now. The hospital will call you back later.",
+)
+
+# Defaults per provider, (timeout secs, max in flight)
+PROVIDER_DEFAULTS = {
+    "openai": (20.0, 20),
+    "deepgram": (5.0, 20),
+    "cartesia": (5.0, 20),
+    "elevenlabs": (5.0, 20),
+    "plivo": (10.0, 10),
+}
+DEFAULT_TIMEOUT_SECS = 10.0
+DEFAULT_MAX_IN_FLIGHT = 20
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        cooldown_secs: float = BREAKER_COOLDOWN_SECS,
+    ):
+        self.name = name
+        self._outcomes = deque(maxlen=window)
+        self._min_calls = min_calls
+        self._failure_rate = failure_rate
+        self._cooldown_secs = cooldown_secs
+        self._opened_at = None
+        self._probing = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at >= self._cooldown_secs:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> bool:
+        """False while open; half-open lets one probe through at a time"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self._outcomes.append(True)
+        if self._opened_at is not None:
+            logger.info(f"Circuit breaker {self.name} closed")
+            self._opened_at = None
+            self._probing = False
+            self._outcomes.clear()
+
+    def record_failure(self):
+        self._outcomes.append(False)
+        if self._opened_at is not None:
+            # Failed probe, wait out another cooldown
+            self._opened_at = time.monotonic()
+            self._probing = False
+            return
+        if len(self._outcomes) >= self._min_calls and self.error_rate() > self._failure_rate:
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+            logger.warning(
+                f"Circuit breaker {self.name} opened: {self.error_rate():.0%} of the last "
+                f"{len(self._outcomes)} requests failed, retrying in {self._cooldown_secs:.0f}s"
+            )
+
+    def release(self):
+        """The probe ended without a verdict (cancelled), let the next one through"""
+        self._probing = False
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "requests": len(self._outcomes),
+            "times_opened": self.times_opened,
+        }
+
+
+class ProviderHealth:
+    """Breaker plus a 0..1 score from success rate and time to first byte (EWMAs)"""
+
+    ALPHA = 0.2
+
+    def __init__(self, name: str, latency_target_secs: float, breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker(name)
+        self._latency_target_secs = latency_target_secs
+        self.success_rate = 1.0
+        self.ttfb_secs = None
+
+    def _update_latency(self, ttfb_secs: float):
+        if self.ttfb_secs is None:
+            self.ttfb_secs = ttfb_secs
+        else:
+            self.ttfb_secs += self.ALPHA * (ttfb_secs - self.ttfb_secs)
+
+    def record_success(self, ttfb_secs: float):
+        self.success_rate += self.ALPHA * (1.0 - self.success_rate)
+        self._update_latency(ttfb_secs)
+        self.breaker.record_success()
+
+    def record_failure(self):
+        self.success_rate -= self.ALPHA * self.success_rate
+        self.breaker.record_failure()
+
+    def record_slow(self, waited_secs: float):
+        """Abandoned for a faster provider, only a lower bound on its latency is known"""
+        self._update_latency(waited_secs)
+        self.breaker.release()
+
+    @property
+    def score(self) -> float:
+        if self.breaker.state == OPEN:
+            return 0.0
+        latency_factor = 1.0
+        if self.ttfb_secs:
+            latency_factor = min(1.0, self._latency_target_secs / self.ttfb_secs)
+        return round(self.success_rate * latency_factor, 3)
+
+    def stats(self) -> dict:
+        return {
+            "score": self.score,
+            "success_rate": round(self.success_rate, 3),
+            "ttfb_ms": round(self.ttfb_secs * 1000) if self.ttfb_secs is not None else None,
+            "breaker": self.breaker.stats(),
+        }
+
+
+class ProviderUnavailable(Exception):
+    """Request refused or abandoned by a ProviderGuard, callers fall back"""
+
+
+class ProviderGuard:
+    def __init__(self, name: str, timeout_secs: float, max_in_flight: int):
+        self.name = name
+        self.timeout_secs = timeout_secs
+        self.max_in_flight = max_in_flight
+        self.breaker = CircuitBreaker(name)
+        self.in_flight = 0
+        self._stats = {"requests": 0, "failures": 0, "timeouts": 0, "rejected_open": 0, "rejected_busy": 0}
+
+    def available(self) -> bool:
+        return self.breaker.state != OPEN
+
+    def _admit(self):
+        if self.in_flight >= self.max_in_flight:
+            self._stats["rejected_busy"] += 1
+            raise ProviderUnavailable(f"{self.name}: {self.in_flight} requests already in flight")
+        if not self.breaker.allow():
+            self._stats["rejected_open"] += 1
+            raise ProviderUnavailable(f"{self.name}: circuit open")
+        self.in_flight += 1
+        self._stats["requests"] += 1
+
+    def _release(self, _=None):
+        self.in_flight -= 1
+
+    async def _outcome(self, awaitable, timeout: float, is_failure: Callable):
+        try:
+            result = await asyncio.wait_for(awaitable, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            self.record_failure()
+            raise ProviderUnavailable(f"{self.name}: no response after {timeout:.0f}s")
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+
+        if is_failure and is_failure(result):
+            self.record_failure()
+        else:
+            self.breaker.record_success()
+        return result
+
+    async def call(self, fn: Callable, *args, timeout: float = None, is_failure: Callable = None, **kwargs):
+        """Await fn(*args, **kwargs) within the limits; is_failure(result) flags failures reported as values"""
+        self._admit()
+        try:
+            return await self._outcome(fn(*args, **kwargs), timeout or self.timeout_secs, is_failure)
+        finally:
+            self._release()
+
+    async def call_sync(self, fn: Callable, *args, timeout: float = None, is_failure: Callable = None, **kwargs):
+        """Blocking SDK call on a worker thread.
+
+        A timeout can't stop the thread, so its slot stays taken until the
+        thread returns: an outage fills max_in_flight and further requests
+        are rejected instead of piling up blocked executor threads.
+        """
+        self._admit()
+        thread = asyncio.ensure_future(asyncio.to_thread(fn, *args, **kwargs))
+        thread.add_done_callback(self._thread_done)
+        return await self._outcome(asyncio.shield(thread), timeout or self.timeout_secs, is_failure)
+
+    def _thread_done(self, thread: asyncio.Future):
+        self._release()
+        if not thread.cancelled():
+            # Already reported (or abandoned after a timeout), don't warn about it at GC
+            thread.exception()
+
+    def record_failure(self):
+        self._stats["failures"] += 1
+        self.breaker.record_failure()
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "in_flight": self.in_flight,
+            "timeout_secs": self.timeout_secs,
+            "max_in_flight": self.max_in_flight,
+            "breaker": self.breaker.stats(),
+        }
+
+
+class PipelineErrorTracker:
+    """In-call services (Pipecat STT/LLM/TTS) report errors as ErrorFrames, not exceptions.
+
+    record() gets every ErrorFrame that reaches the pipeline task; finish()
+    gives each guarded provider one outcome for the whole call.
+    """
+
+    def __init__(self, services: dict):
+        # processor -> provider name, only providers with a guard config
+        self._services = {processor: name for processor, name in services.items() if name in PROVIDER_DEFAULTS}
+        self._failed = set()
+
+    def record(self, frame):
+        name = self._services.get(getattr(frame, "processor", None))
+        if name and name not in self._failed:
+            self._failed.add(name)
+            logger.warning(f"Provider {name} failed during the call: {frame.error}")
+
+    def finish(self):
+        for name in set(self._services.values()):
+            guard = provider_guard(name)
+            if name in self._failed:
+                guard.record_failure()
+            else:
+                guard.breaker.record_success()
+
+
+_guards = {}
+
+
+def provider_guard(name: str) -> ProviderGuard:
+    """The process-wide guard of a provider, configured from <NAME>_TIMEOUT_SECS / <NAME>_MAX_IN_FLIGHT"""
+    if name not in _guards:
+        timeout_secs, max_in_flight = PROVIDER_DEFAULTS.get(name, (DEFAULT_TIMEOUT_SECS, DEFAULT_MAX_IN_FLIGHT))
+        prefix = name.upper()
+        _guards[name] = ProviderGuard(
+            name,
+            timeout_secs=float(os.getenv(f"{prefix}_TIMEOUT_SECS", timeout_secs)),
+            max_in_flight=int(os.getenv(f"{prefix}_MAX_IN_FLIGHT", max_in_flight)),
+        )
+    return _guards[name]
+
+
+def resilience_summary() -> dict:
+    return {name: guard.stats() for name, guard in sorted(_guards.items())}
@@ -0,0 +1,265 @@
+"""
+Speculative LLM replies on interim transcripts (SPECULATIVE_LLM=true, off by default).
+
+Deepgram sends interim hypotheses while the caller is still talking. Once one
+has stayed the same for SPECULATIVE_STABLE_SECS, SpeculativeLLM starts a
+completion for it in the background, using the pipeline's own LLM service.
+When the user aggregator then sends the context with the final transcript:
+
+    hit   the final text matches the speculated one (similarity >=
+          SPECULATIVE_MATCH_THRESHOLD): the speculative reply is streamed
+          downstream instead of asking the LLM again
+    miss  anything else: the speculation is thrown away and the LLM runs as usual
+
+Misses and speculations cancelled by a changed hypothesis cost tokens that
+were never used; their usage still goes to the budget enforcer, and
+speculation_stats tracks hit rate and wasted tokens for tuning.
+"""
+import os
+import re
+import asyncio
+import difflib
+
+from dotenv import load_dotenv
+from loguru import logger
+from openai import NOT_GIVEN
+
+from pipecat.adapters.services.open_ai_adapter import OpenAILLMInvocationParams
+from pipecat.frames.frames import (
+    Frame,
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+    InterruptionFrame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    LLMTextFrame,
+    MetricsFrame,
+)
+from pipecat.metrics.metrics import LLMTokenUsage, LLMUsageMetricsData
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+load_dotenv()
+
+SPECULATIVE_LLM = os.getenv("SPECULATIVE_LLM", "false").lower() in ("1", "true", "yes")
+SPECULATIVE_STABLE_SECS = float(os.getenv("SPECULATIVE_STABLE_SECS", "0.2"))
+SPECULATIVE_MATCH_THRESHOLD = float(os.getenv("SPECULATIVE_MATCH_THRESHOLD", "0.9"))
+# Shorter hypotheses ("yes", "um") change too often to be worth a completion
+SPECULATIVE_MIN_WORDS = int(os.getenv("SPECULATIVE_MIN_WORDS", "2"))
+
+# Process-wide counters, see /health/speculation
+speculation_stats = {
+    "started": 0,
+    "hits": 0,
+    "misses": 0,
+    "cancelled": 0,
+    "wasted_prompt_tokens": 0,
+    "wasted_completion_tokens": 0,
+}
+
+
+def speculation_summary() -> dict:
+    decided = speculation_stats["hits"] + speculation_stats["misses"]
+    return {
+        **speculation_stats,
+        "hit_rate": round(speculation_stats["hits"] / decided, 3) if decided else None,
+    }
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"[\wऀ-ॿ]+", text.lower()))
+
+
+def similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, _normalize(a), _normalize(b)).ratio()
+
+
+class Speculation:
+    """One background completion for an interim hypothesis"""
+
+    def __init__(self, text: str, base_length: int):
+        self.text = text
+        # Context length when it started, the final turn must be the next message
+        self.base_length = base_length
+        self.deltas = asyncio.Queue()
+        self.reply = ""
+        self.usage = None
+        self.failed = False
+        self.task = None
+
+
+class SpeculativeLLM:
+    """Shared state of the two processors, like the user/assistant context aggregators:
+
+    observer() goes before the user aggregator (which swallows interim
+    transcripts), gate() between the user aggregator and the LLM.
+    """
+
+    def __init__(self, llm, context, call_id: int = None):
+        self._llm = llm
+        self._context = context
+        self._call_id = call_id
+        self._speculation = None
+        self._observer = _SpeculationObserver(self)
+        self._gate = _SpeculationGate(self)
+        self.hits = 0
+        self.misses = 0
+
+    def observer(self) -> FrameProcessor:
+        return self._observer
+
+    def gate(self) -> FrameProcessor:
+        return self._gate
+
+    def summary(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def start(self, text: str):
+        self._speculation = Speculation(text, len(self._context.messages))
+        self._speculation.task = self._observer.create_task(self._run(self._speculation))
+        speculation_stats["started"] += 1
+        logger.bind(sampled=True).debug(f"Speculating on {text!r} (call_id={self._call_id})")
+
+    async def _run(self, speculation: Speculation):
+        messages = self._context.get_messages()[:speculation.base_length]
+        messages.append({"role": "user", "content": speculation.text})
+        params = OpenAILLMInvocationParams(messages=messages, tools=NOT_GIVEN, tool_choice=NOT_GIVEN)
+        try:
+            async for chunk in await self._llm.get_chat_completions(params):
+                if chunk.usage:
+                    speculation.usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                    speculation.reply += chunk.choices[0].delta.content
+                    speculation.deltas.put_nowait(chunk.choices[0].delta.content)
+        except Exception as e:
+            logger.warning(f"Speculative completion failed (call_id={self._call_id}): {e}")
+            speculation.failed = True
+        finally:
+            speculation.deltas.put_nowait(None)
+
+    def matches(self, final_text: str) -> bool:
+        speculation = self._speculation
+        return bool(
+            speculation
+            and len(self._context.messages) == speculation.base_length + 1
+            and similarity(speculation.text, final_text) >= SPECULATIVE_MATCH_THRESHOLD
+        )
+
+    async def discard(self, reason: str):
+        """Drop the current speculation and report what it spent to the budget"""
+        speculation, self._speculation = self._speculation, None
+        if not speculation:
+            return
+        if speculation.task and not speculation.task.done():
+            await self._observer.cancel_task(speculation.task)
+        if reason == "cancelled":
+            speculation_stats["cancelled"] += 1
+        else:
+            speculation_stats["misses"] += 1
+            self.misses += 1
+
+        if speculation.usage:
+            prompt, completion = speculation.usage.prompt_tokens, speculation.usage.completion_tokens
+        else:
+            # Cut off before the usage chunk, estimate like calculate_usage_from_transcript
+            prompt = sum(len(str(m.get("content", ""))) for m in self._context.messages[:speculation.base_length]) // 4
+            completion = len(speculation.reply) // 4
+        speculation_stats["wasted_prompt_tokens"] += prompt
+        speculation_stats["wasted_completion_tokens"] += completion
+        await self._gate.push_usage(prompt, completion)
+        logger.bind(sampled=True).debug(f"Speculation {reason}: {speculation.text!r} (call_id={self._call_id})")
+
+    def take(self) -> Speculation:
+        speculation, self._speculation = self._speculation, None
+        speculation_stats["hits"] += 1
+        self.hits += 1
+        return speculation
+
+    def current(self):
+        return self._speculation
+
+
+class _SpeculationObserver(FrameProcessor):
+    def __init__(self, speculative: SpeculativeLLM, **kwargs):
+        super().__init__(**kwargs)
+        self._speculative = speculative
+        self._hypothesis = ""
+        self._stable_task = None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, InterimTranscriptionFrame) and frame.text.strip():
+            await self._on_interim(frame.text.strip())
+        elif isinstance(frame, TranscriptionFrame):
+            # Final text is in, a hypothesis that turns stable now would be stale
+            self._hypothesis = ""
+            if self._stable_task:
+                await self.cancel_task(self._stable_task)
+                self._stable_task = None
+
+        await self.push_frame(frame, direction)
+
+    async def _on_interim(self, text: str):
+        current = self._speculative.current()
+        if current and similarity(current.text, text) < SPECULATIVE_MATCH_THRESHOLD:
+            await self._speculative.discard("cancelled")
+        if text != self._hypothesis:
+            self._hypothesis = text
+            if self._stable_task:
+                await self.cancel_task(self._stable_task)
+            self._stable_task = self.create_task(self._wait_until_stable(text))
+
+    async def _wait_until_stable(self, text: str):
+        await asyncio.sleep(SPECULATIVE_STABLE_SECS)
+        self._stable_task = None
+        current = self._speculative.current()
+        if len(text.split()) >= SPECULATIVE_MIN_WORDS and not (current and current.text == text):
+            if current:
+                await self._speculative.discard("cancelled")
+            self._speculative.start(text)
+
+
+class _SpeculationGate(FrameProcessor):
+    def __init__(self, speculative: SpeculativeLLM, **kwargs):
+        super().__init__(**kwargs)
+        self._speculative = speculative
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, InterruptionFrame):
+            await self._speculative.discard("cancelled")
+        elif isinstance(frame, OpenAILLMContextFrame) and self._speculative.current():
+            messages = frame.context.messages
+            final_text = messages[-1].get("content", "") if messages and messages[-1].get("role") == "user" else ""
+            if final_text and self._speculative.matches(final_text):
+                await self._replay(self._speculative.take(), frame)
+                return
+            await self._speculative.discard("missed")
+
+        await self.push_frame(frame, direction)
+
+    async def _replay(self, speculation: Speculation, frame: OpenAILLMContextFrame):
+        """Stream the speculative reply as if the LLM service had produced it"""
+        delta = await speculation.deltas.get()
+        if delta is None and speculation.failed:
+            # Nothing to replay, let the LLM answer after all
+            await self.push_frame(frame)
+            return
+
+        await self.push_frame(LLMFullResponseStartFrame())
+        while delta is not None:
+            await self.push_frame(LLMTextFrame(delta))
+            delta = await speculation.deltas.get()
+        await self.push_frame(LLMFullResponseEndFrame())
+        if speculation.usage:
+            await self.push_usage(speculation.usage.prompt_tokens, speculation.usage.completion_tokens)
+
+    async def push_usage(self, prompt_tokens: int, completion_tokens: int):
+        tokens = LLMTokenUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+        await self.push_frame(MetricsFrame(data=[LLMUsageMetricsData(processor=self.name, value=tokens)]))
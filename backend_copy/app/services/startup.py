@@ -0,0 +1,235 @@
+"""
+Startup helpers: background provider checks, pipeline warm-up and recovery
+of calls interrupted by a crash (app/services/call_journal.py).
+
+The Pipecat/Silero stack is not imported with the app, it is loaded by a
+warm-up step before the server accepts connections. Imports hold the GIL
+whether or not they run in a thread, so warming up while serving would stall
+every request on the worker, /health and /ready included. uvicorn only
+listens once the lifespan startup is done; until then the worker is simply
+not ready.
+
+STARTUP_MODE=lazy (default) serves as soon as the pipeline is loaded and
+runs provider checks in the background. STARTUP_MODE=eager waits for the
+provider checks too.
+"""
+import os
+import time
+import asyncio
+import importlib
+from loguru import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STARTUP_MODE = os.getenv("STARTUP_MODE", "lazy").lower()
+PROVIDER_CHECK_TIMEOUT = float(os.getenv("PROVIDER_CHECK_TIMEOUT", "5"))
+
+# Modules that make the first call slow when imported on demand
+PIPELINE_MODULES = [
+    "app.services.pipeline_service",
+]
+
+# Checks for providers the registry doesn't select are skipped
+ALWAYS_CHECKED = {"plivo"}
+
+_process_started = time.monotonic()
+_background_tasks = set()
+
+startup_state = {
+    "mode": STARTUP_MODE,
+    "db_ready": False,
+    "pipeline_warm": False,
+    "pipeline_error": None,
+    "providers": {},
+    "time_to_db_ms": None,
+    "time_to_ready_ms": None,
+    "recovered_calls": [],
+}
+
+
+def _elapsed_ms() -> int:
+    return int((time.monotonic() - _process_started) * 1000)
+
+
+def is_ready() -> bool:
+    """The worker can take calls once the DB is up and the pipeline is loaded"""
+    return startup_state["db_ready"] and startup_state["pipeline_warm"]
+
+
+def mark_db_ready():
+    startup_state["db_ready"] = True
+    startup_state["time_to_db_ms"] = _elapsed_ms()
+    _check_ready()
+
+
+def _check_ready():
+    if is_ready() and startup_state["time_to_ready_ms"] is None:
+        startup_state["time_to_ready_ms"] = _elapsed_ms()
+        logger.info(f"Worker ready to take calls in {startup_state['time_to_ready_ms']} ms")
+
+
+# ---- Provider checks ----
+async def verify_openai_key() -> tuple:
+    """Check the OpenAI key with a lightweight models list"""
+    from openai import AsyncOpenAI, AuthenticationError
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return False, "Missing OPENAI_API_KEY"
+
+    client = AsyncOpenAI(api_key=api_key, timeout=PROVIDER_CHECK_TIMEOUT, max_retries=0)
+    try:
+        await client.models.list()
+        return True, "API key verified"
+    except AuthenticationError:
+        return False, "Invalid API key"
+    finally:
+        await client.close()
+
+
+async def verify_deepgram_key() -> tuple:
+    import httpx
+
+    api_key = os.getenv("DEEPGRAM_API_KEY")
+    if not api_key:
+        return False, "Missing DEEPGRAM_API_KEY"
+
+    async with httpx.AsyncClient(timeout=PROVIDER_CHECK_TIMEOUT) as client:
+        response = await client.get(
+            "https://api.deepgram.com/v1/projects",
+            headers={"Authorization": f"Token {api_key}"},
+        )
+    if response.status_code in (401, 403):
+        return False, "Invalid API key"
+    return response.is_success, f"HTTP {response.status_code}"
+
+
+async def verify_cartesia_key() -> tuple:
+    import httpx
+
+    api_key = os.getenv("CARTESIA_API_KEY")
+    if not api_key:
+        return False, "Missing CARTESIA_API_KEY"
+
+    async with httpx.AsyncClient(timeout=PROVIDER_CHECK_TIMEOUT) as client:
+        response = await client.get(
+            "https://api.cartesia.ai/voices",
+            headers={"X-API-Key": api_key, "Cartesia-Version": "2024-06-10"},
+        )
+    if response.status_code in (401, 403):
+        return False, "Invalid API key"
+    return response.is_success, f"HTTP {response.status_code}"
+
+
+async def verify_plivo_credentials() -> tuple:
+    """Plivo is only checked for configuration, the SDK is synchronous"""
+    if not all([os.getenv("PLIVO_AUTH_ID"), os.getenv("PLIVO_AUTH_TOKEN"), os.getenv("PLIVO_PHONE_NUMBER")]):
+        return False, "Plivo credentials not properly configured in .env"
+    return True, "Credentials configured"
+
+
+PROVIDER_CHECKS = {
+    "openai": verify_openai_key,
+    "deepgram": verify_deepgram_key,
+    "cartesia": verify_cartesia_key,
+    "plivo": verify_plivo_credentials,
+}
+
+
+async def _run_check(name: str, check) -> None:
+    from app.services.resilience import ProviderUnavailable, provider_guard
+
+    started = time.monotonic()
+    try:
+        # Unreachable providers count towards their circuit breaker like any other request
+        ok, detail = await provider_guard(name).call(check, timeout=PROVIDER_CHECK_TIMEOUT + 1)
+    except ProviderUnavailable as e:
+        ok, detail = False, str(e)
+    except Exception as e:
+        ok, detail = False, f"Could not verify: {e}"
+
+    startup_state["providers"][name] = {
+        "ok": ok,
+        "detail": detail,
+        "latency_ms": int((time.monotonic() - started) * 1000),
+    }
+    if ok:
+        logger.info(f"Provider check {name}: {detail}")
+    else:
+        logger.warning(f"Provider check {name} failed: {detail}. Voice agent may fail later.")
+
+
+async def verify_providers():
+    """Run checks for the configured providers concurrently"""
+    from app.services.providers import checked_providers
+
+    selected = checked_providers() | ALWAYS_CHECKED
+    await asyncio.gather(*(
+        _run_check(name, check) for name, check in PROVIDER_CHECKS.items() if name in selected
+    ))
+
+
+# ---- Pipeline warm-up ----
+def _load_pipeline_stack():
+    for module in PIPELINE_MODULES:
+        importlib.import_module(module)
+
+    from app.services.providers import import_provider_modules
+    import_provider_modules()
+
+    # First Silero instance pays for onnxruntime and model file loading
+    from pipecat.audio.vad.silero import SileroVADAnalyzer
+    SileroVADAnalyzer()
+
+
+async def warm_pipeline():
+    """Import the Pipecat stack before serving so the first call isn't slow"""
+    started = time.monotonic()
+    try:
+        _load_pipeline_stack()
+    except Exception as e:
+        # Stays unready (503 on /ready): every call on this worker would fail the same way
+        startup_state["pipeline_error"] = f"{e.__class__.__name__}: {e}"
+        logger.error(f"Pipeline warm-up failed: {e}")
+        return
+    logger.info(f"Pipeline stack loaded in {int((time.monotonic() - started) * 1000)} ms")
+    startup_state["pipeline_warm"] = True
+    _check_ready()
+
+
+# ---- Call recovery ----
+async def recover_calls():
+    """Finalize calls a crashed worker left journaled"""
+    from app.services.call_journal import recover_orphaned_calls
+
+    try:
+        startup_state["recovered_calls"] = await recover_orphaned_calls()
+    except Exception as e:
+        logger.error(f"Call recovery failed: {e}")
+    if startup_state["recovered_calls"]:
+        logger.warning(f"Recovered {len(startup_state['recovered_calls'])} interrupted call(s): {startup_state['recovered_calls']}")
+
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def run_startup_tasks():
+    """Warm up the pipeline, then start provider checks, waiting for them only in eager mode"""
+    await warm_pipeline()
+    checks = _spawn(verify_providers())
+    _spawn(recover_calls())
+
+    if STARTUP_MODE == "eager":
+        await checks
+
+
+async def cancel_startup_tasks():
+    tasks = list(_background_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -2,6 +2,7 @@ import os
 import base64
 from openai import OpenAI
 from dotenv import load_dotenv
+from loguru import logger
 
 load_dotenv()
 
@@ -16,7 +17,7 @@ class TTSService:
         Convert text to speech - using PCM16 format
         """
         try:
-            print(f"🎙️ Converting text: {text[:50]}...")
+            logger.debug(f"Converting text: {text[:50]}...")
 
             # Generate speech as PCM
             response = self.client.audio.speech.create(
@@ -29,11 +30,9 @@ class TTSService:
             # Base64 encode PCM bytes
             encoded_audio = base64.b64encode(response.content).decode('utf-8')
 
-            print(f"✅ Generated {len(encoded_audio)} bytes")
+            logger.debug(f"Generated {len(encoded_audio)} bytes")
             return encoded_audio
 
         except Exception as e:
-            print(f"❌ TTS Error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"TTS Error: {e}")
             return ""
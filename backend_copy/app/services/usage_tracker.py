@@ -0,0 +1,60 @@
+"""
+Tracks what the caller actually heard.
+
+Placed right after transport.output(): the output transport only forwards a
+TTSTextFrame once the audio queued ahead of it has been written, and drops
+queued frames when the caller barges in. So text reaching this processor was
+spoken, while TTS usage metrics (system frames, forwarded immediately) tell
+us how much was synthesized.
+"""
+from loguru import logger
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    Frame,
+    InterruptionFrame,
+    MetricsFrame,
+    TTSTextFrame,
+)
+from pipecat.metrics.metrics import TTSUsageMetricsData
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+
+class SpokenTextTracker(FrameProcessor):
+    def __init__(self, call_id: int = None, **kwargs):
+        super().__init__(**kwargs)
+        self._call_id = call_id
+        self._bot_speaking = False
+        self.spoken_characters = 0
+        self.synthesized_characters = 0
+        self.interruptions = 0
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, TTSTextFrame):
+            self.spoken_characters += len(frame.text)
+        elif isinstance(frame, MetricsFrame):
+            for data in frame.data:
+                if isinstance(data, TTSUsageMetricsData):
+                    self.synthesized_characters += data.value
+        elif isinstance(frame, BotStartedSpeakingFrame):
+            self._bot_speaking = True
+        elif isinstance(frame, BotStoppedSpeakingFrame):
+            self._bot_speaking = False
+        elif isinstance(frame, InterruptionFrame) and self._bot_speaking:
+            # Only a barge-in over bot audio counts, every user turn starts an interruption
+            self.interruptions += 1
+            self._bot_speaking = False
+            logger.info(f"Caller interrupted the bot (call_id={self._call_id})")
+
+        await self.push_frame(frame, direction)
+
+    def summary(self) -> dict:
+        return {
+            "spoken_characters": self.spoken_characters,
+            "synthesized_characters": self.synthesized_characters,
+            "unheard_characters": max(0, self.synthesized_characters - self.spoken_characters),
+            "interruptions": self.interruptions,
+        }
@@ -0,0 +1,26 @@
+"""
+Auth for the /admin endpoints (drain, log level).
+
+    ADMIN_TOKEN    shared secret, sent as "Authorization: Bearer <token>"
+
+Without ADMIN_TOKEN the admin endpoints are disabled (403), so a worker
+reachable from outside can't be drained or switched to DEBUG by anyone.
+"""
+import os
+import hmac
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import Header, HTTPException
+
+load_dotenv()
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+async def require_admin(authorization: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled, set ADMIN_TOKEN")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
@@ -0,0 +1,127 @@
+"""
+Streamed, compressed JSON for list endpoints.
+
+Rows come off a server-side cursor (AsyncSession.stream with yield_per) and
+are encoded a batch at a time, so a response never holds more than
+JSON_STREAM_BATCH_ROWS rows in memory however large the table gets. The
+body is compressed as it is produced: br when the client accepts it and
+brotli is installed, gzip otherwise.
+
+    JSON_STREAM_BATCH_ROWS    rows per cursor fetch and per body chunk
+
+fields= on the list endpoints picks columns in the SELECT itself, see
+select_fields().
+"""
+import os
+import zlib
+from typing import AsyncIterator, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from loguru import logger
+
+from app.utils.fast_json import dumps
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+load_dotenv()
+
+JSON_STREAM_BATCH_ROWS = int(os.getenv("JSON_STREAM_BATCH_ROWS", "500"))
+
+GZIP_LEVEL = 6
+# Streaming favours speed, quality 11 (the default) is far too slow per request
+BROTLI_QUALITY = 4
+
+
+def select_fields(fields: Optional[str], columns: dict, default: list) -> dict:
+    """name -> labelled column for a comma separated fields= value, 400 on unknown names"""
+    names = [name.strip() for name in fields.split(",") if name.strip()] if fields else default
+    unknown = [name for name in names if name not in columns]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {unknown}, expected a subset of {list(columns)}",
+        )
+    return {name: columns[name].label(name) for name in dict.fromkeys(names)}
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """br, gzip or None (identity) from an Accept-Encoding header, honouring q-values"""
+    weights = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+
+    def weight_of(encoding):
+        return weights.get(encoding, weights.get("*", 0.0))
+
+    # br wins ties, it is smaller for the same CPU at this quality
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=weight_of)
+    return best if weight_of(best) > 0 else None
+
+
+async def _json_chunks(query, key: str, count_key: Optional[str]) -> AsyncIterator[bytes]:
+    # Own session: the request's dependencies are closed before a streamed body is sent
+    from app.database import AsyncSessionLocal
+
+    count = 0
+    yield f'{{"{key}":['.encode()
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=JSON_STREAM_BATCH_ROWS))
+        async for rows in result.mappings().partitions():
+            chunk = b",".join(dumps(dict(row)) for row in rows)
+            yield (b"," if count else b"") + chunk
+            count += len(rows)
+    # Known only at the end, clients read keys by name so it trails the list
+    tail = f',"{count_key}":{count}' if count_key else ""
+    yield f"]{tail}}}".encode()
+
+
+async def _compressed(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compress, finish = compressor.compress, compressor.flush
+    async for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def _logged(chunks: AsyncIterator[bytes], key: str) -> AsyncIterator[bytes]:
+    # Headers are out by the time rows are read, a failure can only cut the body short
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception:
+        logger.exception(f"Streaming {key} failed mid-response")
+        raise
+
+
+def stream_json_list(request: Request, query, key: str, count_key: Optional[str] = None) -> StreamingResponse:
+    """{"<key>": [rows...], "<count_key>": n} for a select of labelled columns"""
+    body = _json_chunks(query, key, count_key)
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding:
+        body = _compressed(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(_logged(body, key), media_type="application/json", headers=headers)
@@ -0,0 +1,143 @@
+"""
+Logging setup shared by the app, Pipecat and the stdlib loggers (uvicorn, SQLAlchemy).
+
+One loguru sink with enqueue=True: records are handed to a writer thread,
+so a slow stdout never blocks the event loop that carries every live call.
+
+    LOG_LEVEL                 minimum level, can be changed at runtime
+                              (POST /admin/log-level)
+    LOG_FORMAT                json (one object per line) or text, defaults
+                              to json when ENVIRONMENT=production
+    LOG_DEBUG_SAMPLE_RATE     fraction of per-frame DEBUG/TRACE records kept
+                              when the level lets them through; only records
+                              logged with logger.bind(sampled=True) are
+                              sampled, everything else passes at DEBUG
+
+Every record carries the call_id of the call it was logged for (bind_call_id),
+through a contextvar, so tasks the pipeline starts inherit it.
+"""
+import os
+import sys
+import json
+import random
+import logging
+import traceback
+from contextvars import ContextVar
+
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json" if os.getenv("ENVIRONMENT") == "production" else "text").lower()
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+
+TEXT_FORMAT = (
+    "<green>{time:HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+    "{name}:{function}:{line} | call={extra[call_id]} - <level>{message}</level>"
+)
+
+call_id_var: ContextVar = ContextVar("call_id", default=None)
+
+# Read by the sink's filter on every record, so changes apply without re-adding it
+_settings = {
+    "level": LOG_LEVEL,
+    "level_no": logger.level(LOG_LEVEL).no,
+    "debug_sample_rate": LOG_DEBUG_SAMPLE_RATE,
+}
+
+
+def bind_call_id(call_id):
+    """Tag this task's records (and those of tasks it starts from now on) with call_id"""
+    return call_id_var.set(call_id)
+
+
+def _patch(record):
+    record["extra"].setdefault("call_id", call_id_var.get())
+
+
+def _filter(record) -> bool:
+    level_no = record["level"].no
+    if level_no < _settings["level_no"]:
+        return False
+    # Per-frame call sites opt in, they would swamp the sink under load
+    if level_no < logging.INFO and record["extra"].get("sampled"):
+        return random.random() < _settings["debug_sample_rate"]
+    return True
+
+
+def _json_format(record) -> str:
+    payload = {
+        "ts": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+        **{key: value for key, value in record["extra"].items() if key not in ("_json", "sampled")},
+    }
+    if record["exception"]:
+        error_type, error, tb = record["exception"]
+        payload["exception"] = "".join(traceback.format_exception(error_type, error, tb))
+    record["extra"]["_json"] = json.dumps(payload, default=str, ensure_ascii=False)
+    return "{extra[_json]}\n"
+
+
+class InterceptHandler(logging.Handler):
+    """Sends stdlib logging records through loguru"""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        # Report the stdlib caller, not this handler
+        frame, depth = sys._getframe(), 0
+        while frame and (depth == 0 or frame.f_code.co_filename == logging.__file__):
+            frame = frame.f_back
+            depth += 1
+        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+
+def setup_logging():
+    """Replace loguru's default stderr handler; safe to call again"""
+    logger.remove()
+    logger.configure(patcher=_patch)
+    logger.add(
+        sys.stdout,
+        level=0,  # _filter decides, so the level can change at runtime
+        filter=_filter,
+        format=_json_format if LOG_FORMAT == "json" else TEXT_FORMAT,
+        colorize=LOG_FORMAT != "json" and sys.stdout.isatty(),
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
+    )
+    intercept_stdlib_logging()
+
+
+def intercept_stdlib_logging():
+    """Route uvicorn/SQLAlchemy records to loguru; uvicorn installs its handlers at startup, so call again then"""
+    # Same numbering as loguru's levels, so stdlib DEBUG records reach the sink at LOG_LEVEL=DEBUG
+    logging.basicConfig(handlers=[InterceptHandler()], level=_settings["level_no"], force=True)
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access", "sqlalchemy.engine"):
+        stdlib_logger = logging.getLogger(name)
+        stdlib_logger.handlers = [InterceptHandler()]
+        stdlib_logger.propagate = False
+
+
+def set_log_level(level: str = None, debug_sample_rate: float = None) -> dict:
+    if level:
+        level = level.upper()
+        _settings["level_no"] = logger.level(level).no  # ValueError for unknown levels
+        _settings["level"] = level
+        logging.getLogger().setLevel(_settings["level_no"])
+    if debug_sample_rate is not None:
+        _settings["debug_sample_rate"] = min(1.0, max(0.0, debug_sample_rate))
+    logger.info(f"Log level {_settings['level']}, debug sample rate {_settings['debug_sample_rate']}")
+    return log_settings()
+
+
+def log_settings() -> dict:
+    return {"level": _settings["level"], "debug_sample_rate": _settings["debug_sample_rate"], "format": LOG_FORMAT}
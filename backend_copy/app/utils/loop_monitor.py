@@ -0,0 +1,79 @@
+"""
+Event loop lag monitor.
+
+Sleeps for a fixed interval and records how late it wakes up. Sustained lag
+means something is blocking the loop that every live call shares.
+"""
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Optional
+
+from loguru import logger
+
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.25"))  # 0 disables
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "100"))
+LOOP_MONITOR_WINDOW = int(os.getenv("LOOP_MONITOR_WINDOW", "1200"))  # samples kept for percentiles
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, window: int = LOOP_MONITOR_WINDOW):
+        self.interval = interval
+        self._samples = deque(maxlen=window)
+        self._max_ms = 0.0
+        self._count = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - started - self.interval) * 1000)
+
+            self._samples.append(lag_ms)
+            self._max_ms = max(self._max_ms, lag_ms)
+            self._count += 1
+            if lag_ms > LOOP_LAG_WARN_MS:
+                logger.warning(f"Event loop lagged {lag_ms:.0f}ms")
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def reset(self):
+        """Forget collected samples, e.g. between load test runs"""
+        self._samples.clear()
+        self._max_ms = 0.0
+        self._count = 0
+
+    def stats(self) -> dict:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"enabled": self._task is not None, "samples": 0}
+
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))], 2)
+
+        return {
+            "enabled": self._task is not None,
+            "interval_ms": self.interval * 1000,
+            "samples": self._count,
+            "mean_ms": round(sum(samples) / len(samples), 2),
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(self._max_ms, 2),
+        }
+
+
+loop_monitor = LoopLagMonitor()
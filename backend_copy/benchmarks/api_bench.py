@@ -0,0 +1,282 @@
+"""
+REST API benchmark against a large seeded database.
+
+Calls the FastAPI app in-process (httpx ASGITransport, no network) and
+records p50/p99 latency, peak Python allocations (tracemalloc) and response
+size for the dashboard endpoints. Results are written as JSON; pass
+--baseline to compare against an earlier run and fail on regressions.
+
+    DATABASE_URL=sqlite+aiosqlite:////tmp/bench.db python -m benchmarks.api_bench --seed
+    python -m benchmarks.api_bench --output after.json --baseline before.json
+
+--scale shrinks the default 100k patients / 5M calls / 1M transcripts for
+quick runs, e.g. --scale 0.01. The read cache is disabled unless --cache.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+FULL_SCALE = {"patients": 100_000, "calls": 5_000_000, "transcripts": 1_000_000}
+
+# Endpoints whose full responses are huge get fewer iterations by default
+ENDPOINT_ITERATIONS = {
+    "get_all_patients": 5,
+    "get_all_patients_sparse": 5,
+    "get_all_calls": 3,
+    "get_all_calls_for_patient": 50,
+    "get_patient_calls": 50,
+    "get_patient_calls_heavy": 10,
+    "get_transcript": 200,
+    "delete_patient": 20,
+}
+
+
+def percentile(values: list, p: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))], 3)
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def pick_targets(rng: random.Random, samples: int) -> dict:
+    """Choose ids for parameterised endpoints from the current data"""
+    from sqlalchemy import func, select
+    from app.database import AsyncSessionLocal
+    from app.models import Call, Patient, Transcript
+
+    async with AsyncSessionLocal() as db:
+        counts = (await db.execute(
+            select(Call.patient_id, func.count(Call.id).label("n"))
+            .group_by(Call.patient_id)
+            .order_by(func.count(Call.id).desc())
+            .limit(10)
+        )).all()
+        max_patient = (await db.execute(select(func.max(Call.patient_id)))).scalar() or 0
+        min_patient = (await db.execute(select(func.min(Call.patient_id)))).scalar() or 0
+        max_transcript = (await db.execute(select(func.max(Transcript.id)))).scalar() or 0
+
+        # Transcript ids are dense, pick random rows then map to their calls
+        transcript_ids = [rng.randint(1, max_transcript) for _ in range(samples)] if max_transcript else []
+        transcript_calls = (await db.execute(
+            select(Transcript.call_id).where(Transcript.id.in_(transcript_ids))
+        )).scalars().all()
+
+        # Earlier runs may have deleted some patients, only keep ids that still exist
+        candidates = [rng.randint(min_patient, max_patient) for _ in range(samples)] if max_patient else []
+        existing = set((await db.execute(
+            select(Patient.id).where(Patient.id.in_(candidates))
+        )).scalars().all())
+
+    heavy = [patient_id for patient_id, _ in counts]
+    typical = [p for p in candidates if p in existing]
+    return {
+        "heavy_patients": heavy,
+        "heavy_patient_calls": counts[0][1] if counts else 0,
+        "typical_patients": [p for p in typical if p not in heavy],
+        "transcript_calls": list(transcript_calls),
+    }
+
+
+async def measure(client, name: str, paths: list, iterations: int, method: str = "GET", track_memory: bool = True) -> dict:
+    """Time each request; a second pass under tracemalloc records peak allocations"""
+    latencies = []
+    sizes = []
+    statuses = {}
+    errors = 0
+
+    for i in range(iterations):
+        path = paths[i % len(paths)]
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path)
+        except Exception as e:
+            errors += 1
+            print(f"  {name} {path}: {e.__class__.__name__}: {e}")
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+        sizes.append(len(response.content))
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    peak_kb = None
+    # Deletes can't be replayed, their allocations are measured in the timed pass only
+    if track_memory and method == "GET" and paths:
+        tracemalloc.start()
+        peaks = []
+        for path in paths[:min(len(paths), 3)]:
+            tracemalloc.reset_peak()
+            await client.request(method, path)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+        peak_kb = round(max(peaks), 1)
+
+    return {
+        "iterations": len(latencies),
+        "errors": errors,
+        "status_codes": {str(k): v for k, v in statuses.items()},
+        "p50_ms": percentile(latencies, 0.50),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "max_ms": round(max(latencies), 3) if latencies else None,
+        "response_bytes_p50": percentile(sizes, 0.50),
+        "peak_alloc_kb": peak_kb,
+        "max_rss_mb": max_rss_mb(),
+    }
+
+
+async def run_bench(args) -> dict:
+    import httpx
+    from app.database import DATABASE_URL, close_db, engine, init_db
+    from app.main import app
+    from benchmarks.seed_data import seed, table_counts
+
+    await init_db()
+    seed_info = None
+    if args.seed:
+        seed_info = await seed(
+            int(FULL_SCALE["patients"] * args.scale),
+            int(FULL_SCALE["calls"] * args.scale),
+            int(FULL_SCALE["transcripts"] * args.scale),
+        )
+
+    rng = random.Random(args.random_seed)
+    targets = await pick_targets(rng, max(ENDPOINT_ITERATIONS.values()) * 2)
+    counts = await table_counts(engine)
+    print(f"📊 Data: {counts}, heaviest patient has {targets['heavy_patient_calls']:,} calls")
+
+    def iterations(name):
+        return max(1, int(ENDPOINT_ITERATIONS[name] * args.iterations_factor))
+
+    plan = [
+        ("get_all_patients", ["/api/calls/patients"]),
+        ("get_all_patients_sparse", ["/api/calls/patients?fields=id,name,phone,patient_type,call_count"]),
+        ("get_all_calls", ["/api/calls/calls"]),
+        ("get_all_calls_for_patient", [f"/api/calls/calls?patient_id={p}" for p in targets["typical_patients"]]),
+        ("get_patient_calls", [f"/api/calls/patients/{p}/calls" for p in targets["typical_patients"]]),
+        ("get_patient_calls_heavy", [f"/api/calls/patients/{p}/calls" for p in targets["heavy_patients"][:3]]),
+        ("get_transcript", [f"/api/calls/calls/{c}/transcript" for c in targets["transcript_calls"]]),
+    ]
+    if args.only:
+        plan = [step for step in plan if step[0] in args.only]
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+        for name, paths in plan:
+            if not paths:
+                print(f"⏭️ {name}: no data")
+                continue
+            print(f"⏱️ {name} x{iterations(name)}")
+            results[name] = await measure(client, name, paths, iterations(name), track_memory=not args.no_memory)
+            print(f"   p50 {results[name]['p50_ms']}ms  p99 {results[name]['p99_ms']}ms")
+
+        # Destructive, always last: each iteration deletes a different typical patient
+        if not args.only or "delete_patient" in args.only:
+            victims = [p for p in targets["typical_patients"] if p not in targets["heavy_patients"]]
+            victims = list(dict.fromkeys(victims))[:iterations("delete_patient")]
+            if victims and not args.no_delete:
+                print(f"⏱️ delete_patient x{len(victims)}")
+                results["delete_patient"] = await measure(
+                    client, "delete_patient", [f"/api/calls/patients/{p}" for p in victims],
+                    len(victims), method="DELETE",
+                )
+                print(f"   p50 {results['delete_patient']['p50_ms']}ms  p99 {results['delete_patient']['p99_ms']}ms")
+
+    await close_db()
+    return {
+        "started_at": datetime.utcnow().isoformat(),
+        "meta": {
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "dialect": DATABASE_URL.split(":", 1)[0] if DATABASE_URL else None,
+            "cache": os.getenv("CACHE_BACKEND"),
+            "counts": counts,
+            "heavy_patient_calls": targets["heavy_patient_calls"],
+            "seed": seed_info,
+        },
+        "endpoints": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold_pct: float) -> list:
+    """Print a latency/memory diff and return the regressions"""
+    regressions = []
+    print(f"\n{'endpoint':28} {'metric':14} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p99_ms", "peak_alloc_kb"):
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            flag = " ❌" if change > threshold_pct else ""
+            print(f"{name:28} {metric:14} {old:>12} {new:>12} {change:>+7.1f}%{flag}")
+            if flag:
+                regressions.append({"endpoint": name, "metric": metric, "baseline": old, "current": new})
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="REST API benchmark against DATABASE_URL")
+    parser.add_argument("--seed", action="store_true", help="append seed data before measuring")
+    parser.add_argument("--scale", type=float, default=1.0, help="fraction of 100k/5M/1M rows to seed")
+    parser.add_argument("--only", nargs="*", help="endpoint names to run")
+    parser.add_argument("--iterations-factor", type=float, default=1.0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--no-delete", action="store_true", help="leave the data untouched")
+    parser.add_argument("--cache", action="store_true", help="keep the read-through cache enabled")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--random-seed", type=int, default=7)
+    parser.add_argument("--output", default="api_bench.json")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--regression-pct", type=float, default=20.0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # Read before app modules are imported
+    if not args.cache:
+        os.environ["CACHE_BACKEND"] = "none"
+    os.environ.setdefault("DB_ECHO", "false")
+    os.environ.setdefault("STARTUP_MODE", "lazy")
+
+    results = asyncio.run(run_bench(args))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.regression_pct)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) above {args.regression_pct}%")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Local OpenAI-compatible server for offline benchmarks.
+
+Serves chat completions (streamed and JSON), speech and transcription with
+the same latency specs as app/services/fake_providers.py, so the real OpenAI
+client, HTTP and SSE parsing code paths are part of the measurement.
+
+    python -m benchmarks.fake_openai_server --port 9100
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_KEY=fake \\
+        STT_PROVIDER=openai LLM_PROVIDER=openai TTS_PROVIDER=openai SUMMARY_PROVIDER=openai \\
+        uvicorn app.main:app
+"""
+import os
+import asyncio
+import argparse
+import itertools
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.fake_providers import (
+    FAKE_LLM_TOKEN_MS,
+    FAKE_LLM_TTFB_MS,
+    FAKE_LLM_WORDS_PER_CHUNK,
+    FAKE_REPLIES,
+    FAKE_STT_LATENCY_MS,
+    FAKE_SUMMARY,
+    FAKE_TRANSCRIPTS,
+    FAKE_TTS_TTFB_MS,
+    estimate_usage,
+    parse_latency,
+    render_tone,
+    stream_fake_completion,
+    summary_latency,
+)
+
+# OpenAI "pcm" speech output is 24kHz 16-bit mono
+SPEECH_SAMPLE_RATE = 24000
+SPEECH_CHUNK_BYTES = int(os.getenv("FAKE_SPEECH_CHUNK_BYTES", "4800"))  # 100ms
+
+app = FastAPI(title="Fake OpenAI")
+_replies = itertools.cycle(FAKE_REPLIES)
+_transcripts = itertools.cycle(FAKE_TRANSCRIPTS)
+_stt_latency = parse_latency(FAKE_STT_LATENCY_MS)
+_tts_ttfb = parse_latency(FAKE_TTS_TTFB_MS)
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    model = body.get("model", "fake")
+
+    # JSON mode is only used by the post-call summary
+    if body.get("response_format", {}).get("type") == "json_object":
+        await asyncio.sleep(summary_latency.sample())
+        return _completion(model, FAKE_SUMMARY, messages)
+
+    reply = next(_replies)
+    if not body.get("stream"):
+        await asyncio.sleep(parse_latency(FAKE_LLM_TTFB_MS).sample())
+        return _completion(model, reply, messages)
+
+    async def events():
+        async for chunk in stream_fake_completion(
+            messages, reply, model, FAKE_LLM_TTFB_MS, FAKE_LLM_TOKEN_MS, FAKE_LLM_WORDS_PER_CHUNK
+        ):
+            yield f"data: {chunk.model_dump_json(exclude_none=True)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def _completion(model: str, content: str, messages: list) -> JSONResponse:
+    return JSONResponse({
+        "id": "fake",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": estimate_usage(messages, content).model_dump(),
+    })
+
+
+@app.post("/v1/audio/speech")
+async def speech(request: Request):
+    body = await request.json()
+    audio = render_tone(body.get("input", ""), SPEECH_SAMPLE_RATE)
+
+    async def chunks():
+        await asyncio.sleep(_tts_ttfb.sample())
+        for i in range(0, len(audio), SPEECH_CHUNK_BYTES):
+            yield audio[i:i + SPEECH_CHUNK_BYTES]
+            await asyncio.sleep(0)
+
+    return StreamingResponse(chunks(), media_type="audio/pcm")
+
+
+@app.post("/v1/audio/transcriptions")
+async def transcriptions(request: Request):
+    # Drain the upload so request size is part of the cost, the audio is ignored
+    await request.body()
+    await asyncio.sleep(_stt_latency.sample())
+    return JSONResponse({"text": next(_transcripts)})
+
+
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "fake-gpt-4o-mini", "object": "model", "owned_by": "fake"}]}
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
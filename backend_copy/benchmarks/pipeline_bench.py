@@ -0,0 +1,299 @@
+"""
+Offline pipeline benchmark.
+
+Drives the same processor chain as run_patient_call (user aggregator, LLM,
+TTS, assistant aggregator) with the fake providers, feeding each caller turn
+as VAD + transcription frames. With the default zero provider latencies the
+numbers are pure pipeline overhead; pass --realistic to keep the FAKE_*
+latency specs from the environment.
+
+    python -m benchmarks.pipeline_bench --turns 30 --calls 4 --output bench.json
+
+Reports per turn: transcription -> first TTS audio, reply completion and the
+context size, so overhead growth with conversation length is visible; then
+times post-call processing (usage calculation, summary, transcript write)
+against a throwaway SQLite database.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime
+
+ZERO_LATENCY = {
+    "FAKE_STT_LATENCY_MS": "0",
+    "FAKE_LLM_TTFB_MS": "0",
+    "FAKE_LLM_TOKEN_MS": "0",
+    "FAKE_TTS_TTFB_MS": "0",
+    "FAKE_SUMMARY_LATENCY_MS": "0",
+}
+
+
+def configure_environment(args):
+    """Must run before any app module is imported, they read env at import time"""
+    os.environ["PROVIDER_MODE"] = "fake"
+    for role in ("STT_PROVIDER", "LLM_PROVIDER", "TTS_PROVIDER", "SUMMARY_PROVIDER"):
+        os.environ[role] = "fake"
+    if not args.realistic:
+        os.environ.update(ZERO_LATENCY)
+    os.environ.setdefault("CACHE_BACKEND", "none")
+
+    db_dir = tempfile.mkdtemp(prefix="pipeline_bench_")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{db_dir}/bench.db"
+    os.environ["DB_ECHO"] = "false"
+
+
+def percentile(values: list, p: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))], 3)
+
+
+def summarize(values: list) -> dict:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": round(max(values), 3) if values else None,
+    }
+
+
+def build_probe():
+    from pipecat.frames.frames import LLMFullResponseEndFrame, TTSAudioRawFrame
+    from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+    class TurnProbe(FrameProcessor):
+        """Sits where transport.output() would and timestamps the bot's reply"""
+
+        def __init__(self):
+            super().__init__()
+            self.first_audio_at = None
+            self.audio_bytes = 0
+            self.reply_done = asyncio.Event()
+
+        def reset(self):
+            self.first_audio_at = None
+            self.audio_bytes = 0
+            self.reply_done.clear()
+
+        async def process_frame(self, frame, direction: FrameDirection):
+            await super().process_frame(frame, direction)
+            if isinstance(frame, TTSAudioRawFrame):
+                if self.first_audio_at is None:
+                    self.first_audio_at = time.perf_counter()
+                self.audio_bytes += len(frame.audio)
+            elif isinstance(frame, LLMFullResponseEndFrame):
+                self.reply_done.set()
+            await self.push_frame(frame, direction)
+
+    return TurnProbe()
+
+
+async def run_conversation(call_index: int, turns: int, timeout: float) -> dict:
+    from pipecat.frames.frames import (
+        EndFrame,
+        TranscriptionFrame,
+        UserStartedSpeakingFrame,
+        UserStoppedSpeakingFrame,
+    )
+    from pipecat.pipeline.pipeline import Pipeline
+    from pipecat.pipeline.runner import PipelineRunner
+    from pipecat.pipeline.task import PipelineParams, PipelineTask
+    from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+    from pipecat.utils.time import time_now_iso8601
+
+    from app.services import providers
+    from app.services.fake_providers import FAKE_TRANSCRIPTS
+
+    llm = providers.create_llm()
+    tts = providers.create_tts()
+    probe = build_probe()
+
+    context = OpenAILLMContext([{
+        "role": "system",
+        "content": f"You are a  hospital assistant of presco hospital calling Bench Patient {call_index}. "
+                   "Your task: How are you feeling today?. Keep responses under 2 sentences."
+    }])
+    context_aggregator = llm.create_context_aggregator(context)
+
+    pipeline = Pipeline([
+        context_aggregator.user(),
+        llm,
+        tts,
+        probe,
+        context_aggregator.assistant(),
+    ])
+    task = PipelineTask(
+        pipeline,
+        params=PipelineParams(
+            audio_in_sample_rate=8000,
+            audio_out_sample_rate=8000,
+            enable_metrics=True,
+            enable_usage_metrics=True,
+        ),
+    )
+    runner = PipelineRunner(handle_sigint=False)
+    runner_task = asyncio.create_task(runner.run(task))
+
+    results = []
+    try:
+        for turn in range(turns):
+            probe.reset()
+            text = FAKE_TRANSCRIPTS[turn % len(FAKE_TRANSCRIPTS)]
+            started = time.perf_counter()
+            # Same order as production: segmented STT only transcribes after VAD stop,
+            # so the user aggregator's aggregation_timeout is part of the measurement
+            await task.queue_frames([
+                UserStartedSpeakingFrame(),
+                UserStoppedSpeakingFrame(),
+                TranscriptionFrame(text, "", time_now_iso8601()),
+            ])
+            try:
+                await asyncio.wait_for(probe.reply_done.wait(), timeout)
+            except asyncio.TimeoutError:
+                results.append({"turn": turn + 1, "timeout": True})
+                continue
+            done = time.perf_counter()
+
+            messages = context.get_messages()
+            results.append({
+                "turn": turn + 1,
+                "first_audio_ms": round((probe.first_audio_at - started) * 1000, 3) if probe.first_audio_at else None,
+                "reply_ms": round((done - started) * 1000, 3),
+                "audio_secs": round(probe.audio_bytes / 2 / 8000, 2),
+                "context_messages": len(messages),
+                "context_chars": sum(len(str(m.get("content", ""))) for m in messages),
+            })
+    finally:
+        await task.queue_frame(EndFrame())
+        await asyncio.wait_for(runner_task, timeout)
+
+    return {"turns": results, "messages": context.get_messages()}
+
+
+async def bench_post_call(messages: list) -> dict:
+    """Time the work run_patient_call does after the caller hangs up"""
+    from app.database import AsyncSessionLocal, init_db
+    from app.models import Patient, Call
+    from app.services.pipeline_service import (
+        calculate_usage_from_transcript,
+        generate_call_summary,
+        save_transcript,
+    )
+
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        patient = Patient(name="Bench Patient", phone=f"+1{int(time.time() * 1000) % 10**12:012d}")
+        db.add(patient)
+        await db.flush()
+        call = Call(patient_id=patient.id, call_sid=f"bench-{time.time_ns()}", status="answered")
+        db.add(call)
+        await db.commit()
+        call_id = call.id
+
+    started = time.perf_counter()
+    usage = calculate_usage_from_transcript(messages)
+    usage_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    await generate_call_summary(messages)
+    summary_ms = (time.perf_counter() - started) * 1000
+
+    # save_transcript generates the summary itself, so its time includes summary_ms
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        await save_transcript(call_id, messages, db, usage)
+        save_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "messages": len(messages),
+        "usage_calculation_ms": round(usage_ms, 3),
+        "summary_ms": round(summary_ms, 3),
+        "save_transcript_ms": round(save_ms, 3),
+        "db_write_ms": round(max(0.0, save_ms - summary_ms), 3),
+    }
+
+
+async def run_bench(args) -> dict:
+    from app.database import close_db
+
+    started = time.perf_counter()
+    conversations = await asyncio.gather(*(
+        run_conversation(i, args.turns, args.turn_timeout) for i in range(args.calls)
+    ))
+    elapsed = time.perf_counter() - started
+
+    turns = [t for c in conversations for t in c["turns"] if not t.get("timeout")]
+    by_turn = {}
+    for t in turns:
+        by_turn.setdefault(t["turn"], []).append(t)
+
+    # Group turns so growth with conversation length stands out
+    buckets = {}
+    bucket_size = max(1, args.turns // 5)
+    for turn_number, rows in sorted(by_turn.items()):
+        start = (turn_number - 1) // bucket_size * bucket_size + 1
+        label = f"{start}-{min(args.turns, start + bucket_size - 1)}"
+        buckets.setdefault(label, []).extend(r["first_audio_ms"] for r in rows if r["first_audio_ms"] is not None)
+
+    post_call = await bench_post_call(conversations[0]["messages"])
+    await close_db()
+
+    return {
+        "started_at": datetime.utcnow().isoformat(),
+        "config": {
+            "calls": args.calls,
+            "turns": args.turns,
+            "realistic_latency": args.realistic,
+            "python": sys.version.split()[0],
+        },
+        "elapsed_secs": round(elapsed, 2),
+        "timeouts": sum(1 for c in conversations for t in c["turns"] if t.get("timeout")),
+        "first_audio_ms": summarize([t["first_audio_ms"] for t in turns if t["first_audio_ms"] is not None]),
+        "reply_ms": summarize([t["reply_ms"] for t in turns]),
+        "first_audio_ms_by_turn": {label: summarize(values) for label, values in buckets.items()},
+        "final_context": {
+            "messages": turns[-1]["context_messages"] if turns else 0,
+            "chars": turns[-1]["context_chars"] if turns else 0,
+        },
+        "post_call": post_call,
+        "turns": conversations[0]["turns"] if args.per_turn else None,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline pipeline overhead benchmark")
+    parser.add_argument("--calls", type=int, default=1, help="conversations run concurrently")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--realistic", action="store_true", help="keep FAKE_* latency specs from the env")
+    parser.add_argument("--turn-timeout", type=float, default=30.0)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--log-level", default="WARNING", help="pipeline log level, DEBUG adds real cost")
+    parser.add_argument("--per-turn", action="store_true", help="include the first call's per-turn rows")
+    parser.add_argument("--output", help="write the JSON summary here")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+
+    from loguru import logger
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    summary = asyncio.run(run_bench(args))
+    text = json.dumps(summary, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
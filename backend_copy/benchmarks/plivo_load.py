@@ -0,0 +1,382 @@
+"""
+Load test for the Plivo media-stream websocket.
+
+Opens N concurrent /ws/plivo/{call_id} connections that behave like Plivo:
+a start event, then 20ms mu-law media frames paced in real time, speech
+followed by silence while the bot answers. Run the server with
+PROVIDER_MODE=fake to exercise the whole pipeline without provider calls.
+
+    PROVIDER_MODE=fake uvicorn app.main:app --port 8000
+    python -m benchmarks.plivo_load --calls 50 --turns 3 --seed
+
+Measured per turn: end of caller speech -> first playAudio (includes the VAD
+stop delay), outbound audio underruns while the bot is speaking, client pacing
+lag, and server event loop lag from /health/loop. With --barge-in-after the
+caller talks over each reply and the time to clearAudio is reported too.
+"""
+import json
+import time
+import uuid
+import wave
+import base64
+import asyncio
+import argparse
+import audioop
+from datetime import datetime
+
+import httpx
+import numpy as np
+import websockets
+
+SAMPLE_RATE = 8000
+FRAME_MS = 20
+FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000  # one mu-law byte per sample
+ULAW_SILENCE = b"\xff" * FRAME_BYTES
+
+
+# ---- Caller audio ----
+# Rough (F1, F2, F3) formants for a, e, o, i, u
+VOWEL_FORMANTS = [(730, 1090, 2440), (530, 1840, 2480), (570, 840, 2410), (270, 2290, 3010), (300, 870, 2240)]
+
+
+def synthesize_speech(seconds: float, f0: float = 120, syllable_secs: float = 0.18) -> bytes:
+    """Chain of formant-filtered vowels, close enough to speech for Silero VAD"""
+    n = int(SAMPLE_RATE * syllable_secs)
+    t = np.arange(n) / SAMPLE_RATE
+    pitch = f0 * (1 + 0.08 * np.sin(np.pi * t / syllable_secs))
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+
+    syllables = []
+    for k in range(int(np.ceil(seconds / syllable_secs))):
+        formants = VOWEL_FORMANTS[k % len(VOWEL_FORMANTS)]
+        syllable = np.zeros(n)
+        for harmonic in range(1, int(3800 / f0)):
+            gain = 0.02 + sum(np.exp(-((harmonic * f0 - f) ** 2) / (2 * 90 ** 2)) for f in formants)
+            syllable += gain * np.sin(harmonic * phase)
+        syllables.append(syllable * np.hanning(n) ** 0.3)
+
+    signal = np.concatenate(syllables)[:int(SAMPLE_RATE * seconds)]
+    signal = signal / np.max(np.abs(signal))
+    signal += 0.02 * np.random.default_rng(0).standard_normal(len(signal))
+    pcm = (signal / np.max(np.abs(signal)) * 12000).astype("<i2").tobytes()
+    return audioop.lin2ulaw(pcm, 2)
+
+
+def load_audio(path: str) -> bytes:
+    """Read a wav file (any rate, mono/stereo) or raw 8kHz mu-law"""
+    if not path.lower().endswith(".wav"):
+        with open(path, "rb") as f:
+            return f.read()
+
+    with wave.open(path, "rb") as w:
+        pcm = w.readframes(w.getnframes())
+        width, channels, rate = w.getsampwidth(), w.getnchannels(), w.getframerate()
+
+    if channels == 2:
+        pcm = audioop.tomono(pcm, width, 0.5, 0.5)
+    if width != 2:
+        pcm = audioop.lin2lin(pcm, width, 2)
+    if rate != SAMPLE_RATE:
+        pcm, _ = audioop.ratecv(pcm, 2, 1, rate, SAMPLE_RATE, None)
+    return audioop.lin2ulaw(pcm, 2)
+
+
+# ---- Stats ----
+def percentile(values: list, p: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))], 2)
+
+
+def summarize(values: list) -> dict:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": round(max(values), 2) if values else None,
+    }
+
+
+class CallStats:
+    def __init__(self, call_id: int):
+        self.call_id = call_id
+        self.response_latencies_ms = []
+        self.timeouts = 0
+        self.underruns = 0
+        self.dropped_frames = 0
+        self.audio_frames_received = 0
+        self.interruptions = 0
+        self.barge_in_clear_ms = []
+        self.frames_after_clear = 0
+        self.send_lag_ms = []
+        self.error = None
+
+
+# ---- One simulated call ----
+class SimulatedCall:
+    def __init__(self, url: str, call_id: int, speech: bytes, args):
+        self.url = url
+        self.stats = CallStats(call_id)
+        self.speech = speech
+        self.args = args
+        self.stream_id = str(uuid.uuid4())
+
+        self._utterance_ended_at = None
+        self._first_audio = asyncio.Event()
+        self._first_audio_at = None
+        self._barge_in_at = None
+        self._cleared = False
+        self._playout_until = 0.0
+        self._in_bot_turn = False
+
+    async def _send_frame(self, ws, payload: bytes):
+        await ws.send(json.dumps({
+            "event": "media",
+            "streamId": self.stream_id,
+            "media": {
+                "track": "inbound",
+                "contentType": "audio/x-mulaw",
+                "sampleRate": SAMPLE_RATE,
+                "payload": base64.b64encode(payload).decode(),
+            },
+        }))
+
+    async def _stream(self, ws, frames, until=None):
+        """Send frames at real-time pace; stop early when until() becomes true"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for i, frame in enumerate(frames):
+            due = started + i * FRAME_MS / 1000
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.stats.send_lag_ms.append(max(0.0, (loop.time() - due) * 1000))
+            await self._send_frame(ws, frame)
+            if until and until():
+                return
+
+    def _silence(self, seconds: float):
+        return (ULAW_SILENCE for _ in range(int(seconds * 1000 / FRAME_MS)))
+
+    def _speech_frames(self):
+        for i in range(0, len(self.speech) - FRAME_BYTES + 1, FRAME_BYTES):
+            yield self.speech[i:i + FRAME_BYTES]
+
+    async def _receive(self, ws):
+        async for raw in ws:
+            message = json.loads(raw)
+            event = message.get("event")
+            now = time.perf_counter()
+
+            if event == "clearAudio":
+                self.stats.interruptions += 1
+                self._playout_until = now
+                if self._barge_in_at is not None:
+                    self.stats.barge_in_clear_ms.append((now - self._barge_in_at) * 1000)
+                    self._barge_in_at = None
+                    self._cleared = True
+                continue
+            if event != "playAudio":
+                continue
+
+            payload = base64.b64decode(message["media"]["payload"])
+            duration = len(payload) / SAMPLE_RATE
+            self.stats.audio_frames_received += 1
+
+            if self._cleared and self._utterance_ended_at is None:
+                # Audio of the interrupted reply that was already in flight
+                self.stats.frames_after_clear += 1
+                continue
+
+            if not self._in_bot_turn:
+                self._in_bot_turn = True
+                if self._utterance_ended_at is not None:
+                    self.stats.response_latencies_ms.append((now - self._utterance_ended_at) * 1000)
+                    self._utterance_ended_at = None
+                self._first_audio_at = now
+                self._cleared = False
+                self._first_audio.set()
+            elif now - self._playout_until > self.args.jitter_ms / 1000:
+                # The caller's playout buffer ran dry mid-reply: audible gap
+                self.stats.underruns += 1
+                self.stats.dropped_frames += int((now - self._playout_until) * 1000 / FRAME_MS)
+
+            self._playout_until = max(now, self._playout_until) + duration
+
+    def _barge_in_due(self) -> bool:
+        """Time to talk over the bot's reply"""
+        return (
+            self._first_audio.is_set()
+            and time.perf_counter() > self._first_audio_at + self.args.barge_in_after
+        )
+
+    def _bot_finished(self) -> bool:
+        """Reply played out and the line has been quiet for the turn gap"""
+        return (
+            self._first_audio.is_set()
+            and time.perf_counter() > self._playout_until + self.args.turn_gap
+        )
+
+    async def run(self):
+        try:
+            async with websockets.connect(self.url, max_size=None) as ws:
+                await ws.send(json.dumps({
+                    "event": "start",
+                    "start": {"streamId": self.stream_id, "callId": f"load-{self.stats.call_id}"},
+                }))
+                receiver = asyncio.create_task(self._receive(ws))
+                try:
+                    await self._stream(ws, self._silence(0.5))
+                    for _ in range(self.args.turns):
+                        await self._turn(ws)
+                finally:
+                    receiver.cancel()
+        except Exception as e:
+            self.stats.error = f"{e.__class__.__name__}: {e}"
+        return self.stats
+
+    async def _turn(self, ws):
+        if time.perf_counter() < self._playout_until:
+            self._barge_in_at = time.perf_counter()
+        self._first_audio.clear()
+        self._in_bot_turn = False
+        await self._stream(ws, self._speech_frames())
+        self._utterance_ended_at = time.perf_counter()
+
+        deadline = self.args.reply_timeout
+        until = self._barge_in_due if self.args.barge_in_after else self._bot_finished
+        await self._stream(ws, self._silence(deadline), until=until)
+        if not self._first_audio.is_set():
+            self.stats.timeouts += 1
+            self._utterance_ended_at = None
+
+
+# ---- Seeding ----
+async def seed_calls(count: int, custom_questions: str = None) -> list:
+    """Create one patient and call per simulated caller in the server's database"""
+    from app.database import AsyncSessionLocal, close_db, init_db
+    from app.models import Patient, Call
+
+    await init_db()
+    run = uuid.uuid4().hex[:6]
+    async with AsyncSessionLocal() as db:
+        calls = []
+        for i in range(count):
+            patient = Patient(
+                name=f"Load Test {i}",
+                phone=f"+9{int(run, 16) % 10**6:06d}{i:06d}",
+                custom_questions=custom_questions,
+            )
+            db.add(patient)
+            await db.flush()
+            call = Call(patient_id=patient.id, call_sid=f"load-{run}-{i}", status="answered")
+            db.add(call)
+            calls.append(call)
+        await db.commit()
+    # An open pooled connection keeps the driver's thread, and the process, alive
+    await close_db()
+    return [call.id for call in calls]
+
+
+# ---- Runner ----
+async def fetch_loop_stats(client: httpx.AsyncClient, reset: bool = False):
+    try:
+        response = await client.get("/health/loop", params={"reset": reset})
+        return response.json()
+    except httpx.HTTPError as e:
+        return {"error": str(e)}
+
+
+async def run_load(args) -> dict:
+    speech = load_audio(args.audio) if args.audio else synthesize_speech(args.utterance_secs)
+
+    if args.call_ids:
+        call_ids = [int(c) for c in args.call_ids.split(",")]
+    elif args.seed:
+        questions = None
+        if args.questions:
+            with open(args.questions) as f:
+                questions = f.read()
+        call_ids = await seed_calls(args.calls, questions)
+    else:
+        raise SystemExit("Pass --seed or --call-ids")
+
+    ws_base = args.host.replace("http", "ws", 1)
+    calls = [SimulatedCall(f"{ws_base}/ws/plivo/{call_id}", call_id, speech, args) for call_id in call_ids]
+
+    async def start(i, call):
+        await asyncio.sleep(args.ramp * i / max(1, len(calls)))
+        return await call.run()
+
+    async with httpx.AsyncClient(base_url=args.host, timeout=10) as client:
+        await fetch_loop_stats(client, reset=True)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(start(i, call) for i, call in enumerate(calls)))
+        elapsed = time.perf_counter() - started
+        server_loop = await fetch_loop_stats(client)
+
+    latencies = [ms for r in results for ms in r.response_latencies_ms]
+    send_lag = [ms for r in results for ms in r.send_lag_ms]
+    return {
+        "started_at": datetime.utcnow().isoformat(),
+        "config": {
+            "host": args.host,
+            "calls": len(calls),
+            "turns": args.turns,
+            "ramp_secs": args.ramp,
+            "audio": args.audio or f"synthetic {args.utterance_secs}s",
+            "jitter_ms": args.jitter_ms,
+        },
+        "elapsed_secs": round(elapsed, 2),
+        "failed_calls": sum(1 for r in results if r.error),
+        "errors": sorted({r.error for r in results if r.error}),
+        "turns_completed": len(latencies),
+        "reply_timeouts": sum(r.timeouts for r in results),
+        "response_latency_ms": summarize(latencies),
+        "underruns": sum(r.underruns for r in results),
+        "dropped_frames": sum(r.dropped_frames for r in results),
+        "audio_frames_received": sum(r.audio_frames_received for r in results),
+        "interruptions": sum(r.interruptions for r in results),
+        # Caller speech start -> clearAudio, includes the VAD start delay
+        "barge_in_clear_ms": summarize([ms for r in results for ms in r.barge_in_clear_ms]),
+        "frames_after_clear": sum(r.frames_after_clear for r in results),
+        # High client lag means the load generator itself is the bottleneck
+        "client_send_lag_ms": summarize(send_lag),
+        "server_loop_lag": server_loop,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent Plivo websocket load test")
+    parser.add_argument("--host", default="http://127.0.0.1:8000")
+    parser.add_argument("--calls", type=int, default=10, help="concurrent calls (with --seed)")
+    parser.add_argument("--call-ids", help="comma separated existing call ids instead of seeding")
+    parser.add_argument("--seed", action="store_true", help="create patients/calls via DATABASE_URL")
+    parser.add_argument("--questions", help="custom_questions for seeded patients, e.g. a questionnaire JSON file")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--audio", help="caller utterance: .wav or raw 8kHz mu-law")
+    parser.add_argument("--utterance-secs", type=float, default=2.0, help="length of synthetic speech")
+    parser.add_argument("--turn-gap", type=float, default=0.5, help="silence after the bot finishes")
+    parser.add_argument("--reply-timeout", type=float, default=10.0)
+    parser.add_argument("--jitter-ms", type=float, default=60.0, help="caller playout buffer")
+    parser.add_argument("--barge-in-after", type=float, default=0.0,
+                        help="start the next utterance this many seconds into each reply")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds to spread connection starts")
+    parser.add_argument("--output", help="write the JSON summary here")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    summary = asyncio.run(run_load(args))
+    text = json.dumps(summary, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Bulk seeding of patients, calls and transcripts for benchmarks.
+
+Uses whatever DATABASE_URL points at (SQLite or MySQL) and the ORM tables,
+which mirror db/backup_structure.sql. Rows are generated deterministically
+and written with batched multi-row INSERTs on the app's engine.
+
+Calls are skewed across patients (a few patients have thousands of calls,
+most have tens) so per-patient endpoints see realistic outliers.
+
+    python -m benchmarks.seed_data --patients 100000 --calls 5000000 --transcripts 1000000
+"""
+import os
+import re
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+SEED_BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", "5000"))
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "..", "db", "backup_structure.sql")
+
+STATUSES = ["completed"] * 7 + ["failed", "initiated", "answered"]
+LANGUAGES = ["english"] * 4 + ["hindi"]
+PATIENT_TYPES = ["opd", "opd", "discharged"]
+
+SAMPLE_TURNS = [
+    ("assistant", "Hello! This is Presco hospital calling to check on you. How are you feeling today?"),
+    ("user", "I'm feeling a bit better, thank you."),
+    ("assistant", "That's good to hear. Are you taking your medicines on time?"),
+    ("user", "Yes, twice a day after meals like the doctor said."),
+    ("assistant", "Have you had any fever, swelling or pain around the wound?"),
+    ("user", "A little pain at night but no fever."),
+    ("assistant", "Thank you. Please call us if the pain gets worse. Take care!"),
+]
+SAMPLE_SUMMARY = json.dumps({
+    "sentiment": "positive",
+    "key_points": ["Recovering well", "Taking medication"],
+    "health_concerns": ["Mild pain at night"],
+    "follow_up_needed": False,
+    "follow_up_reason": "",
+})
+
+
+def schema_columns_from_dump(path: str = SCHEMA_FILE) -> dict:
+    """Column names per table from the MySQL dump"""
+    with open(path) as f:
+        sql = f.read()
+    tables = {}
+    for table, body in re.findall(r"CREATE TABLE `(\w+)` \((.*?)\n\)", sql, re.S):
+        tables[table] = re.findall(r"^\s+`(\w+)`", body, re.M)
+    return tables
+
+
+def check_schema() -> list:
+    """Differences between the ORM tables and db/backup_structure.sql"""
+    from app.database import Base
+    # Not used by name: importing the models is what puts their tables on
+    # Base.metadata, which is empty otherwise
+    import app.models  # noqa: F401
+
+    problems = []
+    for table, columns in schema_columns_from_dump().items():
+        model_table = Base.metadata.tables.get(table)
+        if model_table is None:
+            problems.append(f"{table}: missing from models")
+            continue
+        model_columns = [c.name for c in model_table.columns]
+        if set(columns) != set(model_columns):
+            problems.append(f"{table}: dump {sorted(columns)} != models {sorted(model_columns)}")
+    return problems
+
+
+def _transcript_json(call_started: datetime, turns: int) -> str:
+    conversation = [
+        {"role": role, "content": content}
+        for role, content in (SAMPLE_TURNS * (turns // len(SAMPLE_TURNS) + 1))[:turns]
+    ]
+    return json.dumps({
+        "conversation": conversation,
+        "call_ended_at": (call_started + timedelta(minutes=2)).isoformat(),
+    })
+
+
+def _patient_rows(start_id: int, count: int, now: datetime, rng: random.Random):
+    for patient_id in range(start_id, start_id + count):
+        yield {
+            "id": patient_id,
+            "name": f"Patient {patient_id}",
+            # No E.164 number starts with 0, so these can never dial a real phone
+            "phone": f"+0{patient_id:012d}",
+            "age": rng.randint(18, 90),
+            "language": rng.choice(LANGUAGES),
+            "custom_questions": "Are you taking your medicines on time?" if patient_id % 3 == 0 else None,
+            "patient_type": rng.choice(PATIENT_TYPES),
+            "created_at": now - timedelta(days=rng.randint(0, 730)),
+        }
+
+
+def skewed_patient(first_id: int, patients: int, rng: random.Random) -> int:
+    """Squared uniform: the lowest ids get thousands of calls, the median tens"""
+    return first_id + int(patients * rng.random() ** 2)
+
+
+def _call_rows(start_id, count, first_patient_id, patients, now, rng, run_tag):
+    for call_id in range(start_id, start_id + count):
+        started = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        duration = rng.randint(20, 300)
+        status = rng.choice(STATUSES)
+        ended = started + timedelta(seconds=duration) if status == "completed" else None
+        yield {
+            "id": call_id,
+            "patient_id": skewed_patient(first_patient_id, patients, rng),
+            "call_sid": f"seed-{run_tag}-{call_id}",
+            "status": status,
+            "duration": duration if ended else 0,
+            "cost": round(duration * 0.0004, 4) if ended else 0.0,
+            "started_at": started,
+            "ended_at": ended,
+            "updated_at": ended or started,
+        }
+
+
+def _transcript_rows(call_ids, now, rng, turns):
+    for call_id in call_ids:
+        created = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        yield {
+            "call_id": call_id,
+            "full_transcript": _transcript_json(created, turns),
+            "summary": SAMPLE_SUMMARY,
+            "stt_cost": 0.0013,
+            "llm_cost": 0.0001,
+            "tts_cost": 0.0043,
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+async def _insert_batches(engine, table, rows, total: int, label: str, batch_size: int):
+    started = time.perf_counter()
+    batch = []
+    written = 0
+
+    async def flush():
+        nonlocal written
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), batch)
+        written += len(batch)
+        batch.clear()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            await flush()
+            if written % (batch_size * 20) == 0:
+                rate = written / max(time.perf_counter() - started, 1e-6)
+                print(f"  {label}: {written:,}/{total:,} ({rate:,.0f} rows/s)")
+    if batch:
+        await flush()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {label}: {written:,} rows in {elapsed:.1f}s")
+    return elapsed
+
+
+async def table_counts(engine) -> dict:
+    from app.models import Patient, Call, Transcript
+
+    async with engine.connect() as conn:
+        return {
+            "patients": (await conn.execute(select(func.count()).select_from(Patient))).scalar(),
+            "calls": (await conn.execute(select(func.count()).select_from(Call))).scalar(),
+            "transcripts": (await conn.execute(select(func.count()).select_from(Transcript))).scalar(),
+        }
+
+
+async def seed(
+    patients: int,
+    calls: int,
+    transcripts: int,
+    transcript_turns: int = 12,
+    seed_value: int = 42,
+    batch_size: int = SEED_BATCH_SIZE,
+) -> dict:
+    """Append the requested rows to the database and return timings and counts"""
+    from app.database import engine, init_db
+    from app.models import Patient, Call, Transcript
+
+    for problem in check_schema():
+        print(f"⚠️ Schema drift: {problem}")
+
+    await init_db()
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    run_tag = f"{seed_value}{int(time.time())}"
+
+    async with engine.connect() as conn:
+        first_patient = ((await conn.execute(select(func.max(Patient.id)))).scalar() or 0) + 1
+        first_call = ((await conn.execute(select(func.max(Call.id)))).scalar() or 0) + 1
+
+    timings = {}
+    timings["patients"] = await _insert_batches(
+        engine, Patient.__table__, _patient_rows(first_patient, patients, now, rng),
+        patients, "patients", batch_size,
+    )
+    timings["calls"] = await _insert_batches(
+        engine, Call.__table__, _call_rows(first_call, calls, first_patient, patients, now, rng, run_tag),
+        calls, "calls", batch_size,
+    )
+
+    # Spread transcripts evenly over the new calls
+    step = max(1, calls // max(transcripts, 1))
+    transcript_call_ids = range(first_call, first_call + calls, step)[:transcripts]
+    timings["transcripts"] = await _insert_batches(
+        engine, Transcript.__table__, _transcript_rows(transcript_call_ids, now, rng, transcript_turns),
+        len(transcript_call_ids), "transcripts", max(1, batch_size // 5),
+    )
+
+    return {
+        "first_patient_id": first_patient,
+        "first_call_id": first_call,
+        "seconds": {k: round(v, 1) for k, v in timings.items()},
+        "counts": await table_counts(engine),
+    }
+
+
+def main():
+    import asyncio
+    from app.database import close_db
+
+    parser = argparse.ArgumentParser(description="Seed benchmark data into DATABASE_URL")
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--calls", type=int, default=5_000_000)
+    parser.add_argument("--transcripts", type=int, default=1_000_000)
+    parser.add_argument("--transcript-turns", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            print(json.dumps(await seed(
+                args.patients, args.calls, args.transcripts, args.transcript_turns, args.seed
+            ), indent=2))
+        finally:
+            await close_db()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
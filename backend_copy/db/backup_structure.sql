@@ -27,14 +27,19 @@ CREATE TABLE `calls` (
   `patient_id` int NOT NULL,
   `call_sid` varchar(100) COLLATE utf8mb4_unicode_ci NOT NULL,
   `status` varchar(20) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `campaign` varchar(50) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `idempotency_key` varchar(100) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
   `duration` int DEFAULT NULL,
   `cost` float DEFAULT NULL,
   `started_at` datetime DEFAULT NULL,
   `ended_at` datetime DEFAULT NULL,
+  `updated_at` datetime(6) DEFAULT NULL,
   PRIMARY KEY (`id`),
   UNIQUE KEY `call_sid` (`call_sid`),
+  UNIQUE KEY `ix_calls_idempotency_key` (`idempotency_key`),
   KEY `patient_id` (`patient_id`),
   KEY `ix_calls_id` (`id`),
+  KEY `ix_calls_campaign` (`campaign`),
   CONSTRAINT `calls_ibfk_1` FOREIGN KEY (`patient_id`) REFERENCES `patients` (`id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=44 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -77,6 +82,7 @@ CREATE TABLE `transcripts` (
   `llm_cost` float DEFAULT NULL,
   `tts_cost` float DEFAULT NULL,
   `created_at` datetime DEFAULT NULL,
+  `updated_at` datetime(6) DEFAULT NULL,
   PRIMARY KEY (`id`),
   UNIQUE KEY `call_id` (`call_id`),
   KEY `ix_transcripts_id` (`id`),
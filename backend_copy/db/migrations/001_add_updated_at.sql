@@ -0,0 +1,11 @@
+-- Row version timestamps used for ETag / Last-Modified on the read endpoints.
+-- Portable SQL (MySQL, PostgreSQL, SQLite); init_db applies the same change on
+-- startup (database.upgrade_schema), including widening a whole-second MySQL
+-- DATETIME left by an earlier version of this file.
+-- Sub-second precision, two changes within one second must give different ETags.
+-- TIMESTAMP(6) is the portable spelling, on MySQL init_db creates DATETIME(6).
+ALTER TABLE calls ADD COLUMN updated_at TIMESTAMP(6) NULL;
+ALTER TABLE transcripts ADD COLUMN updated_at TIMESTAMP(6) NULL;
+
+UPDATE calls SET updated_at = COALESCE(ended_at, started_at);
+UPDATE transcripts SET updated_at = created_at;
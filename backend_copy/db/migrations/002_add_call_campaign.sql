@@ -0,0 +1,4 @@
+-- Campaign tag for per-campaign spend budgets (app/services/budget.py)
+-- Portable SQL (MySQL, PostgreSQL, SQLite); init_db also adds it on startup (database.upgrade_schema)
+ALTER TABLE calls ADD COLUMN campaign VARCHAR(50) NULL;
+CREATE INDEX ix_calls_campaign ON calls (campaign);
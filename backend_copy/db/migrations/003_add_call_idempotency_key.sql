@@ -0,0 +1,4 @@
+-- Dedup key for POST /api/calls/initiate (app/services/idempotency.py); NULLs don't collide
+-- Portable SQL (MySQL, PostgreSQL, SQLite); init_db also adds it on startup (database.upgrade_schema)
+ALTER TABLE calls ADD COLUMN idempotency_key VARCHAR(100) NULL;
+CREATE UNIQUE INDEX ix_calls_idempotency_key ON calls (idempotency_key);
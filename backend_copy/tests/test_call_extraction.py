@@ -0,0 +1,47 @@
+import pytest
+
+from app.services.call_extraction import RED_FLAG_KEYWORDS, SYMPTOM_KEYWORDS, CallRecordExtractor, _find_keywords
+
+
+@pytest.mark.parametrize("text, expected", [
+    # A negation only covers its own clause
+    ("No fever, but I am bleeding", ["bleeding"]),
+    ("there is no blood but I fainted", ["fainted"]),
+    ("It is not stopping, chest pain all night", ["chest pain"]),
+    # "any" asks, it doesn't negate
+    ("any blood? yes lots of blood", ["blood"]),
+    # One plain mention is enough
+    ("no blood earlier. now there is blood", ["blood"]),
+    ("I can't breathe", ["can't breathe"]),
+    ("मुझे सीने में दर्द है", ["सीने में दर्द"]),
+    # Negated
+    ("no blood", []),
+    ("I have not had any chest pain", []),
+    ("I never fainted", []),
+    # Hindi negation follows the noun
+    ("मुझे सीने में दर्द नहीं है", []),
+    ("खून नहीं आया", []),
+])
+def test_red_flags(text, expected):
+    assert _find_keywords(text, RED_FLAG_KEYWORDS) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("no fever", []),
+    ("No fever, but a bad cough", ["cough"]),
+    ("बुखार नहीं है, खांसी है", ["खांसी"]),
+])
+def test_symptoms(text, expected):
+    assert _find_keywords(text, SYMPTOM_KEYWORDS) == expected
+
+
+def test_finals_before_the_reply_are_one_turn():
+    extractor = CallRecordExtractor(call_id=1, context=None)
+    extractor.observe("I have been feeling")
+    extractor.observe("a bit better today")
+    extractor.end_turn()
+    extractor.observe("No fever")
+
+    record = extractor.record()
+    assert record["user_turns"] == 2
+    assert record["key_points"] == ["I have been feeling a bit better today", "No fever"]
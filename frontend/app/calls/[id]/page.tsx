@@ -2,7 +2,7 @@
 
 import { useEffect, useState } from 'react';
 import { useParams } from 'next/navigation';
-import { getCallTranscript } from '@/lib/api';
+import { getCallDetail } from '@/lib/api';
 import CostBreakdown from '@/components/CostBreakdown';
 import CallSummaryCard from '@/components/CallSummaryCard';
 
@@ -12,18 +12,30 @@ interface Message {
 }
 
 interface CallData {
-  call_id: number;
+  call: {
+    id: number;
+    status: string;
+    duration: number;
+    started_at: string;
+    ended_at: string | null;
+  };
+  patient: {
+    id: number;
+    name: string;
+    phone: string;
+  };
   transcript: {
     conversation: Message[];
     call_ended_at: string;
-  };
+  } | null;
   summary: any;
   costs: {
     stt: number;
     llm: number;
     tts: number;
+    telephony: number;
+    total: number;
   };
-  created_at: string;
 }
 
 export default function CallDetailsPage() {
@@ -38,7 +50,7 @@ export default function CallDetailsPage() {
 
   const loadCallDetails = async () => {
     try {
-      const data = await getCallTranscript(Number(callId));
+      const data = await getCallDetail(Number(callId));
       setCallData(data);
     } catch (error) {
       console.error('Error loading call:', error);
@@ -68,7 +80,8 @@ export default function CallDetailsPage() {
     );
   }
 
-  const duration = callData.transcript.conversation.length * 15; // Approximate
+  const conversation = callData.transcript?.conversation ?? [];
+  const duration = callData.call.duration;
 
   return (
     <div className="min-h-screen p-8 bg-gray-50">
@@ -82,7 +95,9 @@ export default function CallDetailsPage() {
             ← Back
           </button>
           <h1 className="text-3xl font-bold">Call Details</h1>
-          <p className="text-gray-600">Call ID: {callData.call_id}</p>
+          <p className="text-gray-600">
+            Call ID: {callData.call.id} · {callData.patient.name} ({callData.patient.phone})
+          </p>
         </div>
 
         <div className="grid grid-cols-1 lg:grid-cols-3 gap-6">
@@ -92,7 +107,7 @@ export default function CallDetailsPage() {
               <h2 className="text-xl font-semibold mb-4">Conversation Transcript</h2>
 
               <div className="space-y-4">
-                {callData.transcript.conversation.map((message, index) => (
+                {conversation.map((message, index) => (
                   <div
                     key={index}
                     className={`flex ${message.role === 'user' ? 'justify-end' : 'justify-start'}`}
@@ -113,7 +128,7 @@ export default function CallDetailsPage() {
                 ))}
               </div>
 
-              {callData.transcript.conversation.length === 0 && (
+              {conversation.length === 0 && (
                 <p className="text-gray-500 text-center py-8">No conversation recorded</p>
               )}
             </div>
@@ -136,19 +151,19 @@ export default function CallDetailsPage() {
                 <div className="flex justify-between">
                   <span className="text-gray-600">Date:</span>
                   <span className="font-medium">
-                    {new Date(callData.created_at).toLocaleDateString()}
+                    {new Date(callData.call.started_at).toLocaleDateString()}
                   </span>
                 </div>
                 <div className="flex justify-between">
                   <span className="text-gray-600">Time:</span>
                   <span className="font-medium">
-                    {new Date(callData.created_at).toLocaleTimeString()}
+                    {new Date(callData.call.started_at).toLocaleTimeString()}
                   </span>
                 </div>
                 <div className="flex justify-between">
                   <span className="text-gray-600">Status:</span>
-                  <span className="px-2 py-1 bg-green-100 text-green-800 text-xs rounded">
-                    Completed
+                  <span className="px-2 py-1 bg-green-100 text-green-800 text-xs rounded capitalize">
+                    {callData.call.status}
                   </span>
                 </div>
               </div>
@@ -1,8 +1,8 @@
 'use client';
 
-import { useState } from 'react';
-import { useQuery } from '@tanstack/react-query';
-import { getPatients } from '@/lib/api';
+import { useEffect, useState } from 'react';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { getPatients, subscribeToCallEvents } from '@/lib/api';
 
 import { Loader2 } from 'lucide-react';
 import PatientTable from '@/components/patients/PatinentTable';
@@ -11,13 +11,42 @@ type TabType = 'all' | 'called' | 'never-called' | 'opd' | 'discharged';
 
 export default function DashboardPage() {
   const [activeTab, setActiveTab] = useState<TabType>('all');
+  const [liveStatus, setLiveStatus] = useState<Record<number, string>>({});
+  const queryClient = useQueryClient();
 
+  // Call progress comes from the event feed, the list is only fetched once
   const { data, isLoading, error, refetch } = useQuery({
     queryKey: ['patients'],
     queryFn: getPatients,
+    staleTime: Infinity,
+    refetchOnWindowFocus: false,
   });
 
-  const patients = data?.patients || [];
+  useEffect(() => {
+    return subscribeToCallEvents(
+      (event) => {
+        setLiveStatus((current) => ({ ...current, [event.patient_id]: event.status }));
+        if (event.type === 'call.initiated') {
+          queryClient.setQueryData(['patients'], (old: any) =>
+            old && {
+              ...old,
+              patients: old.patients.map((patient: any) =>
+                patient.id === event.patient_id
+                  ? { ...patient, call_count: (patient.call_count || 0) + 1 }
+                  : patient
+              ),
+            }
+          );
+        }
+      },
+      () => queryClient.invalidateQueries({ queryKey: ['patients'] })
+    );
+  }, [queryClient]);
+
+  const patients = (data?.patients || []).map((patient: any) => ({
+    ...patient,
+    live_status: liveStatus[patient.id],
+  }));
 
   const filteredPatients = patients.filter((patient: any) => {
     if (activeTab === 'all') return true;
@@ -3,6 +3,7 @@ interface CostBreakdownProps {
     stt: number;
     llm: number;
     tts: number;
+    telephony?: number;
   };
   duration: number;
 }
@@ -10,7 +11,7 @@ interface CostBreakdownProps {
 const TELEPHONY_COST_PER_MIN = 0.007;
 
 export default function CostBreakdown({ costs, duration }: CostBreakdownProps) {
-  const telephonyCost = (duration / 60) * TELEPHONY_COST_PER_MIN;
+  const telephonyCost = costs.telephony ?? (duration / 60) * TELEPHONY_COST_PER_MIN;
   const total = costs.stt + costs.llm + costs.tts + telephonyCost;
 
   const services = [
@@ -17,8 +17,17 @@ interface Patient {
   language: string;
   custom_questions: string;
   call_count?: number;
+  live_status?: string;
 }
 
+const STATUS_STYLES: Record<string, string> = {
+  initiated: 'bg-gray-100 text-gray-800',
+  ringing: 'bg-yellow-100 text-yellow-800',
+  answered: 'bg-blue-100 text-blue-800',
+  completed: 'bg-green-100 text-green-800',
+  failed: 'bg-red-100 text-red-800',
+};
+
 interface PatientTableProps {
   patients: Patient[];
   onRefresh: () => void;
@@ -35,8 +44,8 @@ export default function PatientTable({ patients, onRefresh }: PatientTableProps)
     setCalling(patientId);
     try {
       await initiateCall(patientId);
+      // Call count and status arrive on the live event feed
       toast.success('Call initiated successfully');
-      onRefresh();
     } catch (error) {
       toast.error('Failed to initiate call');
     } finally {
@@ -125,7 +134,18 @@ export default function PatientTable({ patients, onRefresh }: PatientTableProps)
                     </span>
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap">
-                    <div className="text-sm text-gray-500">{patient.call_count || 0}</div>
+                    <div className="text-sm text-gray-500">
+                      {patient.call_count || 0}
+                      {patient.live_status && (
+                        <span
+                          className={`ml-2 px-2 inline-flex text-xs leading-5 font-semibold rounded-full ${
+                            STATUS_STYLES[patient.live_status] || 'bg-orange-100 text-orange-800'
+                          }`}
+                        >
+                          {patient.live_status}
+                        </span>
+                      )}
+                    </div>
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap text-right text-sm font-medium">
                     <div className="flex justify-end gap-2">
@@ -5,10 +5,11 @@ export async function getPatients() {
   return res.json();
 }
 
-export async function initiateCall(patientId: number) {
+// One key per click: retries of the same request can't dial the patient twice
+export async function initiateCall(patientId: number, idempotencyKey: string = crypto.randomUUID()) {
   const res = await fetch(`${API_BASE}/initiate`, {
     method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', 'Idempotency-Key': idempotencyKey },
     body: JSON.stringify({ patient_id: patientId }),
   });
   return res.json();
@@ -23,3 +24,41 @@ export async function getCallTranscript(callId: number) {
   const res = await fetch(`${API_BASE}/calls/${callId}/transcript`);
   return res.json();
 }
+
+// Call, patient, transcript, summary and costs in one request
+export async function getCallDetail(callId: number) {
+  const res = await fetch(`${API_BASE}/calls/${callId}/detail`);
+  if (!res.ok) return null;
+  return res.json();
+}
+
+export type CallEvent = {
+  id: number;
+  type: string;
+  call_id: number;
+  patient_id: number;
+  status: string;
+  duration?: number | null;
+  cost?: number | null;
+};
+
+// Live call lifecycle events. EventSource reconnects on its own and sends
+// Last-Event-ID, so missed events are replayed; onReset means the server
+// could not replay them and the caller should refetch.
+export function subscribeToCallEvents(
+  onEvent: (event: CallEvent) => void,
+  onReset: () => void
+) {
+  const source = new EventSource(`${API_BASE}/events`);
+  const types = ['call.initiated', 'call.ringing', 'call.failed', 'call.answered', 'call.ended'];
+
+  types.forEach((type) => {
+    source.addEventListener(type, (e) => {
+      const message = e as MessageEvent;
+      onEvent({ id: Number(message.lastEventId), type, ...JSON.parse(message.data) });
+    });
+  });
+  source.addEventListener('reset', onReset);
+
+  return () => source.close();
+}